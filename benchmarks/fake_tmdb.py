@@ -0,0 +1,189 @@
+"""Local stand-in for api.themoviedb.org and image.tmdb.org.
+
+The server answers the search, images and image download endpoints used
+by FrameChanger with deterministic synthetic data.  Latency, error rate,
+image size and the number of backdrops per title are configurable so
+benchmarks and tests can reproduce slow or flaky networks.
+
+Run it standalone with ``python benchmarks/fake_tmdb.py --port 8765``
+and point the app at it through ``FRAMECHANGER_TMDB_API_URL`` and
+``FRAMECHANGER_TMDB_IMAGE_URL``.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow the server returns opaque bytes
+    Image = None
+
+IMAGE_VARIANTS = 16
+
+
+class FakeTMDBConfig:
+    """Behaviour of the fake server."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, image_size=(1920, 1080),
+                 backdrops=10, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.image_size = tuple(image_size)
+        self.backdrops = backdrops
+        self.seed = seed
+
+    def as_dict(self):
+        return {
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "image_size": list(self.image_size),
+            "backdrops": self.backdrops,
+            "seed": self.seed,
+        }
+
+
+def _media_id(query):
+    digest = hashlib.sha1(query.lower().encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % 1000000 + 1
+
+
+def _make_image(size, variant):
+    """Return JPEG bytes for one of the synthetic image variants."""
+    if Image is None:
+        rng = random.Random(variant)
+        return bytes(rng.getrandbits(8) for _ in range(size[0] * size[1] // 20))
+    rng = random.Random(variant)
+    cells = Image.new("RGB", (16, 9))
+    cells.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(16 * 9)])
+    buffer = io.BytesIO()
+    cells.resize(size, Image.BILINEAR).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class FakeTMDBServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server serving the fake TMDB endpoints."""
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeTMDBConfig()
+        self.rng = random.Random(self.config.seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self._images = {}
+        self._images_lock = threading.Lock()
+        super().__init__((host, port), _Handler)
+
+    @property
+    def api_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/3"
+
+    @property
+    def image_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/t/p"
+
+    def image(self, variant):
+        with self._images_lock:
+            if variant not in self._images:
+                self._images[variant] = _make_image(self.config.image_size, variant)
+            return self._images[variant]
+
+    def delay_and_fail(self):
+        """Sleep for the configured latency and decide whether to fail."""
+        with self.rng_lock:
+            delay = self.config.latency + self.rng.uniform(0, self.config.jitter)
+            failed = self.rng.random() < self.config.error_rate
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    def start(self):
+        """Serve on a background thread and return ``self``."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        if server.delay_and_fail():
+            self.send_error(500)
+            return
+
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts[:2] == ["3", "search"] and len(parts) == 3:
+            query = parse_qs(url.query).get("query", [""])[0]
+            key = "title" if parts[2] == "movie" else "name"
+            self._send_json({"results": [{"id": _media_id(query), key: query}]})
+        elif len(parts) == 4 and parts[0] == "3" and parts[3] == "images":
+            media_id = parts[2]
+            width, height = server.config.image_size
+            backdrops = [
+                {
+                    "file_path": f"/{media_id}_{index}.jpg",
+                    "iso_639_1": None,
+                    "width": width,
+                    "height": height,
+                    "vote_average": 5.0 + index % 5,
+                    "vote_count": index * 3,
+                }
+                for index in range(server.config.backdrops)
+            ]
+            self._send_json({"id": int(media_id), "backdrops": backdrops})
+        elif parts[:2] == ["t", "p"] and len(parts) == 4:
+            variant = int(hashlib.sha1(parts[3].encode("utf-8")).hexdigest()[:8], 16) % IMAGE_VARIANTS
+            self._send(server.image(variant), "image/jpeg")
+        else:
+            self.send_error(404)
+
+    def _send_json(self, payload):
+        self._send(json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--image-size", default="1920x1080")
+    parser.add_argument("--backdrops", type=int, default=10)
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.image_size.split("x"))
+    config = FakeTMDBConfig(args.latency, args.jitter, args.error_rate, (width, height), args.backdrops)
+    server = FakeTMDBServer(config, port=args.port)
+    print(f"API: {server.api_url}\nImages: {server.image_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Reproducible benchmarks for FrameChanger.
+
+Drives the real code paths against the local fake TMDB server in
+``fake_tmdb.py`` and writes machine-readable results::
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare baseline.json results.json
+
+Benchmarks:
+
+* ``change_wallpaper``: random changes end to end (desktop call stubbed).
+* ``warmup``: downloading a wallpaper for every title of a synthetic library.
+* ``show_titles``: filling the favorites view from 1k/10k/100k-title databases.
+* ``preview``: loading and scaling a full-size backdrop for the preview dialog.
+
+Every run happens in a throwaway directory, so the user's database,
+settings and image cache are never touched.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from fake_tmdb import FakeTMDBConfig, FakeTMDBServer  # noqa: E402
+from framechanger import wallpaper_changer as wc  # noqa: E402
+from framechanger.metrics import metrics  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+REPEATS = 5
+
+_qt_app = None
+
+
+def summarize(name, samples, **extra):
+    """Return latency statistics for ``samples`` in seconds."""
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    result = {
+        "name": name,
+        "iterations": len(samples),
+        "mean": statistics.mean(samples),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+    }
+    result.update(extra)
+    return result
+
+
+class Sandbox:
+    """Run FrameChanger in a temporary directory against the fake server."""
+
+    def __init__(self, server):
+        self.server = server
+        self._saved = {}
+
+    def __enter__(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        image_dir = os.path.join(self.tmp.name, "images")
+        os.mkdir(image_dir)
+        replacements = {
+            "image_dir": image_dir,
+            "processed_dir": os.path.join(image_dir, "processed"),
+            "settings_file": os.path.join(self.tmp.name, "settings.json"),
+            "TMDB_API_URL": self.server.api_url,
+            "TMDB_IMAGE_URL": self.server.image_url,
+            "set_wallpaper": lambda image_path: True,
+        }
+        for name, value in replacements.items():
+            self._saved[name] = getattr(wc, name)
+            setattr(wc, name, value)
+        with open(wc.settings_file, "w") as file:
+            json.dump({"api_key": "BENCHMARK", "welcome_shown": True}, file)
+        return self
+
+    def __exit__(self, *exc):
+        wc.wait_for_upgrades()
+        for name, value in self._saved.items():
+            setattr(wc, name, value)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+        return False
+
+
+def create_library(count, path="titles.db"):
+    """Create a titles database with ``count`` synthetic titles."""
+    wc.initialize_database()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT OR IGNORE INTO titles (name, media_type) VALUES (?, ?)",
+        ((f"Title {index}", "movie" if index % 3 else "tv") for index in range(count)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def bench_change_wallpaper(server, iterations):
+    with Sandbox(server):
+        wc.initialize_database()
+        samples = []
+        failures = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result, _ = wc.change_wallpaper()
+            samples.append(time.perf_counter() - start)
+            failures += result != 0
+    return summarize("change_wallpaper", samples, failures=failures)
+
+
+def bench_warmup(server, titles):
+    with Sandbox(server):
+        create_library(titles)
+        conn = sqlite3.connect("titles.db")
+        rows = conn.execute("SELECT name, media_type FROM titles").fetchall()
+        conn.close()
+        samples = []
+        started = time.perf_counter()
+        for name, media_type in rows:
+            start = time.perf_counter()
+            wc.download_wallpaper(name, media_type, "BENCHMARK")
+            samples.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+    return summarize("warmup", samples, titles=len(rows), throughput=len(rows) / elapsed)
+
+
+def qt_application():
+    """Return the QApplication, creating it once for the whole run."""
+    global _qt_app
+    from PyQt5.QtWidgets import QApplication
+
+    if _qt_app is None:
+        _qt_app = QApplication.instance() or QApplication([])
+    return _qt_app
+
+
+def bench_show_titles(server, sizes):
+    from framechanger import app as gui
+
+    qt_application()
+    gui.show_welcome_message = lambda: None
+    results = []
+    for size in sizes:
+        with Sandbox(server):
+            create_library(size)
+            window = gui.MainWindow()
+            for label, search in (("all", ""), ("search", "Title 1")):
+                window.search_input.blockSignals(True)
+                window.search_input.setText(search)
+                window.search_input.blockSignals(False)
+                samples = []
+                for _ in range(REPEATS):
+                    start = time.perf_counter()
+                    window.show_titles()
+                    samples.append(time.perf_counter() - start)
+                results.append(summarize(f"show_titles[{size},{label}]", samples, titles=size))
+            window.jobs.stop()
+            window.tray_icon.hide()
+            window.deleteLater()
+    return results
+
+
+def bench_preview(server, iterations):
+    from framechanger import app as gui
+
+    qt_application()
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as file:
+        file.write(server.image(0))
+        path = file.name
+    try:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            gui.load_preview_pixmap(path)
+            samples.append(time.perf_counter() - start)
+    finally:
+        os.remove(path)
+    return summarize("preview", samples, bytes=len(server.image(0)))
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    width, height = (int(value) for value in args.image_size.split("x"))
+    config = FakeTMDBConfig(args.latency, args.jitter, args.error_rate, (width, height),
+                            args.backdrops, args.seed)
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else list(DEFAULT_SIZES)
+
+    server = FakeTMDBServer(config).start()
+    metrics.reset()
+    try:
+        results = [
+            bench_change_wallpaper(server, args.iterations),
+            bench_warmup(server, args.warmup_titles),
+        ]
+        results.extend(bench_show_titles(server, sizes))
+        results.append(bench_preview(server, args.iterations))
+    finally:
+        server.stop()
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "server": dict(config.as_dict(), requests=server.requests, bytes_sent=server.bytes_sent),
+        "results": results,
+        "stages": metrics.snapshot()["histograms"],
+    }
+
+
+def compare(baseline_path, current_path, threshold):
+    """Print p50 changes between two result files; return 1 on regressions."""
+    with open(baseline_path) as file:
+        baseline = {result["name"]: result for result in json.load(file)["results"]}
+    with open(current_path) as file:
+        current = {result["name"]: result for result in json.load(file)["results"]}
+
+    regressions = 0
+    for name, result in current.items():
+        if name not in baseline:
+            print(f"{name:40} new")
+            continue
+        before, after = baseline[name]["p50"], result["p50"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:40} {before * 1000:10.2f}ms -> {after * 1000:10.2f}ms {change:+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the FrameChanger benchmarks.")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative p50 slowdown reported as a regression")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup-titles", type=int, default=200)
+    parser.add_argument("--sizes", help="Comma separated library sizes for show_titles")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--image-size", default="1920x1080")
+    parser.add_argument("--backdrops", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,12 @@
 This module defines the Qt based interface used to manage favourite
 movies and TV shows and to trigger wallpaper changes.  Core classes
 include :class:`AutoChangerDialog`, :class:`EditDialog`,
-:class:`CustomNotification` and :class:`MainWindow`.  The ``run``
+:class:`LocalFoldersDialog`, :class:`FailedTitlesDialog`,
+:class:`CustomNotification` and
+:class:`MainWindow`.  The ``run``
 function serves as the console entry point.
 """
-
+
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -29,15 +31,23 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
     qApp,
     QFileDialog,
+    QListWidget,
+    QInputDialog,
+    QAbstractItemView,
+    QShortcut,
 )
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QFont, QIcon, QStandardItemModel, QStandardItem, QPixmap
-from framechanger.stylesheets import stylesheets
+from PyQt5.QtCore import QTimer, Qt, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QFont, QIcon, QStandardItemModel, QStandardItem, QPixmap, QImageReader, QKeySequence
+from framechanger import themes
 import logging
 import sys
 import sqlite3
 import os
-from framechanger.logging_utils import configure_logging
+import time
+import argparse
+import json
+import requests
+from framechanger.logging_utils import configure_logging, log_options
 from framechanger.wallpaper_changer import (
     change_wallpaper,
     set_specific_wallpaper,
@@ -46,269 +56,545 @@ from framechanger.wallpaper_changer import (
     initialize_database,
     download_random_image,
     download_wallpaper,
-    set_wallpaper,
+    apply_wallpaper,
     get_api_key,
+    mark_shown,
+    previous_wallpaper,
+    next_wallpaper,
+    toggle_pin,
+    is_pinned,
+    current_wallpaper,
+    wait_for_upgrades,
+    prefetch_jobs,
+    prefetch_title,
+    metadata_jobs,
+    fetch_metadata,
+    PREFETCH_JOB,
+    METADATA_JOB,
 )
-
-# Constants for database and settings file
-DATABASE_NAME = 'titles.db'
-SETTINGS_FILE = 'auto_changer_settings.json'
-
+from framechanger import image_processing
+from framechanger import local_library
+from framechanger import import_export
+from framechanger import title_failures
+from framechanger import discovery
+from framechanger import wallpaper_changer
+from framechanger import single_instance
+from framechanger import jobs
+from framechanger import metadata
+from framechanger import autocomplete
+from framechanger import peer_cache
+from framechanger import policy
+from framechanger import bandwidth
+from framechanger import favorites
+from framechanger.metrics import metrics, start_server
+from framechanger.rate_limit import governor, SCHEDULED, DEFAULT_RATE, DEFAULT_BURST
+
+# Constants for database and settings file
+DATABASE_NAME = 'titles.db'
+SETTINGS_FILE = 'auto_changer_settings.json'
+# Full rescan of the local folders, on top of change notifications
+LIBRARY_RESCAN_INTERVAL = 3600000
+DISCOVERY_REFRESH_INTERVAL = 3600000
+DISCOVERY_STARTUP_DELAY = 15000
+METADATA_REFRESH_INTERVAL = 6 * 3600000
+POLICY_INTERVAL = 60000
+UNDO_LIMIT = 20
+DECADES = range(2020, 1910, -10)
+MIN_RATINGS = (8, 7, 6, 5)
+# Sort options ordered in SQL by the mirrored TMDB details
+SORT_ORDERS = {
+    "Ascending": "t.name",
+    "Descending": "t.name DESC",
+    "Rating": "m.rating IS NULL, m.rating DESC",
+    "Year": "m.year IS NULL, m.year DESC",
+    "Popularity": "m.popularity IS NULL, m.popularity DESC",
+}
+
 # Set up logging will be done when the application starts
-
-class AutoChangerDialog(QDialog):
-    """Dialog to configure the automatic wallpaper changer settings."""
-    def __init__(self, auto_changer_enabled, auto_changer_interval):
-        super().__init__()
-
-        layout = QVBoxLayout()
-        layout.setSpacing(15)
-        layout.setContentsMargins(20, 20, 20, 20)
-        layout.setAlignment(Qt.AlignCenter)
-
-        title_label = QLabel("<h2 style='color: #35495E; font-family: Segoe UI;'>AutoChanger Settings</h2>")
-        title_label.setAlignment(Qt.AlignLeft)
-        layout.addWidget(title_label)
-
-        self.auto_changer_checkbox = QCheckBox("Enable Automatic Changes")
-        self.auto_changer_checkbox.setStyleSheet("font-family: Segoe UI; font-size: 20px;")
-        self.auto_changer_checkbox.setToolTip("Check this box to let FrameChanger switch wallpapers automatically.")
-        self.auto_changer_checkbox.setChecked(auto_changer_enabled)
-        layout.addWidget(self.auto_changer_checkbox)
-
-        self.auto_changer_combobox = QComboBox()
-        self.auto_changer_combobox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
-        self.auto_changer_combobox.setToolTip("Pick how often you'd like FrameChanger to change your wallpaper.")
-        self.auto_changer_combobox.addItems(["1 Minute", "5 Minutes", "15 Minutes", "30 Minutes", "1 Hour", "3 Hours", "6 Hours", "12 Hours", "24 Hours"])
-        self.auto_changer_combobox.setCurrentIndex(auto_changer_interval)
-        layout.addWidget(self.auto_changer_combobox)
-
-        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttonBox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
-        buttonBox.accepted.connect(self.accept)
-        buttonBox.rejected.connect(self.reject)
-        layout.addWidget(buttonBox)
-
-        self.setLayout(layout)
-
-class EditDialog(QDialog):
-    """Dialog to edit the details of a title in the list."""
-    def __init__(self, title, media_type):
-        super().__init__()
-
-        layout = QVBoxLayout()
-        layout.setSpacing(15)
-        layout.setContentsMargins(20, 20, 20, 20)
-        layout.setAlignment(Qt.AlignCenter)
-
-        title_label = QLabel("<h2 style='color: #35495E; font-family: Segoe UI;'>Edit Title</h2>")
-        title_label.setAlignment(Qt.AlignLeft)
-        layout.addWidget(title_label)
-
-        self.title_input = QLineEdit()
-        self.title_input.setText(title)
-        self.title_input.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
-        self.title_input.setPlaceholderText("Enter the movie or TV show title")
-        layout.addWidget(self.title_input)
-
-        self.media_type_input = QComboBox()
-        self.media_type_input.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
-        self.media_type_input.addItems(["movie", "tv"])
-        self.media_type_input.setCurrentIndex(0 if media_type.lower() == "movie" else 1)
-        layout.addWidget(self.media_type_input)
-    
-        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttonBox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
-        buttonBox.accepted.connect(self.accept)
-        buttonBox.rejected.connect(self.reject)
-        layout.addWidget(buttonBox)
-
-        self.setLayout(layout)
-
-def show_welcome_message():
-    """Display a welcome message to the user when the app starts for the first time."""
-    settings = load_settings()
-    if not settings.get('welcome_shown', False):
-        welcome_dialog = QMessageBox()
-        welcome_dialog.setIcon(QMessageBox.Information)
-        welcome_dialog.setWindowTitle("Welcome to FrameChanger")
-
-        welcome_text = (
-            "<h2 style='color: #35495E; font-family: Segoe UI;'>Welcome to FrameChanger</h2>"
-            "<p style='font-size: 16px; font-family: Segoe UI;'>"
-            "FrameChanger helps you add wallpapers from your favorite movies and TV shows to your desktop. Here's how to use it:</p>"
-            "<ul style='font-size: 16px; list-style-type: disc; padding-left: 20px; font-family: Segoe UI;'>"
-            "<li><b>Add your favorite movies and TV shows</b> to your Favorites list.</li>"
-            "<li><b>Double-click</b> a title in your Favorites list to change your wallpaper to an image from that movie or TV show.</li>"
-            "<li><b>Change Wallpaper:</b> Randomly select a wallpaper from your Favorites list.</li>"
-            "<li><b>Auto Wallpaper Changer:</b> Switch wallpapers automatically at regular intervals.</li>"
-            "<li><b>To close the app</b>, right-click the FrameChanger icon in the taskbar and select 'Exit'.</li>"
-            "</ul>"
-            "<p style='font-size: 16px; font-family: Segoe UI;'>To get started, add some titles to your Favorites list and enjoy a new look for your desktop!</p>"
-            "<p style='font-size: 16px; font-family: Segoe UI;'>"
-            "Thank you for using FrameChanger! If you have any questions or feedback, please let us know.</p>"
-        )
-
-        welcome_dialog.setTextFormat(Qt.RichText)
-        welcome_dialog.setText(welcome_text)
-        welcome_dialog.setStandardButtons(QMessageBox.Ok)
-        welcome_dialog.setMinimumSize(400, 300)
-        welcome_dialog.exec_()
-
-        settings['welcome_shown'] = True
-        save_settings(settings)
-
-class CustomNotification(QDialog):
-    """Class for displaying custom notifications."""
-    def __init__(self, title, message, duration=500, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle(title)
-        self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.X11BypassWindowManagerHint)
-        self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setAttribute(Qt.WA_ShowWithoutActivating)
-        self.setFixedSize(500, 150)
-
-        layout = QVBoxLayout()
-        label = QLabel(message)
-        label.setAlignment(Qt.AlignCenter)
-        layout.addWidget(label)
-        self.setLayout(layout)
-
-        # Set the timer to close the dialog
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.close)
-        self.timer.start(duration)
-
-        # Move the dialog to the bottom right corner of the screen
-        screen_geometry = QApplication.primaryScreen().availableGeometry()
-        self.move(screen_geometry.width() - self.width() - 25, screen_geometry.height() - self.height() - 25)
-
-class MainWindow(QMainWindow):
-    """The main window of the FrameChanger application."""
-    def __init__(self):
-        super().__init__()
-
-        # Initialize stylesheets
-        self.stylesheets = stylesheets
-
-        initialize_database()  # Initialize the database
-
-        # Set up window properties
-        self.setWindowTitle("FrameChanger")
-        self.setFixedWidth(400)
-
-        # Main widget and layout setup
-        widget = QWidget(self)
-        self.setCentralWidget(widget)
-        layout = QVBoxLayout()
-        widget.setLayout(layout)
-
-        # Setup UI components
-        self.setup_components(layout)
-
-        # Load settings and apply if auto changer is enabled
-        self.load_and_apply_settings()
-
-    def setup_components(self, layout):
-        """Set up the UI components."""
-        self.title_input = QLineEdit()
-        self.title_input.setPlaceholderText("Add a Movie or TV show to your favorites")
-        self.title_input.setToolTip("Enter the name of your favorite movie or TV show to add it to your list.")
-        self.title_input.setCursor(Qt.IBeamCursor)
-        self.title_input.returnPressed.connect(self.add_title)
-        layout.addWidget(self.title_input)
-
-        # Media type selection using radio buttons
-        media_type_layout = QHBoxLayout()
-        self.movie_button = QRadioButton("Movie")
-        self.movie_button.setCursor(Qt.PointingHandCursor)
-        self.movie_button.setToolTip("Select this if you're adding a Movie")
-        self.tvshow_button = QRadioButton("TV Show")
-        self.tvshow_button.setCursor(Qt.PointingHandCursor)
-        self.tvshow_button.setToolTip("Select this if you're adding a TV show")
-        self.movie_button.setChecked(True)
-        media_type_layout.addWidget(self.movie_button)
-        media_type_layout.addWidget(self.tvshow_button)
-        layout.addLayout(media_type_layout)
-
+
+class AutoChangerDialog(QDialog):
+    """Dialog to configure the automatic wallpaper changer settings."""
+    def __init__(self, auto_changer_enabled, auto_changer_interval):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setAlignment(Qt.AlignCenter)
+
+        title_label = QLabel("<h2 style='color: #35495E; font-family: Segoe UI;'>AutoChanger Settings</h2>")
+        title_label.setAlignment(Qt.AlignLeft)
+        layout.addWidget(title_label)
+
+        self.auto_changer_checkbox = QCheckBox("Enable Automatic Changes")
+        self.auto_changer_checkbox.setStyleSheet("font-family: Segoe UI; font-size: 20px;")
+        self.auto_changer_checkbox.setToolTip("Check this box to let FrameChanger switch wallpapers automatically.")
+        self.auto_changer_checkbox.setChecked(auto_changer_enabled)
+        layout.addWidget(self.auto_changer_checkbox)
+
+        self.auto_changer_combobox = QComboBox()
+        self.auto_changer_combobox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        self.auto_changer_combobox.setToolTip("Pick how often you'd like FrameChanger to change your wallpaper.")
+        self.auto_changer_combobox.addItems(["1 Minute", "5 Minutes", "15 Minutes", "30 Minutes", "1 Hour", "3 Hours", "6 Hours", "12 Hours", "24 Hours"])
+        self.auto_changer_combobox.setCurrentIndex(auto_changer_interval)
+        layout.addWidget(self.auto_changer_combobox)
+
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttonBox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+        layout.addWidget(buttonBox)
+
+        self.setLayout(layout)
+
+class EditDialog(QDialog):
+    """Dialog to edit the details of a title in the list."""
+    def __init__(self, title, media_type):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setAlignment(Qt.AlignCenter)
+
+        title_label = QLabel("<h2 style='color: #35495E; font-family: Segoe UI;'>Edit Title</h2>")
+        title_label.setAlignment(Qt.AlignLeft)
+        layout.addWidget(title_label)
+
+        self.title_input = QLineEdit()
+        self.title_input.setText(title)
+        self.title_input.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        self.title_input.setPlaceholderText("Enter the movie or TV show title")
+        layout.addWidget(self.title_input)
+
+        self.media_type_input = QComboBox()
+        self.media_type_input.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        self.media_type_input.addItems(["movie", "tv"])
+        self.media_type_input.setCurrentIndex(0 if media_type.lower() == "movie" else 1)
+        layout.addWidget(self.media_type_input)
+    
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttonBox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+        layout.addWidget(buttonBox)
+
+        self.setLayout(layout)
+
+class LocalFoldersDialog(QDialog):
+    """Dialog to manage the local folders used as wallpaper sources."""
+    def __init__(self, folders):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        title_label = QLabel("<h2 style='color: #35495E; font-family: Segoe UI;'>Local Folders</h2>")
+        title_label.setAlignment(Qt.AlignLeft)
+        layout.addWidget(title_label)
+
+        self.folder_list = QListWidget()
+        self.folder_list.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        self.folder_list.setToolTip("Images in these folders are used alongside your favorites.")
+        self.folder_list.addItems(folders)
+        layout.addWidget(self.folder_list)
+
+        folder_buttons = QHBoxLayout()
+        add_button = QPushButton("Add Folder")
+        add_button.clicked.connect(self.add_folder)
+        folder_buttons.addWidget(add_button)
+        remove_button = QPushButton("Remove")
+        remove_button.clicked.connect(self.remove_folder)
+        folder_buttons.addWidget(remove_button)
+        layout.addLayout(folder_buttons)
+
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttonBox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+        layout.addWidget(buttonBox)
+
+        self.setLayout(layout)
+
+    def add_folder(self):
+        """Let the user pick a folder to add to the list."""
+        path = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if path and not self.folder_list.findItems(path, Qt.MatchExactly):
+            self.folder_list.addItem(path)
+
+    def remove_folder(self):
+        """Remove the selected folder from the list."""
+        for item in self.folder_list.selectedItems():
+            self.folder_list.takeItem(self.folder_list.row(item))
+
+    def folders(self):
+        """Return the folders currently in the list."""
+        return [self.folder_list.item(i).text() for i in range(self.folder_list.count())]
+
+class FailedTitlesDialog(QDialog):
+    """Dialog listing favorites that could not produce a wallpaper."""
+    def __init__(self, failures):
+        super().__init__()
+        self.retry = []
+        self.remove = []
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        title_label = QLabel("<h2 style='color: #35495E; font-family: Segoe UI;'>Problem Titles</h2>")
+        title_label.setAlignment(Qt.AlignLeft)
+        layout.addWidget(title_label)
+
+        info_label = QLabel("These titles are skipped until their next retry. Edit a title's name to fix it, retry it now or remove it.")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        self.failure_list = QListWidget()
+        self.failure_list.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        self.failure_list.setSelectionMode(QListWidget.ExtendedSelection)
+        for name, media_type, reason, failures, retry_at in failures:
+            retry = time.strftime('%Y-%m-%d %H:%M', time.localtime(retry_at))
+            self.failure_list.addItem(f"{name} | {media_type.capitalize()} - {reason} ({failures}x, retry {retry})")
+            self.failure_list.item(self.failure_list.count() - 1).setData(Qt.UserRole, (name, media_type))
+        layout.addWidget(self.failure_list)
+
+        failure_buttons = QHBoxLayout()
+        retry_button = QPushButton("Retry Now")
+        retry_button.clicked.connect(lambda: self.take_selected(self.retry))
+        failure_buttons.addWidget(retry_button)
+        remove_button = QPushButton("Remove from Favorites")
+        remove_button.clicked.connect(lambda: self.take_selected(self.remove))
+        failure_buttons.addWidget(remove_button)
+        layout.addLayout(failure_buttons)
+
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttonBox.setStyleSheet("font-family: Segoe UI; font-size: 16px;")
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+        layout.addWidget(buttonBox)
+
+        self.setLayout(layout)
+
+    def take_selected(self, target):
+        """Move the selected titles from the list into ``target``."""
+        for item in self.failure_list.selectedItems():
+            target.append(item.data(Qt.UserRole))
+            self.failure_list.takeItem(self.failure_list.row(item))
+
+def show_welcome_message():
+    """Display a welcome message to the user when the app starts for the first time."""
+    settings = load_settings()
+    if not settings.get('welcome_shown', False):
+        welcome_dialog = QMessageBox()
+        welcome_dialog.setIcon(QMessageBox.Information)
+        welcome_dialog.setWindowTitle("Welcome to FrameChanger")
+
+        welcome_text = (
+            "<h2 style='color: #35495E; font-family: Segoe UI;'>Welcome to FrameChanger</h2>"
+            "<p style='font-size: 16px; font-family: Segoe UI;'>"
+            "FrameChanger helps you add wallpapers from your favorite movies and TV shows to your desktop. Here's how to use it:</p>"
+            "<ul style='font-size: 16px; list-style-type: disc; padding-left: 20px; font-family: Segoe UI;'>"
+            "<li><b>Add your favorite movies and TV shows</b> to your Favorites list.</li>"
+            "<li><b>Double-click</b> a title in your Favorites list to change your wallpaper to an image from that movie or TV show.</li>"
+            "<li><b>Change Wallpaper:</b> Randomly select a wallpaper from your Favorites list.</li>"
+            "<li><b>Auto Wallpaper Changer:</b> Switch wallpapers automatically at regular intervals.</li>"
+            "<li><b>To close the app</b>, right-click the FrameChanger icon in the taskbar and select 'Exit'.</li>"
+            "</ul>"
+            "<p style='font-size: 16px; font-family: Segoe UI;'>To get started, add some titles to your Favorites list and enjoy a new look for your desktop!</p>"
+            "<p style='font-size: 16px; font-family: Segoe UI;'>"
+            "Thank you for using FrameChanger! If you have any questions or feedback, please let us know.</p>"
+        )
+
+        welcome_dialog.setTextFormat(Qt.RichText)
+        welcome_dialog.setText(welcome_text)
+        welcome_dialog.setStandardButtons(QMessageBox.Ok)
+        welcome_dialog.setMinimumSize(400, 300)
+        welcome_dialog.exec_()
+
+        settings['welcome_shown'] = True
+        save_settings(settings)
+
+class CustomNotification(QDialog):
+    """Class for displaying custom notifications.
+
+    One instance is kept for the lifetime of the window and reused by
+    :meth:`show_message`, so frequent auto changes do not pile up widgets.
+    """
+    def __init__(self, title, message, duration=500, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.X11BypassWindowManagerHint)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setFixedSize(500, 150)
+
+        layout = QVBoxLayout()
+        self.label = QLabel()
+        self.label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.label)
+        self.setLayout(layout)
+
+        # Set the timer to hide the dialog
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.hide)
+
+        self.show_message(title, message, duration)
+
+    def show_message(self, title, message, duration):
+        """Show ``message`` for ``duration`` milliseconds."""
+        self.setWindowTitle(title)
+        self.label.setText(message)
+        self.timer.start(duration)
+
+        # Move the dialog to the bottom right corner of the screen
+        screen_geometry = QApplication.primaryScreen().availableGeometry()
+        self.move(screen_geometry.width() - self.width() - 25, screen_geometry.height() - self.height() - 25)
+
+def title_text(key):
+    """Return the list text of a ``(name, media_type)`` key."""
+    return ' | '.join(key)
+
+def title_key(text):
+    """Return the ``(name, media_type)`` key of a list item's text."""
+    name, media_type = text.split(' | ')
+    return name, media_type.lower()
+
+def exec_dialog(dialog):
+    """Run a modal dialog, schedule it for deletion and return True if accepted.
+
+    The dialog stays usable until control returns to the event loop, so
+    callers can still read its inputs.
+    """
+    accepted = dialog.exec_() == QDialog.Accepted
+    dialog.deleteLater()
+    return accepted
+
+def load_preview_pixmap(image_path, width=800, height=450):
+    """Load ``image_path`` scaled down for the preview dialog.
+
+    The image is decoded straight to the preview size, so a full-size
+    backdrop is never held in memory.
+    """
+    reader = QImageReader(image_path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid():
+        reader.setScaledSize(size.scaled(width, height, Qt.KeepAspectRatio))
+    return QPixmap.fromImage(reader.read())
+
+class MainWindow(QMainWindow):
+    """The main window of the FrameChanger application."""
+    # Emitted from the policy worker once the conditions are read
+    policy_read = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.notification = None
+
+        initialize_database()  # Initialize the database
+
+        # Set up window properties
+        self.setWindowTitle("FrameChanger")
+        self.setFixedWidth(400)
+
+        # Main widget and layout setup
+        widget = QWidget(self)
+        self.setCentralWidget(widget)
+        layout = QVBoxLayout()
+        widget.setLayout(layout)
+
+        # Setup UI components
+        self.setup_components(layout)
+
+        # Load settings and apply if auto changer is enabled
+        self.load_and_apply_settings()
+
+        self.setup_local_library()
+        self.setup_discovery()
+        self.setup_jobs()
+        self.setup_policy()
+        self.setup_screen()
+
+    def setup_components(self, layout):
+        """Set up the UI components."""
+        self.title_input = QLineEdit()
+        self.title_input.setPlaceholderText("Add a Movie or TV show to your favorites")
+        self.title_input.setToolTip("Enter the name of your favorite movie or TV show to add it to your list.")
+        self.title_input.setCursor(Qt.IBeamCursor)
+        self.title_input.returnPressed.connect(self.add_title)
+        layout.addWidget(self.title_input)
+        self.autocompleter = autocomplete.Autocompleter(
+            self.title_input,
+            lambda: "movie" if self.movie_button.isChecked() else "tv",
+            lambda: load_settings().get('api_key'),
+            wallpaper_changer.TMDB_API_URL,
+        )
+
+        # Media type selection using radio buttons
+        media_type_layout = QHBoxLayout()
+        self.movie_button = QRadioButton("Movie")
+        self.movie_button.setCursor(Qt.PointingHandCursor)
+        self.movie_button.setToolTip("Select this if you're adding a Movie")
+        self.tvshow_button = QRadioButton("TV Show")
+        self.tvshow_button.setCursor(Qt.PointingHandCursor)
+        self.tvshow_button.setToolTip("Select this if you're adding a TV show")
+        self.movie_button.setChecked(True)
+        media_type_layout.addWidget(self.movie_button)
+        media_type_layout.addWidget(self.tvshow_button)
+        layout.addLayout(media_type_layout)
+
         self.add_button = QPushButton("Add to Favorites")
         self.add_button.setToolTip("Add the selected movie or TV show to your list of favorites.")
         self.add_button.setCursor(Qt.PointingHandCursor)
         self.add_button.setAccessibleName("addButton")
         self.add_button.clicked.connect(self.add_title)
         layout.addWidget(self.add_button)
-
-        edit_delete_layout = QHBoxLayout()
+
+        edit_delete_layout = QHBoxLayout()
         self.edit_button = QPushButton("Edit")
         self.edit_button.setToolTip("Edit the details of the selected title in the list.")
         self.edit_button.setCursor(Qt.PointingHandCursor)
         self.edit_button.setAccessibleName("editButton")
         self.edit_button.clicked.connect(self.edit_title)
-        edit_delete_layout.addWidget(self.edit_button)
-
+        edit_delete_layout.addWidget(self.edit_button)
+
         self.delete_button = QPushButton("Delete")
         self.delete_button.setToolTip("Delete the selected title from the list. Hold the button to delete all titles at once.")
         self.delete_button.setCursor(Qt.PointingHandCursor)
         self.delete_button.setAccessibleName("deleteButton")
         self.delete_button.pressed.connect(self.start_delete_timer)
-        self.delete_button.released.connect(self.stop_delete_timer)
-        edit_delete_layout.addWidget(self.delete_button)
-        layout.addLayout(edit_delete_layout)
-
-        self.delete_timer = QTimer()
-        self.delete_timer.setInterval(3500)
-        self.delete_timer.timeout.connect(self.delete_all_titles)
-
-        self.filter_input = QComboBox()
-        self.filter_input.setToolTip("Filter titles by showing all, movies only, or TV shows only.")
-        self.filter_input.setCursor(Qt.PointingHandCursor)
-        self.filter_input.addItems(["All", "movie", "tv"])
-        self.filter_input.currentTextChanged.connect(self.show_titles)
-        layout.addWidget(self.filter_input)
-
-        self.sort_input = QComboBox()
-        self.sort_input.setToolTip("Sort titles in ascending or descending order based on their names.")
-        self.sort_input.setCursor(Qt.PointingHandCursor)
-        self.sort_input.addItems(["Unsorted", "Ascending", "Descending"])
-        self.sort_input.currentTextChanged.connect(self.show_titles)
-        layout.addWidget(self.sort_input)
-
-        favorites_label = QLabel("<b>Favorites List:</b>")
-        layout.addWidget(favorites_label)
-
-        self.listView = QListView()
-        self.listView.setCursor(Qt.PointingHandCursor)
-        self.listView.setToolTip("Double-click on a title in the list to change your wallpaper to an image from that movie or TV show.")
-        self.listView.doubleClicked.connect(self.set_specific_wallpaper)
-        self.listView.setEditTriggers(QListView.NoEditTriggers)
-        layout.addWidget(self.listView)
-
-        self.count_label = QLabel()
-        self.count_label.setObjectName("count_label")
-        layout.addWidget(self.count_label)
-
-        self.search_input = QLineEdit()
-        self.search_input.setToolTip("Search for specific movies or TV shows in your list by typing their names here.")
-        self.search_input.setPlaceholderText("Search Favorites")
-        self.search_input.textChanged.connect(self.show_titles)
-        layout.addWidget(self.search_input)
-
-        self.theme_label = QLabel("Select Theme:")
-        layout.addWidget(self.theme_label)
-
-        self.theme_input = QComboBox()
-        self.theme_input.setToolTip("Select a theme to change the app's appearance. Choose from Default, Dark, IMDB, TMDB, or GreyRed themes.")
-        self.theme_input.setCursor(Qt.PointingHandCursor)
-        self.theme_input.addItems(self.stylesheets.keys())
-        self.theme_input.currentTextChanged.connect(self.change_theme)
-        layout.addWidget(self.theme_input)
-
-        # Set the current theme from settings
-        settings = load_settings()
-        current_theme = settings.get('theme', 'Default')
-        self.theme_input.setCurrentText(current_theme)
-        self.change_theme(current_theme)
-
+        self.delete_button.released.connect(self.stop_delete_timer)
+        edit_delete_layout.addWidget(self.delete_button)
+        layout.addLayout(edit_delete_layout)
+
+        import_export_layout = QHBoxLayout()
+        self.import_button = QPushButton("Import")
+        self.import_button.setToolTip("Import favorites from a CSV/JSON file, a Letterboxd, IMDb or Trakt export, or a TMDB list.")
+        self.import_button.setCursor(Qt.PointingHandCursor)
+        self.import_button.setAccessibleName("importButton")
+        import_menu = QMenu(self)
+        import_menu.addAction("From File...", self.import_from_file)
+        import_menu.addAction("From TMDB List...", self.import_from_tmdb_list)
+        self.import_button.setMenu(import_menu)
+        import_export_layout.addWidget(self.import_button)
+
+        self.export_button = QPushButton("Export")
+        self.export_button.setToolTip("Export your favorites to CSV, JSON, Letterboxd, IMDb or Trakt format.")
+        self.export_button.setCursor(Qt.PointingHandCursor)
+        self.export_button.setAccessibleName("exportButton")
+        self.export_button.clicked.connect(self.export_favorites)
+        import_export_layout.addWidget(self.export_button)
+
+        self.failures_button = QPushButton("Problem Titles")
+        self.failures_button.setToolTip("Show favorites with no TMDB match or no usable backdrop.")
+        self.failures_button.setCursor(Qt.PointingHandCursor)
+        self.failures_button.setAccessibleName("failuresButton")
+        self.failures_button.clicked.connect(self.show_failed_titles_dialog)
+        import_export_layout.addWidget(self.failures_button)
+        layout.addLayout(import_export_layout)
+
+        self.delete_timer = QTimer()
+        self.delete_timer.setInterval(3500)
+        self.delete_timer.timeout.connect(self.delete_all_titles)
+
+        self.filter_input = QComboBox()
+        self.filter_input.setToolTip("Filter titles by showing all, movies only, or TV shows only.")
+        self.filter_input.setCursor(Qt.PointingHandCursor)
+        self.filter_input.addItems(["All", "movie", "tv"])
+        self.filter_input.currentTextChanged.connect(self.show_titles)
+        layout.addWidget(self.filter_input)
+
+        self.sort_input = QComboBox()
+        self.sort_input.setToolTip("Sort titles by name, or by TMDB rating, year or popularity.")
+        self.sort_input.setCursor(Qt.PointingHandCursor)
+        self.sort_input.addItems(["Unsorted", *SORT_ORDERS])
+        self.sort_input.currentTextChanged.connect(self.show_titles)
+        layout.addWidget(self.sort_input)
+
+        details_layout = QHBoxLayout()
+        self.genre_input = QComboBox()
+        self.genre_input.setToolTip("Show only titles of this genre.")
+        self.genre_input.setCursor(Qt.PointingHandCursor)
+        self.load_genres()
+        self.genre_input.currentIndexChanged.connect(self.show_titles)
+        details_layout.addWidget(self.genre_input)
+
+        self.year_input = QComboBox()
+        self.year_input.setToolTip("Show only titles released in this decade.")
+        self.year_input.setCursor(Qt.PointingHandCursor)
+        self.year_input.addItem("Any year", None)
+        for decade in DECADES:
+            self.year_input.addItem(f"{decade}s", decade)
+        self.year_input.currentIndexChanged.connect(self.show_titles)
+        details_layout.addWidget(self.year_input)
+
+        self.rating_input = QComboBox()
+        self.rating_input.setToolTip("Show only titles with at least this TMDB rating.")
+        self.rating_input.setCursor(Qt.PointingHandCursor)
+        self.rating_input.addItem("Any rating", None)
+        for rating in MIN_RATINGS:
+            self.rating_input.addItem(f"{rating}+", rating)
+        self.rating_input.currentIndexChanged.connect(self.show_titles)
+        details_layout.addWidget(self.rating_input)
+
+        self.tag_input = QComboBox()
+        self.tag_input.setToolTip("Show only titles with this tag. Right-click selected titles to tag them.")
+        self.tag_input.setCursor(Qt.PointingHandCursor)
+        self.load_tags()
+        self.tag_input.currentIndexChanged.connect(self.show_titles)
+        details_layout.addWidget(self.tag_input)
+        layout.addLayout(details_layout)
+
+        favorites_label = QLabel("<b>Favorites List:</b>")
+        layout.addWidget(favorites_label)
+
+        self.listView = QListView()
+        self.listView.setCursor(Qt.PointingHandCursor)
+        self.listView.setToolTip("Double-click on a title in the list to change your wallpaper to an image from that movie or TV show. "
+                                 "Select several titles with Ctrl or Shift and right-click to delete, retype or tag them.")
+        self.listView.doubleClicked.connect(self.set_specific_wallpaper)
+        self.listView.setEditTriggers(QListView.NoEditTriggers)
+        self.listView.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.listView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.listView.customContextMenuRequested.connect(self.show_title_menu)
+        QShortcut(QKeySequence.Delete, self.listView, self.delete_title)
+        QShortcut(QKeySequence.Undo, self.listView, self.undo_title_edit)
+        # One model for the window's lifetime; show_titles refills it and
+        # bulk edits update only their rows
+        self.title_model = QStandardItemModel(self.listView)
+        self.listView.setModel(self.title_model)
+        self.title_edits = []
+        layout.addWidget(self.listView)
+
+        self.count_label = QLabel()
+        self.count_label.setObjectName("count_label")
+        layout.addWidget(self.count_label)
+
+        self.search_input = QLineEdit()
+        self.search_input.setToolTip("Search for specific movies or TV shows in your list by typing their names here.")
+        self.search_input.setPlaceholderText("Search Favorites")
+        self.search_input.textChanged.connect(self.show_titles)
+        layout.addWidget(self.search_input)
+
+        self.theme_label = QLabel("Select Theme:")
+        layout.addWidget(self.theme_label)
+
+        self.theme_input = QComboBox()
+        self.theme_input.setToolTip("Select a theme to change the app's appearance. Choose from Default, Dark, IMDB, TMDB, GreyRed or your own .qss files in the themes folder.")
+        self.theme_input.setCursor(Qt.PointingHandCursor)
+        self.theme_input.addItems(themes.theme_names())
+        layout.addWidget(self.theme_input)
+
+        # Set the current theme from settings before listening for changes
+        settings = load_settings()
+        current_theme = settings.get('theme', themes.DEFAULT_THEME)
+        self.theme_input.setCurrentText(current_theme)
+        self.change_theme(current_theme)
+        self.theme_input.currentTextChanged.connect(self.change_theme)
+
         self.change_wallpaper_button = QPushButton("Change Wallpaper")
         self.change_wallpaper_button.setToolTip("Change your desktop wallpaper to a random image from your favorite movies and TV shows by clicking here.")
         self.change_wallpaper_button.setCursor(Qt.PointingHandCursor)
@@ -322,392 +608,772 @@ class MainWindow(QMainWindow):
         self.preview_button.clicked.connect(self.preview_random_wallpaper)
         layout.addWidget(self.preview_button)
 
+        local_layout = QHBoxLayout()
         self.local_button = QPushButton("Set Local Image")
         self.local_button.setCursor(Qt.PointingHandCursor)
         self.local_button.setAccessibleName("localImageButton")
         self.local_button.clicked.connect(self.set_local_image)
-        layout.addWidget(self.local_button)
-
-        auto_credits_layout = QHBoxLayout()
-        self.auto_changer_button = QPushButton("Auto Wallpaper")
-        self.auto_changer_button.setToolTip("Enable automatic wallpaper changes at specified intervals by clicking here. You can adjust settings using the checkbox")
-        self.auto_changer_button.setCursor(Qt.PointingHandCursor)
-        self.auto_changer_button.clicked.connect(self.show_auto_changer_dialog)
-        auto_credits_layout.addWidget(self.auto_changer_button)
-
-        credits_button = QPushButton("App Info")
-        credits_button.setToolTip("Get information about FrameChanger, its developer, and the data source (The Movie Database).")
-        credits_button.setCursor(Qt.WhatsThisCursor)
-        credits_button.clicked.connect(self.show_credits)
-        auto_credits_layout.addWidget(credits_button)
-        layout.addLayout(auto_credits_layout)
-
-        self.setMinimumHeight(800)
-        screen_height = QApplication.primaryScreen().availableGeometry().height()
-        self.setMaximumHeight(screen_height)
-        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
-
-        padding = 60
-        screen_geometry = QApplication.primaryScreen().availableGeometry()
-        x = int(screen_geometry.width() - self.frameGeometry().width() - padding)
-        y = int((screen_geometry.height() - self.frameGeometry().height()) / 4)
-        self.move(x, y)
-
-        self.setFont(QFont("Segoe UI"))
-
-        # Load and set the saved theme
-        self.change_theme()
-
-        self.show_titles()
-
-        show_welcome_message()
-
-        # System tray setup
-        dir_path = os.path.dirname(os.path.realpath(__file__))
-        icon_path = os.path.join(dir_path, 'icon.ico')
-
-        self.tray_icon = QSystemTrayIcon(QIcon(icon_path), self)
-        tray_menu = QMenu(self)
-        randomize_wallpaper_action = QAction("Randomize", self)
-        randomize_wallpaper_action.triggered.connect(self.change_wallpaper)
-        tray_menu.addAction(randomize_wallpaper_action)
-
-        auto_wallpaper_changer_action = QAction("AutoWallpaper Changer Settings", self)
-        auto_wallpaper_changer_action.triggered.connect(self.show_auto_changer_dialog)
-        tray_menu.addAction(auto_wallpaper_changer_action)
-
-        show_action = QAction("Show App", self)
-        show_action.triggered.connect(self.restore_window)
-        tray_menu.addAction(show_action)
-
-        quit_action = QAction("Exit", self)
-        quit_action.triggered.connect(qApp.quit)
-        tray_menu.addAction(quit_action)
-
-        self.tray_icon.setContextMenu(tray_menu)
-        self.tray_icon.show()
-
-    def restore_window(self):
-        """Restore the main window from the system tray."""
-        self.show()
-        self.raise_()
-        self.activateWindow()
-
-    def closeEvent(self, event):
-        """Handle the close event to minimize to the system tray instead of exiting."""
-        event.ignore()
-        self.hide()
-        self.show_custom_notification(
-            "Running in the background",
-            "The app is still running in the system tray.\nTo exit the app, right-click the tray icon\nand select Exit.",
-            5000
-        )
-
-    def show_credits(self):
-        """Show the credits and app information."""
-        credits_text = (
-            "<h2 align='left'>FrameChanger v1.2</h2>"
-            "<p align='left'><b>Developed by:</b> Akash Seam</p>"
-            "<p align='left'>I created FrameChanger because I often get bored with my desktop wallpaper and didn't want to keep changing it manually. "
-            "I also enjoy movies and TV shows and thought it would be cool to have wallpapers from my favorite titles. This app randomly selects wallpapers "
-            "from a list of my favorite movies and TV shows. I hope it helps others who feel the same way.</p>"
-            "<p align='left'>The app uses The Movie Database (TMDB) API to fetch wallpapers. All images are copyrighted by their respective owners.</p>"
-            "<p align='left'>Built with Python, PyQt, and SQLite.</p>"
-            "<p align='left'><b>Questions or Feedback:</b> For any questions or feedback, please email me at akash.seam@gmail.com.</p>"
-            "<p align='left'><b>Disclaimer:</b> This software is provided 'as is'. The developer is not responsible for any data loss or damage.</p>"
-            "<p align='left'><b>License:</b> This software is distributed under the MIT License. </p>"
-            "<p align='left'>Thanks for using FrameChanger!</p>"
-        )
-
-        QMessageBox.information(self, "Credits", credits_text)
-
-    def display(self, message, icon_type=QMessageBox.Information):
-        """Display a message box with the specified message and icon."""
-        title = "Error"
-        msgBox = QMessageBox(self)
-        msgBox.setIcon(icon_type)
-        msgBox.setWindowTitle(title)
-        msgBox.setText(message)
-        msgBox.exec_()
-
-    def add_title(self):
-        """Add the title to the favorites list."""
-        title = self.title_input.text().strip()
-        media_type = "movie" if self.movie_button.isChecked() else "tv"
-
-        if not title:
-            self.display('Error: Title cannot be empty.')
-            return
-        if len(title) > 100:
-            self.display('Error: Title is too long.')
-            return
-
-        invalid_chars = ['<', '>', ':', '"', '/', '\\', '|', '?', '*']
-        if any(char in title for char in invalid_chars):
-            self.display('Error: Title contains invalid characters.')
-            return
-
-        try:
-            with sqlite3.connect(DATABASE_NAME) as conn:
-                c = conn.cursor()
-                c.execute("INSERT OR IGNORE INTO titles VALUES (?, ?)", (title, media_type.lower()))
-
-                if c.rowcount > 0:
-                    self.title_input.clear()
-
-                conn.commit()
-
-        except sqlite3.Error as e:
-            self.display(f'Database Error: {e}')
-
-        self.show_titles()
-
-    def edit_title(self):
-        """Edit the details of the selected title."""
-        selected_indexes = self.listView.selectedIndexes()
-        if not selected_indexes:
-            return
-
-        selected_index = selected_indexes[0]
-        selected_item = selected_index.data()
-        title, media_type = selected_item.split(' | ')
-
-        dialog = EditDialog(title, media_type)
-        if dialog.exec_() == QDialog.Accepted:
-            new_title = dialog.title_input.text().strip()
-            new_media_type = dialog.media_type_input.currentText().lower()
-
-            if not new_title:
-                self.display('Error: Title cannot be empty.')
-                return
-
-            if title != new_title or media_type.lower() != new_media_type:
-                try:
-                    with sqlite3.connect(DATABASE_NAME) as conn:
-                        c = conn.cursor()
-
-                        # Check for duplicate entry
-                        c.execute("SELECT COUNT(*) FROM titles WHERE name=? AND media_type=?", (new_title, new_media_type))
-                        if c.fetchone()[0] > 0:
-                            self.display('Error: A title with this name and media type already exists.')
-                            return
-
-                        # Perform the update
-                        c.execute("UPDATE titles SET name=?, media_type=? WHERE name=? AND media_type=?", 
-                                (new_title, new_media_type, title, media_type.lower()))
-                        conn.commit()
-
-                except sqlite3.Error as e:
-                    self.display(f'Database Error: {e}')
-
-                self.show_titles()
-
-    def delete_title(self):
-        """Delete the selected title from the list."""
-        selected_indexes = self.listView.selectedIndexes()
-        if not selected_indexes:
-            return
-
-        reply = QMessageBox.question(
-            self,
-            'Confirm Deletion',
-            'Are you sure you want to delete the selected title(s)? This action cannot be undone.',
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
-        )
-
-        if reply == QMessageBox.Yes:
-            for selected_index in selected_indexes:
-                selected_item = selected_index.data()
-                title, media_type = selected_item.split(' | ')
-
-                try:
-                    with sqlite3.connect(DATABASE_NAME) as conn:
-                        c = conn.cursor()
-                        c.execute("DELETE FROM titles WHERE name=? AND media_type=?", (title, media_type.lower()))
-                        conn.commit()
-
-                except sqlite3.Error as e:
-                    self.display(f'Database Error: {e}')
-
-            self.show_titles()
-
-    def delete_all_titles(self):
-        """Delete all titles from the database."""
-        reply = QMessageBox.question(self, 'Delete All Titles', 'Are you sure you want to delete all titles? This action cannot be undone.', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            try:
-                conn = sqlite3.connect(DATABASE_NAME)
-                c = conn.cursor()
-                c.execute("DELETE FROM titles")
-                conn.commit()
-                conn.close()
-            except sqlite3.Error as e:
-                self.display(f'Database Error: {e}')
-
-            self.show_titles()
-
-    def show_titles(self):
-        """Show the titles in the list view."""
-        model = QStandardItemModel(self.listView)
-        try:
-            conn = sqlite3.connect(DATABASE_NAME)
-            c = conn.cursor()
-
-            filter_text = self.filter_input.currentText()
-            search_text = self.search_input.text()
-
-            query = "SELECT name, media_type FROM titles"
-            params = []
-
-            if filter_text != "All":
-                query += " WHERE media_type=?"
-                params.append(filter_text.lower())
-
-            if search_text:
-                query += " WHERE" if "WHERE" not in query else " AND"
-                query += " name LIKE ?"
-                params.append(f"%{search_text}%")
-
-            c.execute(query, params)
-            rows = c.fetchall()
-
-            sort_text = self.sort_input.currentText()
-            if sort_text == "Ascending":
-                rows.sort(key=lambda x: x[0])
-            elif sort_text == "Descending":
-                rows.sort(key=lambda x: x[0], reverse=True)
-
-            for row in rows:
-                item = QStandardItem(' | '.join(row))
-                model.appendRow(item)
-
-            self.listView.setModel(model)
-
-            self.count_label.setText(f"Number of titles: {len(rows)}")
-            conn.close()
-        except sqlite3.Error as e:
-            self.display(f'Database Error: {e}')
-
-    def load_and_apply_settings(self):
-        """Load settings and apply auto changer settings if enabled."""
-        self.auto_changer_timer = QTimer()
-        self.auto_changer_timer.timeout.connect(self.change_wallpaper)
-
-        self.auto_changer_enabled = False
-        self.auto_changer_interval = 5
-
-        self.load_auto_changer_settings()
-        self.apply_auto_changer_settings()
-    
-    def apply_auto_changer_settings(self):
-        """Apply auto changer settings."""
-        if self.auto_changer_enabled:
-            interval_mapping = {
-                0: 60000,
-                1: 300000,
-                2: 900000,
-                3: 1800000,
-                4: 3600000,
-                5: 10800000,
-                6: 21600000,
-                7: 43200000,
-                8: 86400000
-            }
-            interval = interval_mapping[self.auto_changer_interval]
-            self.auto_changer_timer.start(interval)
-        else:
-            self.auto_changer_timer.stop()
-
-        self.save_auto_changer_settings()
-
-
-    def save_auto_changer_settings(self):
-        """Save auto changer settings to the configuration."""
-        settings = load_settings()
-        settings['auto_changer_enabled'] = self.auto_changer_enabled
-        settings['auto_changer_interval'] = self.auto_changer_interval
-        save_settings(settings)
-
-    def load_auto_changer_settings(self):
-        """Load auto changer settings from the configuration."""
-        DEFAULT_ENABLED = False
-        DEFAULT_INTERVAL = 5
-        settings = load_settings()
-        self.auto_changer_enabled = settings.get('auto_changer_enabled', DEFAULT_ENABLED)
-        self.auto_changer_interval = settings.get('auto_changer_interval', DEFAULT_INTERVAL)
-
-        if self.auto_changer_enabled:
-            interval_mapping = {
-                0: 60000,
-                1: 300000,
-                2: 900000,
-                3: 1800000,
-                4: 3600000,
-                5: 10800000,
-                6: 21600000,
-                7: 43200000,
-                8: 86400000
-            }
-            interval = interval_mapping[self.auto_changer_interval]
-            self.auto_changer_timer.start(interval)
-        else:
-            self.auto_changer_timer.stop()
-
-
-    def show_auto_changer_dialog(self):
-        """Show the dialog to configure the automatic wallpaper changer settings."""
-        dialog = AutoChangerDialog(self.auto_changer_enabled, self.auto_changer_interval)
-        if dialog.exec_() == QDialog.Accepted:
-            self.auto_changer_enabled = dialog.auto_changer_checkbox.isChecked()
-            self.auto_changer_interval = dialog.auto_changer_combobox.currentIndex()
-
-            if self.auto_changer_enabled:
-                interval_mapping = {
-                    0: 60000,
-                    1: 300000,
-                    2: 900000,
-                    3: 1800000,
-                    4: 3600000,
-                    5: 10800000,
-                    6: 21600000,
-                    7: 43200000,
-                    8: 86400000
-                }
-                interval = interval_mapping[self.auto_changer_interval]
-                self.auto_changer_timer.start(interval)
-            else:
-                self.auto_changer_timer.stop()
-
-            self.save_auto_changer_settings()
-
-    def change_theme(self, theme=None):
-        """Change the application theme."""
-        if theme is None:
-            settings = load_settings()
-            theme = settings.get('theme', 'Default')
-        logging.debug(f"Applying theme: {theme}")
-        self.setStyleSheet(self.stylesheets[theme])
-        settings = load_settings()
-        settings['theme'] = theme
-        save_settings(settings)
-
-    def change_wallpaper(self):
+        local_layout.addWidget(self.local_button)
+
+        self.folders_button = QPushButton("Local Folders")
+        self.folders_button.setToolTip("Add whole folders of images to the random wallpaper rotation.")
+        self.folders_button.setCursor(Qt.PointingHandCursor)
+        self.folders_button.setAccessibleName("localFoldersButton")
+        self.folders_button.clicked.connect(self.show_local_folders_dialog)
+        local_layout.addWidget(self.folders_button)
+        layout.addLayout(local_layout)
+
+        auto_credits_layout = QHBoxLayout()
+        self.auto_changer_button = QPushButton("Auto Wallpaper")
+        self.auto_changer_button.setToolTip("Enable automatic wallpaper changes at specified intervals by clicking here. You can adjust settings using the checkbox")
+        self.auto_changer_button.setCursor(Qt.PointingHandCursor)
+        self.auto_changer_button.clicked.connect(self.show_auto_changer_dialog)
+        auto_credits_layout.addWidget(self.auto_changer_button)
+
+        credits_button = QPushButton("App Info")
+        credits_button.setToolTip("Get information about FrameChanger, its developer, and the data source (The Movie Database).")
+        credits_button.setCursor(Qt.WhatsThisCursor)
+        credits_button.clicked.connect(self.show_credits)
+        auto_credits_layout.addWidget(credits_button)
+        layout.addLayout(auto_credits_layout)
+
+        self.setMinimumHeight(800)
+        screen_height = QApplication.primaryScreen().availableGeometry().height()
+        self.setMaximumHeight(screen_height)
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
+
+        padding = 60
+        screen_geometry = QApplication.primaryScreen().availableGeometry()
+        x = int(screen_geometry.width() - self.frameGeometry().width() - padding)
+        y = int((screen_geometry.height() - self.frameGeometry().height()) / 4)
+        self.move(x, y)
+
+        self.setFont(QFont("Segoe UI"))
+
+        self.show_titles()
+
+        show_welcome_message()
+
+        # System tray setup
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        icon_path = os.path.join(dir_path, 'icon.ico')
+
+        self.tray_icon = QSystemTrayIcon(QIcon(icon_path), self)
+        tray_menu = QMenu(self)
+        randomize_wallpaper_action = QAction("Randomize", self)
+        randomize_wallpaper_action.triggered.connect(self.change_wallpaper)
+        tray_menu.addAction(randomize_wallpaper_action)
+
+        previous_action = QAction("Previous Wallpaper", self)
+        previous_action.triggered.connect(self.previous_wallpaper)
+        tray_menu.addAction(previous_action)
+
+        next_action = QAction("Next Wallpaper", self)
+        next_action.triggered.connect(self.next_wallpaper)
+        tray_menu.addAction(next_action)
+
+        self.pin_action = QAction("Pin Wallpaper", self)
+        self.pin_action.setCheckable(True)
+        self.pin_action.setChecked(is_pinned())
+        self.pin_action.triggered.connect(self.toggle_pin)
+        tray_menu.addAction(self.pin_action)
+
+        auto_wallpaper_changer_action = QAction("AutoWallpaper Changer Settings", self)
+        auto_wallpaper_changer_action.triggered.connect(self.show_auto_changer_dialog)
+        tray_menu.addAction(auto_wallpaper_changer_action)
+
+        prefetch_action = QAction("Prefetch Wallpapers", self)
+        prefetch_action.triggered.connect(self.prefetch_wallpapers)
+        tray_menu.addAction(prefetch_action)
+
+        show_action = QAction("Show App", self)
+        show_action.triggered.connect(self.restore_window)
+        tray_menu.addAction(show_action)
+
+        quit_action = QAction("Exit", self)
+        quit_action.triggered.connect(qApp.quit)
+        tray_menu.addAction(quit_action)
+
+        self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.show()
+
+    def restore_window(self):
+        """Restore the main window from the system tray."""
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def closeEvent(self, event):
+        """Handle the close event to minimize to the system tray instead of exiting."""
+        event.ignore()
+        self.hide()
+        self.show_custom_notification(
+            "Running in the background",
+            "The app is still running in the system tray.\nTo exit the app, right-click the tray icon\nand select Exit.",
+            5000
+        )
+
+    def show_credits(self):
+        """Show the credits and app information."""
+        credits_text = (
+            "<h2 align='left'>FrameChanger v1.2</h2>"
+            "<p align='left'><b>Developed by:</b> Akash Seam</p>"
+            "<p align='left'>I created FrameChanger because I often get bored with my desktop wallpaper and didn't want to keep changing it manually. "
+            "I also enjoy movies and TV shows and thought it would be cool to have wallpapers from my favorite titles. This app randomly selects wallpapers "
+            "from a list of my favorite movies and TV shows. I hope it helps others who feel the same way.</p>"
+            "<p align='left'>The app uses The Movie Database (TMDB) API to fetch wallpapers. All images are copyrighted by their respective owners.</p>"
+            "<p align='left'>Built with Python, PyQt, and SQLite.</p>"
+            "<p align='left'><b>Questions or Feedback:</b> For any questions or feedback, please email me at akash.seam@gmail.com.</p>"
+            "<p align='left'><b>Disclaimer:</b> This software is provided 'as is'. The developer is not responsible for any data loss or damage.</p>"
+            "<p align='left'><b>License:</b> This software is distributed under the MIT License. </p>"
+            "<p align='left'>Thanks for using FrameChanger!</p>"
+        )
+
+        QMessageBox.information(self, "Credits", credits_text)
+
+    def display(self, message, icon_type=QMessageBox.Information):
+        """Display a message box with the specified message and icon."""
+        title = "Error"
+        msgBox = QMessageBox(self)
+        msgBox.setIcon(icon_type)
+        msgBox.setWindowTitle(title)
+        msgBox.setText(message)
+        exec_dialog(msgBox)
+
+    def add_title(self):
+        """Add the title to the favorites list."""
+        title = self.title_input.text().strip()
+        media_type = "movie" if self.movie_button.isChecked() else "tv"
+
+        # A picked suggestion is stored resolved, so its first change needs no search.
+        # TMDB titles often contain ':', which the list does not allow, so it is replaced.
+        suggestion = self.autocompleter.chosen(title, media_type)
+        tmdb_id = suggestion.tmdb_id if suggestion else None
+        if suggestion:
+            title = import_export.safe_title(title)
+
+        error = import_export.title_error(title)
+        if error:
+            self.display(f'Error: {error}')
+            return
+
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                c = conn.cursor()
+                c.execute(
+                    "INSERT OR IGNORE INTO titles (name, media_type, tmdb_id) VALUES (?, ?, ?)",
+                    (title, media_type.lower(), tmdb_id),
+                )
+
+                if c.rowcount > 0:
+                    self.title_input.clear()
+                    self.autocompleter.selected = None
+                elif tmdb_id:
+                    c.execute(
+                        "UPDATE titles SET tmdb_id=? WHERE name=? AND media_type=? AND tmdb_id IS NULL",
+                        (tmdb_id, title, media_type.lower()),
+                    )
+
+                conn.commit()
+
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+
+        self.show_titles()
+
+    def import_from_file(self):
+        """Import favorites from an export file."""
+        path, _ = QFileDialog.getOpenFileName(self, "Import Favorites", "", "Favorites (*.csv *.json)")
+        if path:
+            self.import_favorites(lambda: import_export.parse_file(path))
+
+    def import_from_tmdb_list(self):
+        """Import the items of a TMDB list."""
+        list_id, ok = QInputDialog.getText(self, "Import TMDB List", "TMDB list ID:")
+        if not ok or not list_id.strip():
+            return
+        api_key = get_api_key()
+        if not api_key:
+            return
+        self.import_favorites(lambda: import_export.fetch_tmdb_list(list_id.strip(), api_key))
+
+    def import_favorites(self, rows):
+        """Import the titles produced by ``rows()`` in a single transaction."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                added, skipped = import_export.import_titles(conn, rows())
+        except (OSError, ValueError, sqlite3.Error, requests.exceptions.RequestException) as e:
+            self.display(f'Import Error: {e}')
+            return
+
+        self.show_titles()
+        message = f"Imported {added} titles"
+        if skipped:
+            message += f", skipped {skipped} with an invalid name or type"
+        self.show_custom_notification("Import Finished", message, 3000)
+        settings = load_settings()
+        if settings.get('api_key') and settings.get('resolve_on_import', True):
+            try:
+                with sqlite3.connect(DATABASE_NAME) as conn:
+                    pending = import_export.resolve_jobs(conn)
+                self.jobs.submit_many(import_export.RESOLVE_JOB, pending)
+            except sqlite3.Error as e:
+                logging.error("Database Error: %s", e)
+
+    def export_favorites(self):
+        """Export the favorites list in the format chosen by the user."""
+        filters = {
+            "CSV (*.csv)": "csv",
+            "JSON (*.json)": "json",
+            "Letterboxd CSV (*.csv)": "letterboxd",
+            "IMDb CSV (*.csv)": "imdb",
+            "Trakt JSON (*.json)": "trakt",
+        }
+        path, selected = QFileDialog.getSaveFileName(self, "Export Favorites", "favorites", ";;".join(filters))
+        if not path:
+            return
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                count = import_export.export_titles(conn, path, filters.get(selected, "csv"))
+        except (OSError, sqlite3.Error) as e:
+            self.display(f'Export Error: {e}')
+            return
+        self.show_custom_notification("Export Finished", f"Exported {count} titles", 3000)
+
+    def edit_title(self):
+        """Edit the details of the selected title."""
+        selected_indexes = self.listView.selectedIndexes()
+        if not selected_indexes:
+            return
+
+        selected_index = selected_indexes[0]
+        selected_item = selected_index.data()
+        title, media_type = selected_item.split(' | ')
+
+        dialog = EditDialog(title, media_type)
+        if exec_dialog(dialog):
+            new_title = dialog.title_input.text().strip()
+            new_media_type = dialog.media_type_input.currentText().lower()
+
+            if not new_title:
+                self.display('Error: Title cannot be empty.')
+                return
+
+            if title != new_title or media_type.lower() != new_media_type:
+                try:
+                    with sqlite3.connect(DATABASE_NAME) as conn:
+                        c = conn.cursor()
+
+                        # Check for duplicate entry
+                        c.execute("SELECT COUNT(*) FROM titles WHERE name=? AND media_type=?", (new_title, new_media_type))
+                        if c.fetchone()[0] > 0:
+                            self.display('Error: A title with this name and media type already exists.')
+                            return
+
+                        # Perform the update; the old TMDB id may belong to the old name
+                        c.execute("UPDATE titles SET name=?, media_type=?, tmdb_id=NULL WHERE name=? AND media_type=?", 
+                                (new_title, new_media_type, title, media_type.lower()))
+                        favorites.ensure_table(conn)
+                        c.execute("UPDATE OR IGNORE title_tags SET name=?, media_type=? WHERE name=? AND media_type=?",
+                                (new_title, new_media_type, title, media_type.lower()))
+                        conn.commit()
+                        title_failures.clear(conn, title, media_type.lower())
+
+                except sqlite3.Error as e:
+                    self.display(f'Database Error: {e}')
+                    return
+
+                self.update_title_rows({(title, media_type.lower()): (new_title, new_media_type)})
+
+    def delete_title(self):
+        """Delete the selected titles from the list in one transaction."""
+        keys = self.selected_title_rows()
+        if not keys:
+            return
+
+        reply = QMessageBox.question(
+            self,
+            'Confirm Deletion',
+            f'Are you sure you want to delete the {len(keys)} selected title(s)? You can undo this with Ctrl+Z.',
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+
+        if reply == QMessageBox.Yes:
+            self.run_title_edit(favorites.delete_titles)
+
+    def selected_title_rows(self):
+        """Return the ``(name, media_type)`` keys of the selected titles mapped to their rows."""
+        rows = sorted(index.row() for index in self.listView.selectedIndexes())
+        return {title_key(self.title_model.item(row).text()): row for row in rows}
+
+    def show_title_menu(self, pos):
+        """Show the bulk actions for the selected titles."""
+        count = len(self.selected_title_rows())
+        menu = QMenu(self)
+        menu.addAction(f"Delete {count} Titles" if count > 1 else "Delete", self.delete_title).setEnabled(bool(count))
+        type_menu = menu.addMenu("Change Type")
+        for media_type in ("movie", "tv"):
+            type_menu.addAction(media_type, lambda checked=False, media_type=media_type: self.run_title_edit(favorites.change_media_type, media_type))
+        type_menu.setEnabled(bool(count))
+        menu.addAction("Add Tag...", self.tag_selected_titles).setEnabled(bool(count))
+        remove_menu = menu.addMenu("Remove Tag")
+        for tag in self.tag_names():
+            remove_menu.addAction(tag, lambda checked=False, tag=tag: self.run_title_edit(favorites.remove_tag, tag))
+        remove_menu.setEnabled(bool(count and remove_menu.actions()))
+        menu.addSeparator()
+        label = f"Undo {self.title_edits[-1][0].label}" if self.title_edits else "Undo"
+        menu.addAction(label, self.undo_title_edit).setEnabled(bool(self.title_edits))
+        menu.exec_(self.listView.viewport().mapToGlobal(pos))
+
+    def tag_selected_titles(self):
+        """Ask for a tag, new or existing, and add it to the selected titles."""
+        if not self.selected_title_rows():
+            return
+        tag, ok = QInputDialog.getItem(self, "Add Tag", "Tag:", self.tag_names(), 0, True)
+        tag = favorites.normalize_tag(tag)
+        if ok and tag:
+            self.run_title_edit(favorites.add_tag, tag)
+
+    def run_title_edit(self, operation, *args):
+        """Apply a :mod:`framechanger.favorites` operation to the selection and keep it for undo."""
+        rows = self.selected_title_rows()
+        if not rows:
+            return None
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                edit = operation(conn, list(rows), *args)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+            return None
+        if edit.changes:
+            self.title_edits = (self.title_edits + [(edit, rows)])[-UNDO_LIMIT:]
+        self.update_title_rows(edit.changes, rows)
+        self.load_tags()
+        self.show_custom_notification("Favorites Updated", edit.label, 3000)
+        return edit
+
+    def undo_title_edit(self):
+        """Revert the last bulk edit of the favorites."""
+        if not self.title_edits:
+            return
+        edit, rows = self.title_edits[-1]
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                restored = favorites.undo(conn, edit)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+            return
+        self.title_edits.pop()
+        self.update_title_rows(restored, rows)
+        self.load_tags()
+        message = edit.label
+        if len(restored) < len(edit.changes):
+            message += f" (restored {len(restored)} of {len(edit.changes)} titles)"
+        self.show_custom_notification("Undone", message, 3000)
+
+    def update_title_rows(self, changes, rows=None):
+        """Update only the list rows in ``changes``, a map of old keys to new keys or None.
+
+        Titles that no longer match the filters are removed, and titles
+        missing from the list are inserted at their row in ``rows``.
+        """
+        model = self.title_model
+        visible = self.visible_title_keys()
+        positions = {model.item(row).text(): row for row in range(model.rowCount())}
+        missing = []
+        # Bottom-up, so removing a row does not move the rows still to visit
+        for old, new in sorted(changes.items(), key=lambda change: -positions.get(title_text(change[0]), -1)):
+            row = positions.get(title_text(old))
+            if row is None:
+                if new in visible:
+                    missing.append((rows.get(new, model.rowCount()) if rows else model.rowCount(), new))
+            elif new is None or new not in visible:
+                model.removeRow(row)
+            else:
+                model.item(row).setText(title_text(new))
+        for row, key in sorted(missing):
+            model.insertRow(min(row, model.rowCount()), QStandardItem(title_text(key)))
+        self.count_label.setText(f"Number of titles: {model.rowCount()}")
+
+    def delete_all_titles(self):
+        """Delete all titles from the database."""
+        reply = QMessageBox.question(self, 'Delete All Titles', 'Are you sure you want to delete all titles? This action cannot be undone.', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            try:
+                conn = sqlite3.connect(DATABASE_NAME)
+                c = conn.cursor()
+                c.execute("DELETE FROM titles")
+                c.execute("DELETE FROM title_failures")
+                favorites.ensure_table(conn)
+                c.execute("DELETE FROM title_tags")
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                self.display(f'Database Error: {e}')
+
+            self.show_titles()
+
+    def title_query(self):
+        """Return the query and parameters selecting the titles that match the filters."""
+        filter_text = self.filter_input.currentText()
+        search_text = self.search_input.text()
+
+        query = f"SELECT t.name, t.media_type FROM titles t {metadata.JOIN}"
+        conditions, params = metadata.filter_sql(self.title_filters())
+
+        if filter_text != "All":
+            conditions.insert(0, "t.media_type=?")
+            params.insert(0, filter_text.lower())
+
+        if search_text:
+            conditions.append("t.name LIKE ?")
+            params.append(f"%{search_text}%")
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query, params
+
+    def visible_title_keys(self):
+        """Return the keys of all titles that match the filters."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                return set(conn.execute(*self.title_query()).fetchall())
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+            return set()
+
+    def show_titles(self):
+        """Show the titles in the list view."""
+        model = self.title_model
+        try:
+            conn = sqlite3.connect(DATABASE_NAME)
+            c = conn.cursor()
+
+            query, params = self.title_query()
+            sort_text = self.sort_input.currentText()
+            if sort_text in SORT_ORDERS:
+                query += f" ORDER BY {SORT_ORDERS[sort_text]}"
+
+            c.execute(query, params)
+            rows = c.fetchall()
+
+            model.clear()
+            for row in rows:
+                item = QStandardItem(' | '.join(row))
+                model.appendRow(item)
+
+            self.count_label.setText(f"Number of titles: {len(rows)}")
+            conn.close()
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+
+    def title_filters(self):
+        """Return the metadata filters chosen in the favorites view."""
+        filters = {}
+        if self.genre_input.currentIndex() > 0:
+            filters['genres'] = [self.genre_input.currentText()]
+        decade = self.year_input.currentData()
+        if decade:
+            filters['year_min'], filters['year_max'] = decade, decade + 9
+        if self.rating_input.currentData():
+            filters['rating_min'] = self.rating_input.currentData()
+        if self.tag_input.currentIndex() > 0:
+            filters['tags'] = [self.tag_input.currentText()]
+        return filters
+
+    def tag_names(self):
+        """Return the tags offered in the tag filter."""
+        return [self.tag_input.itemText(index) for index in range(1, self.tag_input.count())]
+
+    def load_tags(self):
+        """Fill the tag filter with the tags in use, keeping the selection."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                favorites.ensure_table(conn)
+                names = favorites.tag_names(conn)
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+            return
+        selected = self.tag_input.currentText()
+        self.tag_input.blockSignals(True)
+        self.tag_input.clear()
+        self.tag_input.addItem("Any tag")
+        self.tag_input.addItems(names)
+        self.tag_input.setCurrentIndex(max(0, self.tag_input.findText(selected)))
+        self.tag_input.blockSignals(False)
+
+    def load_genres(self):
+        """Fill the genre filter with the genres of the favorites, keeping the selection."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                metadata.ensure_tables(conn)
+                names = metadata.genre_names(conn)
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+            return
+        selected = self.genre_input.currentText()
+        self.genre_input.blockSignals(True)
+        self.genre_input.clear()
+        self.genre_input.addItem("Any genre")
+        self.genre_input.addItems(names)
+        self.genre_input.setCurrentIndex(max(0, self.genre_input.findText(selected)))
+        self.genre_input.blockSignals(False)
+
+    def load_and_apply_settings(self):
+        """Load settings and apply auto changer settings if enabled."""
+        self.auto_changer_timer = QTimer()
+        self.auto_changer_timer.timeout.connect(self.auto_change_wallpaper)
+
+        self.auto_changer_enabled = False
+        self.auto_changer_paused = False
+        self.auto_changer_interval = 5
+
+        self.load_auto_changer_settings()
+        self.apply_auto_changer_settings()
+    
+    def apply_auto_changer_settings(self):
+        """Apply auto changer settings."""
+        if self.auto_changer_enabled:
+            interval_mapping = {
+                0: 60000,
+                1: 300000,
+                2: 900000,
+                3: 1800000,
+                4: 3600000,
+                5: 10800000,
+                6: 21600000,
+                7: 43200000,
+                8: 86400000
+            }
+            interval = interval_mapping[self.auto_changer_interval]
+            self.auto_changer_timer.start(interval)
+        else:
+            self.auto_changer_timer.stop()
+
+        self.save_auto_changer_settings()
+
+
+    def save_auto_changer_settings(self):
+        """Save auto changer settings to the configuration."""
+        settings = load_settings()
+        settings['auto_changer_enabled'] = self.auto_changer_enabled
+        settings['auto_changer_interval'] = self.auto_changer_interval
+        save_settings(settings)
+
+    def load_auto_changer_settings(self):
+        """Load auto changer settings from the configuration."""
+        DEFAULT_ENABLED = False
+        DEFAULT_INTERVAL = 5
+        settings = load_settings()
+        self.auto_changer_enabled = settings.get('auto_changer_enabled', DEFAULT_ENABLED)
+        self.auto_changer_interval = settings.get('auto_changer_interval', DEFAULT_INTERVAL)
+
+        if self.auto_changer_enabled:
+            interval_mapping = {
+                0: 60000,
+                1: 300000,
+                2: 900000,
+                3: 1800000,
+                4: 3600000,
+                5: 10800000,
+                6: 21600000,
+                7: 43200000,
+                8: 86400000
+            }
+            interval = interval_mapping[self.auto_changer_interval]
+            self.auto_changer_timer.start(interval)
+        else:
+            self.auto_changer_timer.stop()
+
+
+    def show_auto_changer_dialog(self):
+        """Show the dialog to configure the automatic wallpaper changer settings."""
+        dialog = AutoChangerDialog(self.auto_changer_enabled, self.auto_changer_interval)
+        if exec_dialog(dialog):
+            self.auto_changer_enabled = dialog.auto_changer_checkbox.isChecked()
+            self.auto_changer_interval = dialog.auto_changer_combobox.currentIndex()
+
+            if self.auto_changer_enabled:
+                interval_mapping = {
+                    0: 60000,
+                    1: 300000,
+                    2: 900000,
+                    3: 1800000,
+                    4: 3600000,
+                    5: 10800000,
+                    6: 21600000,
+                    7: 43200000,
+                    8: 86400000
+                }
+                interval = interval_mapping[self.auto_changer_interval]
+                self.auto_changer_timer.start(interval)
+            else:
+                self.auto_changer_timer.stop()
+
+            self.save_auto_changer_settings()
+
+    def change_theme(self, theme=None):
+        """Change the application theme, saving it only when it changed."""
+        settings = load_settings()
+        if theme is None:
+            theme = settings.get('theme', themes.DEFAULT_THEME)
+        logging.debug("Applying theme: %s", theme)
+        theme = themes.apply(QApplication.instance(), theme)
+        if settings.get('theme', themes.DEFAULT_THEME) != theme:
+            settings['theme'] = theme
+            save_settings(settings)
+
+    def change_wallpaper(self, cached_only=False):
         """Change the wallpaper to a random image from the favorites list."""
-        result, title = change_wallpaper()
+        result, title = change_wallpaper(cached_only=bool(cached_only))
+        if result == 0:
+            self.show_custom_notification("Wallpaper Changed", f"Wallpaper changed to {title}", 3000)
+        else:
+            self.show_custom_notification("Error", "Failed to change wallpaper.", 3000)
+        return result, title
+
+    def auto_change_wallpaper(self):
+        """Change the wallpaper from the auto changer timer, unless paused or pinned.
+
+        The power policy may defer the change until it can be seen, or
+        limit it to images that are already cached.
+        """
+        if self.auto_changer_paused or is_pinned():
+            return
+        decision = self.policy.decide(load_settings().get('power_policy'), probe=False)
+        if not decision.change:
+            if not self.change_deferred:
+                logging.info("Deferring wallpaper change: %s", decision.reason)
+                metrics.incr('policy_deferred_changes_total')
+            self.change_deferred = True
+            return
+        self.change_deferred = False
+        with governor.priority(SCHEDULED):
+            self.change_wallpaper(cached_only=decision.cached_only)
+
+    def setup_screen(self):
+        """Keep the stored screen size current for worker threads, which may not query QScreen."""
+        app = QApplication.instance()
+        app.primaryScreenChanged.connect(self.watch_screen)
+        self.watch_screen(app.primaryScreen())
+
+    def watch_screen(self, screen):
+        """Store the size of the primary ``screen`` and follow its changes."""
+        if screen is not None:
+            screen.geometryChanged.connect(self.screen_changed)
+        self.screen_changed()
+
+    def screen_changed(self, *args):
+        wallpaper_changer.update_screen_size()
+
+    def setup_policy(self):
+        """Re-check the power policy every minute to resume deferred and background work.
+
+        The probes can block, so they run on a worker thread and the
+        policy is applied once they report back.
+        """
+        self.policy = policy.PolicyEngine()
+        self.change_deferred = False
+        self.policy_read.connect(self.apply_policy)
+        self.policy_timer = QTimer(self)
+        self.policy_timer.timeout.connect(self.refresh_policy)
+        self.policy_timer.start(POLICY_INTERVAL)
+        self.refresh_policy()
+
+    def refresh_policy(self):
+        self.policy.refresh(lambda conditions: self.policy_read.emit())
+
+    def apply_policy(self):
+        """Pause or resume background jobs and downloads and run a deferred change once allowed.
+
+        Paused downloads keep their partial files and resume where they stopped.
+        """
+        decision = self.policy.decide(load_settings().get('power_policy'), probe=False)
+        bandwidth.limiter.restrict((decision.background_mbps or 0) * bandwidth.BYTES_PER_MBIT)
+        if decision.prefetch:
+            self.jobs.resume()
+            bandwidth.limiter.resume()
+        elif not self.jobs.paused():
+            logging.info("Pausing background jobs: %s", decision.reason)
+            self.jobs.pause()
+            bandwidth.limiter.pause()
+        if self.change_deferred and decision.change:
+            self.auto_change_wallpaper()
+
+    def previous_wallpaper(self):
+        """Go back to the previous wallpaper in the history."""
+        result, title = previous_wallpaper()
+        if result == 0:
+            self.show_custom_notification("Wallpaper Changed", f"Back to {title}", 3000)
+        else:
+            self.show_custom_notification("History", "No earlier wallpaper in the history.", 3000)
+        self.pin_action.setChecked(is_pinned())
+        return result, title
+
+    def next_wallpaper(self):
+        """Go forward in the history, or to a new wallpaper at its end."""
+        result, title = next_wallpaper()
         if result == 0:
             self.show_custom_notification("Wallpaper Changed", f"Wallpaper changed to {title}", 3000)
         else:
             self.show_custom_notification("Error", "Failed to change wallpaper.", 3000)
-
+        self.pin_action.setChecked(is_pinned())
+        return result, title
+
+    def toggle_pin(self):
+        """Pin the current wallpaper so the auto changer leaves it in place."""
+        pinned = toggle_pin()
+        self.pin_action.setChecked(bool(pinned))
+        if pinned is not None:
+            message = "The auto changer will keep this wallpaper." if pinned else "The auto changer will resume."
+            self.show_custom_notification("Wallpaper Pinned" if pinned else "Wallpaper Unpinned", message, 3000)
+        return pinned
+
+    def handle_command(self, command):
+        """Run a command forwarded by another launch and return the reply text."""
+        if command == 'show':
+            self.restore_window()
+            return "ok"
+        if command in ('change', 'next', 'previous'):
+            action = {'change': self.change_wallpaper, 'next': self.next_wallpaper, 'previous': self.previous_wallpaper}
+            result, title = action[command]()
+            if result != 0:
+                return f"{single_instance.ERROR_PREFIX}could not change the wallpaper"
+            return f"Wallpaper changed to {title}"
+        if command == 'pin':
+            pinned = self.toggle_pin()
+            if pinned is None:
+                return f"{single_instance.ERROR_PREFIX}no wallpaper to pin"
+            return "Pinned" if pinned else "Unpinned"
+        if command == 'pause':
+            self.auto_changer_paused = not self.auto_changer_paused
+            return "Auto changer paused" if self.auto_changer_paused else "Auto changer resumed"
+        if command == 'metrics':
+            return metrics.to_json()
+        entry = current_wallpaper()
+        return json.dumps({
+            'wallpaper': entry[1] if entry else None,
+            'path': entry[2] if entry else None,
+            'pinned': bool(entry and entry[3]),
+            'auto_changer': self.auto_changer_enabled,
+            'interval_ms': self.auto_changer_timer.interval() if self.auto_changer_enabled else None,
+            'paused': self.auto_changer_paused,
+            'jobs': self.jobs.counts(),
+            'jobs_paused': self.jobs.paused(),
+            'policy': self.policy.decide(load_settings().get('power_policy'), probe=False)._asdict(),
+            'conditions': self.policy.latest()._asdict(),
+            'bandwidth': wallpaper_changer.bandwidth_usage(),
+        }, indent=2)
+
     def set_specific_wallpaper(self, index):
         """Set a specific wallpaper based on the selected index."""
         selected_item = index.data()
         title, media_type = selected_item.split(' | ')
         result, title_name = set_specific_wallpaper(title, media_type)
-        if result == 0:
-            self.show_custom_notification("Wallpaper Changed", f"Wallpaper changed to {title_name}", 3000)
-        else:
+        if result == 0:
+            self.show_custom_notification("Wallpaper Changed", f"Wallpaper changed to {title_name}", 3000)
+        else:
             self.show_custom_notification("Error", "Failed to change wallpaper.", 3000)
 
     def show_preview_dialog(self, image_path):
@@ -715,15 +1381,16 @@ class MainWindow(QMainWindow):
         dialog.setWindowTitle("Preview Wallpaper")
         layout = QVBoxLayout()
         label = QLabel()
-        pixmap = QPixmap(image_path)
-        label.setPixmap(pixmap.scaled(800, 450, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        label.setPixmap(load_preview_pixmap(image_path))
         layout.addWidget(label)
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(dialog.accept)
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         dialog.setLayout(layout)
-        return dialog.exec_() == QDialog.Accepted
+        accepted = exec_dialog(dialog)
+        label.clear()
+        return accepted
 
     def preview_random_wallpaper(self):
         api_key = get_api_key()
@@ -735,7 +1402,8 @@ class MainWindow(QMainWindow):
             self.show_custom_notification("Error", "Could not fetch wallpaper", 3000)
             return
         if self.show_preview_dialog(image_path):
-            if set_wallpaper(image_path):
+            if apply_wallpaper(image_path, title):
+                mark_shown(image_path, title)
                 self.show_custom_notification("Wallpaper Changed", f"Wallpaper changed to {title}", 3000)
             else:
                 self.show_custom_notification("Error", "Failed to change wallpaper.", 3000)
@@ -743,38 +1411,279 @@ class MainWindow(QMainWindow):
     def set_local_image(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Images (*.png *.jpg *.jpeg *.bmp)")
         if path and self.show_preview_dialog(path):
-            if set_wallpaper(path):
+            if apply_wallpaper(path):
+                mark_shown(path)
                 self.show_custom_notification("Wallpaper Changed", "Wallpaper changed", 3000)
             else:
                 self.show_custom_notification("Error", "Failed to change wallpaper.", 3000)
-
-    def show_custom_notification(self, title, message, duration):
-        """Show a custom notification."""
-        notification = CustomNotification(title, message, duration, self)
-        notification.show()
-
-    def start_delete_timer(self):
-        """Start the delete timer."""
-        self.delete_timer.start()
-
-    def stop_delete_timer(self):
-        """Stop the delete timer."""
-        if self.delete_timer.isActive():
-            self.delete_timer.stop()
-            self.delete_title()
-
-def run():
-    """Run the application."""
-    configure_logging()
+
+    def setup_local_library(self):
+        """Watch the local folders and keep their index fresh in the background."""
+        self.library_watcher = QFileSystemWatcher(self)
+        self.library_watcher.directoryChanged.connect(self.schedule_library_rescan)
+        self.changed_folders = set()
+
+        # Coalesce bursts of change notifications into a single rescan
+        self.library_rescan_timer = QTimer(self)
+        self.library_rescan_timer.setSingleShot(True)
+        self.library_rescan_timer.setInterval(5000)
+        self.library_rescan_timer.timeout.connect(self.rescan_changed_folders)
+
+        self.library_refresh_timer = QTimer(self)
+        self.library_refresh_timer.timeout.connect(lambda: local_library.start_scan(DATABASE_NAME))
+        self.library_refresh_timer.start(LIBRARY_RESCAN_INTERVAL)
+
+        folders = self.load_local_folders()
+        if folders:
+            self.library_watcher.addPaths(folders)
+            local_library.start_scan(DATABASE_NAME)
+
+    def load_local_folders(self):
+        """Return the registered local folders."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                local_library.ensure_tables(conn)
+                return local_library.list_folders(conn)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+            return []
+
+    def setup_discovery(self):
+        """Refresh the TMDB discovery pools in the background, hourly and after startup."""
+        self.discovery_refresh = None
+        self.discovery_timer = QTimer(self)
+        self.discovery_timer.timeout.connect(self.refresh_discovery_sources)
+        self.discovery_timer.start(DISCOVERY_REFRESH_INTERVAL)
+        QTimer.singleShot(DISCOVERY_STARTUP_DELAY, self.refresh_discovery_sources)
+
+    def refresh_discovery_sources(self):
+        """Start refreshing the configured discovery sources that are due."""
+        settings = load_settings()
+        api_key = settings.get('api_key')
+        if not api_key:
+            return
+        started = discovery.start_refresh(
+            DATABASE_NAME, settings.get('discovery_sources', []), wallpaper_changer.TMDB_API_URL, api_key
+        )
+        if started:
+            self.discovery_refresh = started
+
+    def setup_jobs(self):
+        """Start the workers of the background job queue, resuming unfinished jobs."""
+        self.jobs = jobs.JobQueue(
+            DATABASE_NAME,
+            {
+                import_export.RESOLVE_JOB: import_export.resolve_title,
+                PREFETCH_JOB: prefetch_title,
+                METADATA_JOB: fetch_metadata,
+            },
+            workers=load_settings().get('job_workers', jobs.WORKERS),
+        )
+        try:
+            self.jobs.start()
+        except sqlite3.Error as e:
+            logging.error("Could not start the job queue: %s", e)
+        self.metadata_timer = QTimer(self)
+        self.metadata_timer.timeout.connect(self.refresh_metadata)
+        self.metadata_timer.start(METADATA_REFRESH_INTERVAL)
+        QTimer.singleShot(DISCOVERY_STARTUP_DELAY, self.refresh_metadata)
+
+    def refresh_metadata(self):
+        """Queue TMDB detail lookups for new favorites and those with old details."""
+        self.load_genres()
+        if not load_settings().get('api_key'):
+            return
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                pending = metadata_jobs(conn)
+            self.jobs.submit_many(METADATA_JOB, pending)
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+
+    def prefetch_wallpapers(self):
+        """Queue a wallpaper download for every favorite."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                pending = prefetch_jobs(conn)
+            added = self.jobs.submit_many(PREFETCH_JOB, pending)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+            return
+        self.show_custom_notification("Prefetch", f"Queued {added} titles for download", 3000)
+
+    def schedule_library_rescan(self, path):
+        """Queue a rescan of a watched folder that reported a change."""
+        self.changed_folders.add(path)
+        self.library_rescan_timer.start()
+
+    def rescan_changed_folders(self):
+        """Rescan the folders that changed since the last rescan."""
+        folders = sorted(self.changed_folders)
+        self.changed_folders.clear()
+        if folders:
+            local_library.start_scan(DATABASE_NAME, folders)
+
+    def show_local_folders_dialog(self):
+        """Show the dialog to manage the local folders."""
+        current = self.load_local_folders()
+        dialog = LocalFoldersDialog(current)
+        if not exec_dialog(dialog):
+            return
+        folders = dialog.folders()
+        added = [path for path in folders if path not in current]
+        removed = [path for path in current if path not in folders]
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                for path in removed:
+                    local_library.remove_folder(conn, path)
+                for path in added:
+                    local_library.add_folder(conn, path)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+            return
+        if removed:
+            self.library_watcher.removePaths(removed)
+        if added:
+            self.library_watcher.addPaths(added)
+            local_library.start_scan(DATABASE_NAME, [os.path.abspath(path) for path in added])
+
+    def show_failed_titles_dialog(self):
+        """Show the favorites that are being skipped after failing."""
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                failures = title_failures.list_failures(conn)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+            return
+        if not failures:
+            self.show_custom_notification("Problem Titles", "Every favorite has a usable backdrop", 3000)
+            return
+        dialog = FailedTitlesDialog(failures)
+        if not exec_dialog(dialog):
+            return
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                for name, media_type in dialog.retry + dialog.remove:
+                    title_failures.clear(conn, name, media_type)
+                with conn:
+                    conn.executemany("DELETE FROM titles WHERE name=? AND media_type=?", dialog.remove)
+        except sqlite3.Error as e:
+            self.display(f'Database Error: {e}')
+        if dialog.remove:
+            self.show_titles()
+
+    def show_custom_notification(self, title, message, duration):
+        """Show a custom notification, reusing the window's notification widget."""
+        if self.notification is None:
+            self.notification = CustomNotification(title, message, duration, self)
+        else:
+            self.notification.show_message(title, message, duration)
+        self.notification.show()
+
+    def start_delete_timer(self):
+        """Start the delete timer."""
+        self.delete_timer.start()
+
+    def stop_delete_timer(self):
+        """Stop the delete timer."""
+        if self.delete_timer.isActive():
+            self.delete_timer.stop()
+            self.delete_title()
+
+COMMANDS = {
+    'change': change_wallpaper,
+    'next': next_wallpaper,
+    'previous': previous_wallpaper,
+}
+
+# Commands that only make sense for a running instance
+INSTANCE_COMMANDS = ('pause', 'status', 'metrics')
+
+def parse_args(argv=None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog='framechanger', description='Movie and TV show wallpapers from TMDB.')
+    parser.add_argument('command', nargs='?', choices=sorted(COMMANDS) + ['pin'] + list(INSTANCE_COMMANDS),
+                        help='send a command to the running FrameChanger; change, next, previous '
+                             'and pin also work when it is not running')
+    return parser.parse_args(argv)
+
+def run_command(command):
+    """Run a command-line action without opening the window and return the exit code."""
+    if command == 'pin':
+        pinned = toggle_pin()
+        if pinned is None:
+            print("No wallpaper to pin")
+            return 1
+        print("Pinned" if pinned else "Unpinned")
+        return 0
+    result, title = COMMANDS[command]()
+    if result == 0:
+        print(f"Wallpaper changed to {title}")
+    return result
+
+def run(argv=None):
+    """Run the application, or hand the command line to the running instance."""
+    args = parse_args(argv)
+    reply = single_instance.send_command(args.command or 'show')
+    if reply is not None:
+        if args.command:
+            print(reply)
+        return 1 if reply.startswith(single_instance.ERROR_PREFIX) else 0
+    if args.command in INSTANCE_COMMANDS:
+        print("FrameChanger is not running")
+        return 1
+
+    settings = load_settings()
+    configure_logging(**log_options(settings))
+    governor.configure(settings.get('tmdb_rate', DEFAULT_RATE), settings.get('tmdb_burst', DEFAULT_BURST))
     app = QApplication([])
-    main = MainWindow()
-    main.show()
-    app.setQuitOnLastWindowClosed(False)
-    app.exec_()
-
-if __name__ == '__main__':
-    try:
-        run()
-    except Exception as e:
-        logging.error(e, exc_info=True)
-        QMessageBox.warning(None, "Error", str(e))
+    if args.command:
+        initialize_database()
+        try:
+            return run_command(args.command)
+        finally:
+            image_processing.shutdown()
+    instance = single_instance.InstanceServer(None)
+    if not instance.start():
+        logging.error("FrameChanger is already running")
+        return 1
+    metrics_server = None
+    if settings.get('metrics_port'):
+        try:
+            metrics_server = start_server(int(settings['metrics_port']))
+        except OSError as e:
+            logging.error("Could not start metrics endpoint: %s", e)
+    peer_server = None
+    if settings.get('peer_cache_port'):
+        store = peer_cache.ImageStore(wallpaper_changer.image_dir, os.path.abspath(DATABASE_NAME))
+        try:
+            peer_server = peer_cache.start_server(
+                store, int(settings['peer_cache_port']), settings.get('peer_cache_host', '0.0.0.0')
+            )
+        except OSError as e:
+            logging.error("Could not start peer cache: %s", e)
+    main = MainWindow()
+    instance.handler = main.handle_command
+    main.show()
+    app.setQuitOnLastWindowClosed(False)
+    app.exec_()
+    instance.stop()
+    main.jobs.stop()
+    main.autocompleter.shutdown()
+    main.policy.shutdown()
+    wait_for_upgrades()
+    image_processing.shutdown()
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    if peer_server is not None:
+        peer_server.shutdown()
+        peer_server.server_close()
+    if settings.get('metrics_file'):
+        metrics.dump(settings['metrics_file'])
+
+if __name__ == '__main__':
+    try:
+        run()
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        QMessageBox.warning(None, "Error", str(e))
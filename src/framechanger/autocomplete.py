@@ -0,0 +1,199 @@
+"""Live TMDB suggestions for the add-title box.
+
+Typing in the title box starts a TMDB search once the user pauses
+(:data:`DEBOUNCE_MS`).  Searches run on a worker thread; a search that
+is still queued when the text changes again is cancelled, and replies
+to an older text are ignored.  Results are kept in an LRU cache keyed by
+media type and query.  When a shorter query returned every match, a
+longer query that extends it is answered from that result without a
+request.  Picking a suggestion keeps its TMDB id, so the title is stored
+already resolved and its first wallpaper change skips the search.
+"""
+
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from PyQt5.QtCore import QObject, QStringListModel, Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QCompleter
+
+from .metrics import metrics
+from .rate_limit import INTERACTIVE, governor
+
+DEBOUNCE_MS = 250
+MIN_LENGTH = 2
+CACHE_SIZE = 256
+MAX_SUGGESTIONS = 10
+
+Suggestion = collections.namedtuple("Suggestion", "tmdb_id title year media_type")
+
+
+def _normalize(query):
+    return " ".join(query.lower().split())
+
+
+def label(suggestion):
+    """Return the text shown for a suggestion, e.g. ``The Matrix (1999)``."""
+    return f"{suggestion.title} ({suggestion.year})" if suggestion.year else suggestion.title
+
+
+def search(query, media_type, api_url, api_key):
+    """Search TMDB and return ``(suggestions, complete)``.
+
+    ``complete`` is True when the reply holds every match of the query.
+    """
+    response = governor.get(
+        f"{api_url}/search/{media_type}?api_key={api_key}&query={quote(query)}", priority=INTERACTIVE
+    )
+    response.raise_for_status()
+    data = response.json()
+    results = data.get("results", [])
+    suggestions = []
+    for item in results:
+        title = item.get("title") or item.get("name")
+        if not title or not item.get("id"):
+            continue
+        date = item.get("release_date") or item.get("first_air_date") or ""
+        suggestions.append(Suggestion(item["id"], title, date[:4] or None, media_type))
+    return suggestions, data.get("total_results", len(results)) <= len(results)
+
+
+class SuggestionCache:
+    """LRU cache of search results that also answers extensions of complete queries."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, media_type, query):
+        """Return the cached suggestions for a query, or None."""
+        query = _normalize(query)
+        with self._lock:
+            for length in range(len(query), MIN_LENGTH - 1, -1):
+                key = (media_type, query[:length])
+                entry = self._entries.get(key)
+                if entry is None or (length < len(query) and not entry[1]):
+                    continue
+                self._entries.move_to_end(key)
+                metrics.incr("autocomplete_cache_hits_total")
+                if length == len(query):
+                    return entry[0]
+                return [s for s in entry[0] if query in _normalize(s.title)]
+        metrics.incr("autocomplete_cache_misses_total")
+        return None
+
+    def put(self, media_type, query, suggestions, complete):
+        with self._lock:
+            self._entries[(media_type, _normalize(query))] = (suggestions, complete)
+            self._entries.move_to_end((media_type, _normalize(query)))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class Autocompleter(QObject):
+    """Attach debounced TMDB suggestions to a ``QLineEdit``.
+
+    ``media_type`` and ``api_key`` are called at search time, so they
+    follow the radio buttons and settings.
+    """
+
+    results_ready = pyqtSignal(int, object)
+
+    def __init__(self, line_edit, media_type, api_key, api_url, cache=None, parent=None):
+        super().__init__(parent or line_edit)
+        self.line_edit = line_edit
+        self.media_type = media_type
+        self.api_key = api_key
+        self.api_url = api_url
+        self.cache = cache or SuggestionCache()
+        self.search = search
+        self.selected = None
+        self._labels = {}
+        self._generation = 0
+        self._pending = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autocomplete")
+
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.activated[str].connect(self.choose)
+        line_edit.setCompleter(self.completer)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.start_search)
+        line_edit.textEdited.connect(self.text_edited)
+        self.results_ready.connect(self.show_results)
+
+    def text_edited(self, text):
+        """Forget the chosen suggestion and restart the debounce timer."""
+        self.selected = None
+        self._generation += 1
+        self.timer.start()
+
+    def start_search(self):
+        """Search for the current text, from the cache when possible."""
+        query = self.line_edit.text().strip()
+        media_type = self.media_type()
+        generation = self._generation
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if len(query) < MIN_LENGTH:
+            return
+        cached = self.cache.get(media_type, query)
+        if cached is not None:
+            self.show_results(generation, cached)
+            return
+        api_key = self.api_key()
+        if not api_key:
+            return
+        metrics.incr("tmdb_requests_total", endpoint="autocomplete")
+        self._pending = self._executor.submit(self._search, query, media_type, api_key)
+        self._pending.add_done_callback(lambda future: self._finished(generation, future))
+
+    def _search(self, query, media_type, api_key):
+        suggestions, complete = self.search(query, media_type, self.api_url, api_key)
+        self.cache.put(media_type, query, suggestions, complete)
+        return suggestions
+
+    def _finished(self, generation, future):
+        if future.cancelled():
+            metrics.incr("autocomplete_cancelled_total")
+            return
+        if future.exception() is None:
+            self.results_ready.emit(generation, future.result())
+
+    def show_results(self, generation, suggestions):
+        """Show suggestions unless the text has changed since they were requested."""
+        if generation != self._generation:
+            metrics.incr("autocomplete_stale_total")
+            return
+        suggestions = suggestions[:MAX_SUGGESTIONS]
+        self._labels = {label(s): s for s in suggestions}
+        self.model.setStringList(list(self._labels))
+        if suggestions and self.line_edit.hasFocus():
+            self.completer.complete()
+
+    def choose(self, text):
+        """Remember the picked suggestion and put its plain title in the box."""
+        suggestion = self._labels.get(text)
+        if suggestion is None:
+            return
+        # QCompleter writes the label after this signal; replace it afterwards
+        QTimer.singleShot(0, lambda: self.line_edit.setText(suggestion.title))
+        self.selected = suggestion
+
+    def chosen(self, title, media_type):
+        """Return the picked suggestion if it still matches the title and type."""
+        suggestion = self.selected
+        if suggestion and suggestion.title == title and suggestion.media_type == media_type:
+            return suggestion
+        return None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,161 @@
+"""Ranking and weighted selection of a title's TMDB backdrops.
+
+The backdrop list of a title is ranked once, when it is fetched, and
+stored in the ``backdrop_rankings`` table together with a cumulative
+weight per image.  Backdrops must be language-neutral, close to the
+shape of the target display and large enough for it; each one is
+scored by its TMDB votes (a Bayesian average, so a single 10/10 vote
+does not beat a hundred 8/10 votes) and its resolution.  Loaded
+rankings are kept in a :class:`RankingCache` with their cumulative
+weights, so a pick is a binary search that touches neither the database
+nor the rest of the list; only the drawn backdrop is checked against
+recently shown wallpapers.
+"""
+
+import bisect
+import collections
+import itertools
+import math
+import random
+import threading
+import time
+
+DEFAULT_RATIO = 16 / 9
+# Relative difference from the display's aspect ratio that still fits it.
+ASPECT_TOLERANCE = 0.1
+MIN_WIDTH = 1280
+UHD_WIDTH = 3840
+# Votes assumed for every backdrop at PRIOR_MEAN before its own are counted.
+PRIOR_VOTES = 5
+PRIOR_MEAN = 5.0
+MIN_SCORE = 0.1
+MAX_AGE = 7 * 24 * 3600
+PICK_ATTEMPTS = 5
+RANKING_CACHE_SIZE = 256
+# Rankings in memory are reloaded from the table after this many seconds
+RANKING_CACHE_TTL = 3600
+
+Ranking = collections.namedtuple("Ranking", "entries cumulative")
+
+
+def ensure_table(conn):
+    """Create the ``backdrop_rankings`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS backdrop_rankings (
+            media_type TEXT NOT NULL,
+            media_id INTEGER NOT NULL,
+            file_path TEXT NOT NULL,
+            score REAL NOT NULL,
+            cumulative REAL NOT NULL,
+            target_ratio REAL NOT NULL,
+            ranked_at REAL NOT NULL,
+            PRIMARY KEY (media_type, media_id, file_path)
+        )
+    ''')
+
+
+def score(backdrop):
+    """Return the selection weight of a backdrop from its votes and width."""
+    votes = backdrop.get('vote_count') or 0
+    average = backdrop.get('vote_average') or 0.0
+    rating = (votes * average + PRIOR_VOTES * PRIOR_MEAN) / (votes + PRIOR_VOTES)
+    resolution = math.sqrt(min(backdrop['width'], UHD_WIDTH) / UHD_WIDTH)
+    return max(MIN_SCORE, rating * resolution)
+
+
+def rank(backdrops, target_ratio=DEFAULT_RATIO, tolerance=ASPECT_TOLERANCE, min_width=MIN_WIDTH):
+    """Return ``(file_path, score, cumulative)`` for the usable backdrops, best first.
+
+    When no backdrop fits the display, the ones closest to its shape are
+    used regardless of size rather than none at all.
+    """
+    candidates = [
+        (abs(img['width'] / img['height'] - target_ratio) / target_ratio, img)
+        for img in backdrops
+        if img.get('iso_639_1') is None and img.get('height')
+    ]
+    fits = [img for distance, img in candidates if distance <= tolerance and img['width'] >= min_width]
+    if not fits and candidates:
+        closest = min(distance for distance, _ in candidates)
+        fits = [img for distance, img in candidates if distance <= closest + 0.01]
+
+    scored = sorted(((score(img), img['file_path']) for img in fits), reverse=True)
+    weights = itertools.accumulate(value for value, _ in scored)
+    return [(file_path, value, total) for (value, file_path), total in zip(scored, weights)]
+
+
+def store(conn, media_type, media_id, ranked, target_ratio, now=None):
+    """Replace the stored ranking of a title."""
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute(
+            "DELETE FROM backdrop_rankings WHERE media_type=? AND media_id=?", (media_type, media_id)
+        )
+        conn.executemany(
+            "INSERT INTO backdrop_rankings VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(media_type, media_id, file_path, value, total, round(target_ratio, 2), now)
+             for file_path, value, total in ranked],
+        )
+
+
+def load(conn, media_type, media_id, target_ratio, max_age=MAX_AGE, now=None):
+    """Return the stored ranking of a title, or None if missing or stale."""
+    now = time.time() if now is None else now
+    rows = conn.execute(
+        "SELECT file_path, score, cumulative FROM backdrop_rankings "
+        "WHERE media_type=? AND media_id=? AND target_ratio=? AND ranked_at>=? "
+        "ORDER BY cumulative",
+        (media_type, media_id, round(target_ratio, 2), now - max_age),
+    ).fetchall()
+    return rows or None
+
+
+class RankingCache:
+    """LRU of loaded rankings, keyed by media type, id and target ratio."""
+
+    def __init__(self, maxsize=RANKING_CACHE_SIZE, ttl=RANKING_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now=None):
+        """Return the cached :class:`Ranking` for ``key``, or None."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, ranked, now=None):
+        """Cache ``ranked`` with its cumulative weights and return the :class:`Ranking`."""
+        now = time.monotonic() if now is None else now
+        ranking = Ranking(ranked, [total for _, _, total in ranked])
+        with self._lock:
+            self._entries[key] = (now, ranking)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return ranking
+
+
+def pick(ranked, allowed=None, rng=random, cumulative=None):
+    """Return a file path drawn with probability proportional to its score.
+
+    ``cumulative`` is the weight list of a cached :class:`Ranking`; it is
+    rebuilt when not given.  ``allowed`` is a predicate checked only for
+    the drawn backdrop.  Rejected picks (e.g. near-duplicates of a recent
+    wallpaper) are redrawn a few times before settling for the best
+    allowed backdrop, or the best one if none is allowed.
+    """
+    if cumulative is None:
+        cumulative = [total for _, _, total in ranked]
+    for _ in range(PICK_ATTEMPTS):
+        index = bisect.bisect_right(cumulative, rng.random() * cumulative[-1])
+        file_path = ranked[min(index, len(ranked) - 1)][0]
+        if allowed is None or allowed(file_path):
+            return file_path
+    # Rankings are ordered best first
+    return next((file_path for file_path, _, _ in ranked if allowed(file_path)), ranked[0][0])
@@ -0,0 +1,186 @@
+"""Bandwidth cap and byte accounting for image downloads.
+
+Background downloads (prefetch jobs run at ``BACKGROUND`` priority) are
+streamed in chunks through :data:`limiter`, a token bucket shared by all
+of them, so together they stay under ``background_bandwidth_mbps``.
+Interactive and scheduled changes never wait for it.  A background
+download writes to ``<name>.part`` and keeps that file when it is
+paused or interrupted; the next attempt asks only for the rest with an
+HTTP Range request.
+
+Downloaded bytes are counted for the session in memory and per day in
+the ``bandwidth_usage`` table, which lets a daily budget stop background
+downloads on metered connections.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import requests
+
+from .metrics import metrics
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 30
+# Megabits per second to bytes per second
+BYTES_PER_MBIT = 125000
+
+
+class Paused(Exception):
+    """A background download was stopped early; its partial file is kept."""
+
+
+class BandwidthLimiter:
+    """Token bucket in bytes per second; a rate of 0 means no cap."""
+
+    def __init__(self, rate=0):
+        self._lock = threading.Lock()
+        self._paused = threading.Event()
+        self._configured = 0.0
+        self._ceiling = 0.0
+        self.configure(rate)
+
+    def configure(self, rate):
+        """Set the cap in bytes per second, keeping the current tokens."""
+        self._configured = max(0.0, float(rate))
+        self._update()
+
+    def restrict(self, rate):
+        """Keep the cap at or below ``rate`` bytes per second, e.g. on a metered link; 0 lifts it."""
+        self._ceiling = max(0.0, float(rate))
+        self._update()
+
+    def _update(self):
+        with self._lock:
+            rates = [rate for rate in (self._configured, self._ceiling) if rate > 0]
+            rate = min(rates) if rates else 0.0
+            if getattr(self, "rate", None) == rate:
+                return
+            self.rate = rate
+            # Allow about a second of burst, but at least one chunk
+            self.burst = max(rate, CHUNK_SIZE)
+            self.tokens = self.burst
+            self.updated = time.monotonic()
+        metrics.gauge("bandwidth_limit_bytes_per_second", rate)
+
+    def consume(self, nbytes):
+        """Take ``nbytes`` from the bucket, sleeping until they are paid for; return the wait."""
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the bytes now so concurrent downloads queue behind each other
+            self.tokens -= nbytes
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            metrics.observe("bandwidth_wait_seconds", wait)
+            time.sleep(wait)
+        return wait
+
+    def pause(self):
+        """Make running and new background downloads stop at their next chunk."""
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def is_paused(self):
+        return self._paused.is_set()
+
+
+limiter = BandwidthLimiter()
+
+
+def download(url, path, limiter=limiter, record=None, timeout=TIMEOUT):
+    """Stream ``url`` to ``path`` at the limiter's pace, resuming ``path.part``.
+
+    ``record`` is called with the number of bytes received, also when
+    the download is paused or fails half way.  Raises :class:`Paused`
+    when the limiter is paused, keeping the partial file.
+    """
+    part_path = f"{path}.part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    received = 0
+    try:
+        if limiter.is_paused():
+            raise Paused(url)
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 416:
+                # The partial file no longer matches the remote one
+                os.remove(part_path)
+            response.raise_for_status()
+            if offset and response.status_code == 206:
+                metrics.incr("bandwidth_resumed_total")
+                logging.debug("Resuming %s at byte %s", url, offset)
+            else:
+                offset = 0
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if limiter.is_paused():
+                        raise Paused(url)
+                    limiter.consume(len(chunk))
+                    f.write(chunk)
+                    received += len(chunk)
+        os.replace(part_path, path)
+    finally:
+        if record is not None:
+            record(received)
+    return received
+
+
+_session_lock = threading.Lock()
+_session = {"bytes": 0, "background_bytes": 0}
+
+
+def ensure_table(conn):
+    """Create the ``bandwidth_usage`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bandwidth_usage (
+            day TEXT PRIMARY KEY,
+            bytes INTEGER NOT NULL DEFAULT 0,
+            background_bytes INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def today(now=None):
+    return time.strftime("%Y-%m-%d", time.localtime(now))
+
+
+def record(conn, nbytes, background=False, day=None):
+    """Add downloaded bytes to the session and daily counters."""
+    if not nbytes:
+        return
+    background_bytes = nbytes if background else 0
+    with _session_lock:
+        _session["bytes"] += nbytes
+        _session["background_bytes"] += background_bytes
+    metrics.incr("download_bytes_total", nbytes)
+    if background:
+        metrics.incr("background_download_bytes_total", nbytes)
+    with conn:
+        conn.execute(
+            "INSERT INTO bandwidth_usage (day, bytes, background_bytes) VALUES (?, ?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET bytes=bytes+excluded.bytes, "
+            "background_bytes=background_bytes+excluded.background_bytes",
+            (day or today(), nbytes, background_bytes),
+        )
+
+
+def daily(conn, day=None):
+    """Return ``(bytes, background_bytes)`` downloaded on ``day`` (default today)."""
+    row = conn.execute(
+        "SELECT bytes, background_bytes FROM bandwidth_usage WHERE day=?", (day or today(),)
+    ).fetchone()
+    return row or (0, 0)
+
+
+def session():
+    """Return the bytes downloaded since the app started."""
+    with _session_lock:
+        return dict(_session)
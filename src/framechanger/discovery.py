@@ -0,0 +1,239 @@
+"""TMDB discovery sources that feed the random rotation.
+
+Besides the favorites in ``titles``, wallpapers can come from dynamic
+pools: trending titles of the day or week, popular movies or shows, a
+public TMDB list, a collection, or recommendations based on the
+favorites.  Sources are configured in ``settings.json`` as strings such
+as ``"trending:week"``, ``"popular:tv"``, ``"list:8136"``,
+``"collection:10"`` or ``"similar"``.
+
+Each source is paged through on a background thread and every page is
+stored in ``discovery_titles`` as soon as it arrives, so an interrupted
+refresh resumes where it stopped.  Titles that dropped out of a source
+are removed once its refresh completes.  The wallpaper change path only
+reads the local tables and never waits for TMDB.
+"""
+
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .rate_limit import BACKGROUND, governor
+
+MAX_PAGES = 5
+SIMILAR_SEEDS = 5
+REFRESH_INTERVALS = {
+    "trending": 6 * 3600,
+    "popular": 24 * 3600,
+    "similar": 24 * 3600,
+    "list": 7 * 24 * 3600,
+    "collection": 7 * 24 * 3600,
+}
+
+_refresh_lock = threading.Lock()
+
+
+def ensure_tables(conn):
+    """Create the discovery tables if they do not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS discovery_sources (
+            source TEXT PRIMARY KEY,
+            last_refresh REAL,
+            refresh_started REAL,
+            next_page INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS discovery_titles (
+            source TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            tmdb_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            refreshed_at REAL NOT NULL,
+            PRIMARY KEY (source, media_type, tmdb_id)
+        )
+    ''')
+
+
+def parse_source(source):
+    """Split a source string into its kind and parameter."""
+    kind, _, param = source.partition(":")
+    if kind not in REFRESH_INTERVALS:
+        raise ValueError(f"Unknown discovery source: {source}")
+    if kind in ("list", "collection") and not param:
+        raise ValueError(f"Discovery source needs an id: {source}")
+    return kind, param
+
+
+def sync_sources(conn, sources):
+    """Register ``sources`` and drop the titles of sources no longer configured."""
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO discovery_sources (source) VALUES (?)", [(s,) for s in sources]
+        )
+        placeholders = ",".join("?" * len(sources))
+        conn.execute(f"DELETE FROM discovery_sources WHERE source NOT IN ({placeholders})", sources)
+        conn.execute(f"DELETE FROM discovery_titles WHERE source NOT IN ({placeholders})", sources)
+
+
+def due_sources(conn, now=None):
+    """Return the registered sources whose refresh interval has passed."""
+    now = time.time() if now is None else now
+    due = []
+    for source, last_refresh in conn.execute("SELECT source, last_refresh FROM discovery_sources"):
+        kind, _ = parse_source(source)
+        if last_refresh is None or now - last_refresh >= REFRESH_INTERVALS[kind]:
+            due.append(source)
+    return due
+
+
+def _items(data, default_type=None):
+    """Yield ``(media_type, tmdb_id, name)`` for the movies and shows in a response."""
+    for item in data.get("results") or data.get("items") or data.get("parts") or []:
+        media_type = item.get("media_type", default_type)
+        if media_type in ("movie", "tv") and item.get("id"):
+            yield media_type, item["id"], item.get("title") or item.get("name")
+
+
+def _get_json(url):
+    response = governor.get(url)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_page(conn, source, page, api_url, api_key):
+    """Return ``(items, total_pages)`` for one page of a source."""
+    kind, param = parse_source(source)
+    if kind == "similar":
+        seeds = conn.execute(
+            "SELECT media_type, tmdb_id FROM titles WHERE tmdb_id IS NOT NULL ORDER BY RANDOM() LIMIT ?",
+            (SIMILAR_SEEDS,),
+        ).fetchall()
+        if page > len(seeds):
+            return [], len(seeds)
+        media_type, tmdb_id = seeds[page - 1]
+        data = _get_json(f"{api_url}/{media_type}/{tmdb_id}/recommendations?api_key={api_key}")
+        return list(_items(data, media_type)), len(seeds)
+    if kind == "collection":
+        data = _get_json(f"{api_url}/collection/{param}?api_key={api_key}")
+        return list(_items(data, "movie")), 1
+
+    if kind == "trending":
+        url, default_type = f"{api_url}/trending/all/{param or 'week'}", None
+    elif kind == "popular":
+        url, default_type = f"{api_url}/{param or 'movie'}/popular", param or "movie"
+    else:
+        url, default_type = f"{api_url}/list/{param}", None
+    data = _get_json(f"{url}?api_key={api_key}&page={page}")
+    return list(_items(data, default_type)), data.get("total_pages", 1)
+
+
+def refresh_source(conn, source, api_url, api_key, max_pages=MAX_PAGES, stop_event=None):
+    """Page through a source, storing each page; return the number of titles stored.
+
+    Returns early, keeping the position, when ``stop_event`` is set.
+    """
+    row = conn.execute(
+        "SELECT refresh_started, next_page FROM discovery_sources WHERE source=?", (source,)
+    ).fetchone()
+    started, page = row if row and row[0] else (time.time(), 1)
+    stored = 0
+    while True:
+        if stop_event is not None and stop_event.is_set():
+            return stored
+        items, total_pages = fetch_page(conn, source, page, api_url, api_key)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO discovery_titles VALUES (?, ?, ?, ?, ?)",
+                [(source, media_type, tmdb_id, name, time.time()) for media_type, tmdb_id, name in items if name],
+            )
+            conn.execute(
+                "UPDATE discovery_sources SET refresh_started=?, next_page=? WHERE source=?",
+                (started, page + 1, source),
+            )
+        stored += len(items)
+        if page >= min(total_pages, max_pages):
+            break
+        page += 1
+
+    with conn:
+        conn.execute(
+            "DELETE FROM discovery_titles WHERE source=? AND refreshed_at < ?", (source, started)
+        )
+        conn.execute(
+            "UPDATE discovery_sources SET last_refresh=?, refresh_started=NULL, next_page=1 WHERE source=?",
+            (time.time(), source),
+        )
+    logging.info("Refreshed discovery source %s: %s titles", source, stored)
+    return stored
+
+
+def title_count(conn):
+    """Return the number of discovered titles."""
+    return conn.execute("SELECT COUNT(*) FROM discovery_titles").fetchone()[0]
+
+
+def random_title(conn):
+    """Return a random ``(name, media_type, tmdb_id)`` from the pools, or None.
+
+    Every title is equally likely; refreshes replace rows, so rowids have gaps.
+    """
+    count = title_count(conn)
+    if not count:
+        return None
+    return conn.execute(
+        "SELECT name, media_type, tmdb_id FROM discovery_titles ORDER BY rowid LIMIT 1 OFFSET ?",
+        (random.randrange(count),),
+    ).fetchone()
+
+
+def refresh_due(db_path, sources, api_url, api_key, stop_event=None):
+    """Refresh every configured source that is due and return the titles stored."""
+    valid = []
+    for source in sources:
+        try:
+            parse_source(source)
+            valid.append(source)
+        except ValueError as e:
+            logging.error("%s", e)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        ensure_tables(conn)
+        sync_sources(conn, valid)
+        stored = 0
+        for source in due_sources(conn):
+            try:
+                stored += refresh_source(conn, source, api_url, api_key, stop_event=stop_event)
+            except (ValueError, requests.exceptions.RequestException) as e:
+                logging.error("Error refreshing discovery source %s: %s", source, e)
+        return stored
+    finally:
+        conn.close()
+
+
+def start_refresh(db_path, sources, api_url, api_key):
+    """Refresh the due sources on a background thread.
+
+    Returns the thread and an event that stops it early, or None if a
+    refresh is already running.
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        return None
+    stop_event = threading.Event()
+
+    def worker():
+        try:
+            with governor.priority(BACKGROUND):
+                refresh_due(db_path, sources, api_url, api_key, stop_event)
+        except (ValueError, sqlite3.Error) as e:
+            logging.error("Error refreshing discovery sources: %s", e)
+        finally:
+            _refresh_lock.release()
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread, stop_event
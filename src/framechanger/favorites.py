@@ -0,0 +1,175 @@
+"""Batched edits of many favorites at once, with undo.
+
+The favorites list allows extended selection.  Deleting the selection,
+changing its media type or adding and removing a tag each run as one
+transaction over the selected ``(name, media_type)`` keys, however many
+there are, instead of one connection per title.  Every operation returns
+an :class:`Edit` that records the statements restoring the previous
+state, so :func:`undo` puts it back in another single transaction.
+Undo matches titles by key rather than rowid, since SQLite reuses the
+rowids of deleted rows.
+Tags are free-form labels kept in ``title_tags``; the ``tags`` filter of
+:func:`framechanger.metadata.filter_sql` selects titles by them.
+"""
+
+import collections
+
+from . import title_failures
+
+MAX_TAG_LENGTH = 50
+
+# ``changes`` maps each affected key to its new key, or None if it was deleted
+Edit = collections.namedtuple("Edit", "label changes undo_statements")
+
+
+def ensure_table(conn):
+    """Create the ``title_tags`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS title_tags (
+            name TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (name, media_type, tag)
+        )
+    ''')
+
+
+def tag_names(conn):
+    """Return every tag in use, sorted."""
+    return [row[0] for row in conn.execute("SELECT DISTINCT tag FROM title_tags ORDER BY tag COLLATE NOCASE")]
+
+
+def normalize_tag(tag):
+    """Return a tag with surrounding and repeated whitespace removed."""
+    return " ".join(tag.split())[:MAX_TAG_LENGTH]
+
+
+def _select(conn, keys):
+    """Load ``keys`` into the ``selected_keys`` temporary table for set-based statements."""
+    ensure_table(conn)
+    title_failures.ensure_table(conn)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected_keys (name TEXT NOT NULL, media_type TEXT NOT NULL)")
+    conn.execute("DELETE FROM selected_keys")
+    conn.executemany("INSERT INTO selected_keys (name, media_type) VALUES (?, ?)", keys)
+
+
+SELECTED_TITLES = (
+    "SELECT t.name, t.media_type, t.tmdb_id FROM titles t "
+    "JOIN selected_keys k ON k.name = t.name AND k.media_type = t.media_type"
+)
+
+
+def delete_titles(conn, keys):
+    """Delete the titles ``keys`` with their tags and failures."""
+    with conn:
+        _select(conn, keys)
+        rows = conn.execute(SELECTED_TITLES).fetchall()
+        tags = conn.execute(
+            "SELECT g.name, g.media_type, g.tag FROM title_tags g "
+            "JOIN selected_keys k ON k.name = g.name AND k.media_type = g.media_type"
+        ).fetchall()
+        found = [(name, media_type) for name, media_type, _ in rows]
+        for table in ("titles", "title_tags", "title_failures"):
+            conn.execute(f"DELETE FROM {table} WHERE (name, media_type) IN (SELECT name, media_type FROM selected_keys)")
+    return Edit(
+        f"Delete {len(found)} titles",
+        dict.fromkeys(found),
+        [
+            ("INSERT OR IGNORE INTO titles (name, media_type, tmdb_id) VALUES (?, ?, ?)", rows),
+            ("INSERT OR IGNORE INTO title_tags (name, media_type, tag) VALUES (?, ?, ?)", tags),
+        ],
+    )
+
+
+def change_media_type(conn, keys, media_type):
+    """Move the titles ``keys`` to ``media_type``.
+
+    Titles that already exist under the new type are left alone.  The
+    TMDB id is cleared because it belongs to the old type.
+    """
+    with conn:
+        _select(conn, keys)
+        rows = conn.execute(
+            f"{SELECTED_TITLES} WHERE t.media_type != ? AND NOT EXISTS "
+            "(SELECT 1 FROM titles o WHERE o.name = t.name AND o.media_type = ?)",
+            (media_type, media_type),
+        ).fetchall()
+        moves = [(media_type, name, old_type) for name, old_type, _ in rows]
+        conn.executemany("UPDATE titles SET media_type=?, tmdb_id=NULL WHERE name=? AND media_type=?", moves)
+        conn.executemany("UPDATE OR IGNORE title_tags SET media_type=? WHERE name=? AND media_type=?", moves)
+        conn.executemany("DELETE FROM title_failures WHERE name=? AND media_type=?", [move[1:] for move in moves])
+    return Edit(
+        f"Change {len(rows)} titles to {media_type}",
+        {(name, old_type): (name, media_type) for name, old_type, _ in rows},
+        [
+            ("UPDATE OR IGNORE titles SET media_type=?, tmdb_id=? WHERE name=? AND media_type=?",
+             [(old_type, tmdb_id, name, media_type) for name, old_type, tmdb_id in rows]),
+            ("UPDATE OR IGNORE title_tags SET media_type=? WHERE name=? AND media_type=?",
+             [(old_type, name, new_type) for new_type, name, old_type in moves]),
+        ],
+    )
+
+
+def add_tag(conn, keys, tag):
+    """Tag the titles ``keys`` with ``tag``."""
+    tag = normalize_tag(tag)
+    with conn:
+        _select(conn, keys)
+        added = [
+            (name, media_type) for name, media_type, _ in conn.execute(
+                f"{SELECTED_TITLES} WHERE NOT EXISTS (SELECT 1 FROM title_tags g "
+                "WHERE g.name = t.name AND g.media_type = t.media_type AND g.tag = ?)",
+                (tag,),
+            ).fetchall()
+        ]
+        conn.executemany("INSERT INTO title_tags (name, media_type, tag) VALUES (?, ?, ?)",
+                         [(*key, tag) for key in added])
+    return Edit(
+        f"Tag {len(added)} titles with {tag}",
+        {key: key for key in added},
+        [("DELETE FROM title_tags WHERE name=? AND media_type=? AND tag=?", [(*key, tag) for key in added])],
+    )
+
+
+def remove_tag(conn, keys, tag):
+    """Remove ``tag`` from the titles ``keys``."""
+    with conn:
+        _select(conn, keys)
+        removed = conn.execute(
+            "SELECT g.name, g.media_type FROM title_tags g "
+            "JOIN selected_keys k ON k.name = g.name AND k.media_type = g.media_type WHERE g.tag = ?",
+            (tag,),
+        ).fetchall()
+        conn.executemany("DELETE FROM title_tags WHERE name=? AND media_type=? AND tag=?",
+                         [(*key, tag) for key in removed])
+    return Edit(
+        f"Remove {tag} from {len(removed)} titles",
+        {key: key for key in removed},
+        [("INSERT OR IGNORE INTO title_tags (name, media_type, tag) VALUES (?, ?, ?)",
+          [(*key, tag) for key in removed])],
+    )
+
+
+def _existing(conn, keys):
+    """Return the subset of ``keys`` that are in ``titles``."""
+    _select(conn, keys)
+    return {(name, media_type) for name, media_type, _ in conn.execute(SELECTED_TITLES)}
+
+
+def undo(conn, edit):
+    """Revert ``edit`` in one transaction.
+
+    Returns a mapping of current keys to restored keys for the titles
+    that were put back.  A title whose old key was taken again since the
+    edit, e.g. by adding it anew, is left as it is and not included.
+    """
+    keys = list(edit.changes)
+    with conn:
+        present = _existing(conn, keys)
+        for statement, params in edit.undo_statements:
+            conn.executemany(statement, params)
+        restored = _existing(conn, keys)
+    return {
+        new or old: old for old, new in edit.changes.items()
+        if old in restored and (old == new or old not in present)
+    }
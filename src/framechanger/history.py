@@ -0,0 +1,107 @@
+"""History of applied wallpapers.
+
+Every applied wallpaper gets a row in ``wallpaper_history`` with its
+title, TMDB ``file_path`` (for downloaded backdrops) and local cache
+path.  The entry shown most recently is the current one, so stepping
+to the previous or next entry only touches ``shown_at`` and re-applies
+a cached file without any network access.  Pinned entries keep the
+current wallpaper in place for the auto changer and are never trimmed.
+The recent titles also drive the selector's anti-repeat check.
+"""
+
+import os
+import time
+
+MAX_ENTRIES = 500
+RECENT_TITLES = 5
+
+
+def ensure_table(conn):
+    """Create the ``wallpaper_history`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS wallpaper_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            file_path TEXT,
+            local_path TEXT NOT NULL,
+            applied_at REAL NOT NULL,
+            shown_at REAL NOT NULL,
+            pinned INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_shown ON wallpaper_history(shown_at)")
+
+
+def record(conn, title, local_path, file_path=None, now=None, max_entries=MAX_ENTRIES):
+    """Append an applied wallpaper, trim old unpinned entries and return its id."""
+    now = time.time() if now is None else now
+    with conn:
+        entry_id = conn.execute(
+            "INSERT INTO wallpaper_history (title, file_path, local_path, applied_at, shown_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (title, file_path, local_path, now, now),
+        ).lastrowid
+        conn.execute(
+            "DELETE FROM wallpaper_history WHERE pinned=0 AND id <= ?", (entry_id - max_entries,)
+        )
+    return entry_id
+
+
+def current(conn):
+    """Return the current entry as ``(id, title, local_path, pinned)``, or None."""
+    return conn.execute(
+        "SELECT id, title, local_path, pinned FROM wallpaper_history ORDER BY shown_at DESC, id DESC LIMIT 1"
+    ).fetchone()
+
+
+def step(conn, direction, now=None):
+    """Make the previous (``-1``) or next (``1``) cached entry current and return it.
+
+    Entries whose file is gone are skipped; returns None at either end.
+    """
+    entry = current(conn)
+    if entry is None:
+        return None
+    if direction < 0:
+        query = "SELECT id, title, local_path, pinned FROM wallpaper_history WHERE id < ? ORDER BY id DESC"
+    else:
+        query = "SELECT id, title, local_path, pinned FROM wallpaper_history WHERE id > ? ORDER BY id"
+    for row in conn.execute(query, (entry[0],)):
+        if os.path.exists(row[2]):
+            with conn:
+                conn.execute(
+                    "UPDATE wallpaper_history SET shown_at=? WHERE id=?",
+                    (time.time() if now is None else now, row[0]),
+                )
+            return row
+    return None
+
+
+def replace_path(conn, old_path, new_path, file_path=None):
+    """Point the entries of ``old_path`` at ``new_path``, e.g. after an upgrade."""
+    with conn:
+        conn.execute(
+            "UPDATE wallpaper_history SET local_path=?, file_path=COALESCE(?, file_path) WHERE local_path=?",
+            (new_path, file_path, old_path),
+        )
+
+
+def set_pinned(conn, entry_id, pinned):
+    """Pin or unpin a history entry."""
+    with conn:
+        conn.execute("UPDATE wallpaper_history SET pinned=? WHERE id=?", (int(pinned), entry_id))
+
+
+def cached_images(conn):
+    """Return ``(title, local_path)`` for each distinct image in the history."""
+    return conn.execute(
+        "SELECT title, local_path FROM wallpaper_history GROUP BY local_path ORDER BY MAX(id) DESC"
+    ).fetchall()
+
+
+def recent_titles(conn, limit=RECENT_TITLES):
+    """Return the titles of the last ``limit`` applied wallpapers."""
+    rows = conn.execute(
+        "SELECT title FROM wallpaper_history ORDER BY id DESC LIMIT ?", (limit,)
+    )
+    return {row[0] for row in rows}
@@ -0,0 +1,83 @@
+"""Size cap for the downloaded image cache.
+
+Backdrops are cached under their TMDB file name, and processed
+renditions under ``processed/``, so without a cap the folder grows with
+every backdrop ever shown.  :func:`prune` deletes the least recently
+used files until the folder fits its budget, together with their rows
+in the duplicate index.  A file's last use is the latest of its
+modification time, its access time (set by :func:`touch` when it is
+applied) and its ``last_shown`` time in the index.
+"""
+
+import logging
+import os
+import time
+
+from .metrics import metrics
+
+DEFAULT_MAX_MB = 1024
+
+
+def touch(path):
+    """Mark ``path`` as used now without changing its modification time.
+
+    The modification time is part of the processed rendition's cache key,
+    so only the access time is updated.
+    """
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError as e:
+        logging.debug("Could not touch %s: %s", path, e)
+
+
+def _cached_files(conn, image_dir):
+    """Return ``(last_used, path, size)`` for the files under ``image_dir``."""
+    last_shown = dict(conn.execute(
+        "SELECT local_path, MAX(last_shown) FROM image_hashes WHERE last_shown IS NOT NULL GROUP BY local_path"
+    ))
+    files = []
+    for root, _, names in os.walk(image_dir):
+        for name in names:
+            # Partial downloads are resumed later; leave them alone
+            if name.endswith(".part"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            last_used = max(stat.st_mtime, stat.st_atime, last_shown.get(path) or 0)
+            files.append((last_used, path, stat.st_size))
+    return files
+
+
+def prune(conn, image_dir, max_bytes, keep=()):
+    """Delete the least recently used files until ``image_dir`` holds at most ``max_bytes``.
+
+    Paths in ``keep`` are never deleted.  Returns the number of bytes freed.
+    """
+    files = _cached_files(conn, image_dir)
+    excess = sum(size for _, _, size in files) - max_bytes
+    if excess <= 0:
+        return 0
+    keep = {os.path.abspath(path) for path in keep if path}
+    freed = 0
+    removed = []
+    for _, path, size in sorted(files):
+        if freed >= excess:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning("Could not evict %s from the image cache: %s", path, e)
+            continue
+        freed += size
+        removed.append((path,))
+    with conn:
+        conn.executemany("DELETE FROM image_hashes WHERE local_path=?", removed)
+    metrics.incr("image_cache_evictions_total", len(removed))
+    metrics.incr("image_cache_evicted_bytes_total", freed)
+    logging.info("Evicted %s cached images (%s bytes)", len(removed), freed)
+    return freed
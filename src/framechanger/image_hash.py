@@ -0,0 +1,114 @@
+"""Perceptual hashing and the duplicate index for cached backdrops.
+
+Each downloaded image gets a 64-bit difference hash (dHash) computed
+once and stored in the ``image_hashes`` table next to its TMDB
+``file_path`` and local cache path.  The index lets the downloader
+merge files that are the same still under another ``file_path`` and
+lets the selector skip backdrops that look like a recently shown one.
+Hashing needs Pillow; without it the index simply stays empty.
+"""
+
+import time
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is an optional dependency
+    Image = None
+
+HASH_SIZE = 8
+# Hashes this close are treated as the same file and merged on disk.
+MERGE_DISTANCE = 4
+# Hashes this close to a recently shown image are skipped by the selector.
+DUPLICATE_DISTANCE = 10
+RECENT_COUNT = 20
+
+
+def is_available():
+    """Return True if Pillow is installed and images can be hashed."""
+    return Image is not None
+
+
+def dhash(path, size=HASH_SIZE):
+    """Return the difference hash of the image at ``path`` as an integer."""
+    with Image.open(path) as img:
+        # Let the JPEG decoder downscale while decoding; only a thumbnail
+        # is needed for the hash.
+        img.draft("L", (size * 8, size * 8))
+        small = img.convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    """Return the number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def ensure_table(conn):
+    """Create the ``image_hashes`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_hashes (
+            file_path TEXT PRIMARY KEY,
+            local_path TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            last_shown REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_image_hashes_shown ON image_hashes(last_shown)")
+
+
+def cached_path(conn, file_path):
+    """Return the local path indexed for ``file_path``, if any."""
+    row = conn.execute(
+        "SELECT local_path FROM image_hashes WHERE file_path=?", (file_path,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def find_duplicate(conn, value, max_distance=MERGE_DISTANCE):
+    """Return the local path of an indexed image within ``max_distance`` of ``value``."""
+    best = None
+    for local_path, stored in conn.execute("SELECT local_path, hash FROM image_hashes"):
+        distance = hamming(value, int(stored, 16))
+        if distance <= max_distance and (best is None or distance < best[0]):
+            best = (distance, local_path)
+    return best[1] if best else None
+
+
+def record(conn, file_path, local_path, value):
+    """Store the hash and cache path of ``file_path``."""
+    conn.execute('''
+        INSERT INTO image_hashes (file_path, local_path, hash) VALUES (?, ?, ?)
+        ON CONFLICT(file_path) DO UPDATE SET local_path=excluded.local_path, hash=excluded.hash
+    ''', (file_path, local_path, f"{value:016x}"))
+
+
+def mark_shown(conn, local_path):
+    """Record that the image cached at ``local_path`` was just applied."""
+    conn.execute(
+        "UPDATE image_hashes SET last_shown=? WHERE local_path=?", (time.time(), local_path)
+    )
+
+
+def recent_hashes(conn, limit=RECENT_COUNT):
+    """Return the hashes of the most recently shown images."""
+    rows = conn.execute('''
+        SELECT DISTINCT hash FROM image_hashes WHERE last_shown IS NOT NULL
+        ORDER BY last_shown DESC LIMIT ?
+    ''', (limit,))
+    return [int(row[0], 16) for row in rows]
+
+
+def is_recent_duplicate(conn, file_path, recent, max_distance=DUPLICATE_DISTANCE):
+    """Return True if the known hash of ``file_path`` is close to one of ``recent``.
+
+    ``recent`` comes from :func:`recent_hashes`.  File paths that have
+    never been hashed are not duplicates.
+    """
+    row = conn.execute("SELECT hash FROM image_hashes WHERE file_path=?", (file_path,)).fetchone()
+    return row is not None and any(hamming(int(row[0], 16), shown) <= max_distance for shown in recent)
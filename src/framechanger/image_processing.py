@@ -0,0 +1,170 @@
+"""Post-processing of downloaded backdrops before they are applied.
+
+Images are resized and cropped to the target resolution, optionally
+dimmed, blurred or captioned with the title, and recompressed.  The
+work runs in a :class:`~concurrent.futures.ProcessPoolExecutor` so the
+GUI and the auto changer never wait on it, and every result is cached
+on disk under a key derived from the source file, the target size and
+the operations applied.  Pillow is optional; without it
+:func:`is_available` returns ``False`` and callers apply the original.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont, ImageOps
+except ImportError:  # Pillow is an optional dependency
+    Image = None
+
+DEFAULT_QUALITY = 85
+MAX_WORKERS = 2
+
+_executor = None
+
+
+def is_available():
+    """Return True if Pillow is installed and images can be processed."""
+    return Image is not None
+
+
+# Signature and end marker of the formats TMDB serves
+_SIGNATURES = (
+    (b"\xff\xd8\xff", b"\xff\xd9"),
+    (b"\x89PNG\r\n\x1a\n", b"IEND\xaeB`\x82"),
+)
+
+
+def _has_signature(path):
+    """Return True if ``path`` starts and ends like a complete JPEG or PNG file."""
+    with open(path, "rb") as f:
+        head = f.read(8)
+        f.seek(max(0, os.path.getsize(path) - 16))
+        # Some encoders pad the file after the end marker
+        tail = f.read().rstrip(b"\x00")
+    return any(head.startswith(start) and tail.endswith(end) for start, end in _SIGNATURES)
+
+
+def verify(path):
+    """Return True if ``path`` holds a complete, readable image.
+
+    Without Pillow only the JPEG and PNG signatures and end markers are checked.
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            return False
+        if Image is None:
+            return _has_signature(path)
+        with Image.open(path) as img:
+            img.verify()
+        return True
+    except Exception:
+        return False
+
+
+def build_ops(options, title_name=""):
+    """Build the operations dictionary from the ``processing`` settings."""
+    ops = {"quality": int(options.get("quality", DEFAULT_QUALITY))}
+    if options.get("dim"):
+        ops["dim"] = float(options["dim"])
+    if options.get("blur"):
+        ops["blur"] = float(options["blur"])
+    if options.get("title_overlay") and title_name:
+        ops["title"] = title_name
+    return ops
+
+
+def cache_key(source, target_size, ops):
+    """Return a stable key for ``source`` processed with the given settings."""
+    stat = os.stat(source)
+    payload = json.dumps(
+        [os.path.abspath(source), stat.st_size, stat.st_mtime_ns, list(target_size), ops],
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def processed_path(source, target_size, ops, cache_dir):
+    """Return the cache path of ``source`` processed with the given settings."""
+    return os.path.join(cache_dir, f"{cache_key(source, target_size, ops)}.jpg")
+
+
+def _draw_title(image, title):
+    """Draw ``title`` in the bottom left corner of ``image``."""
+    draw = ImageDraw.Draw(image)
+    size = max(16, image.height // 30)
+    try:
+        font = ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        font = ImageFont.load_default()
+    margin = size
+    left, top, right, bottom = draw.textbbox((0, 0), title, font=font)
+    position = (margin, image.height - margin - (bottom - top))
+    draw.text((position[0] + 2, position[1] + 2), title, font=font, fill=(0, 0, 0))
+    draw.text(position, title, font=font, fill=(255, 255, 255))
+
+
+def process_image(source, destination, target_size, ops):
+    """Resize, crop and recompress ``source`` into ``destination``.
+
+    Runs inside the worker processes, so it only depends on Pillow and
+    the standard library.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.fit(original.convert("RGB"), tuple(target_size), Image.LANCZOS)
+    if ops.get("blur"):
+        image = image.filter(ImageFilter.GaussianBlur(ops["blur"]))
+    if ops.get("dim"):
+        image = ImageEnhance.Brightness(image).enhance(max(0.0, 1.0 - ops["dim"]))
+    if ops.get("title"):
+        _draw_title(image, ops["title"])
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temp_path = f"{destination}.{os.getpid()}.tmp"
+    image.save(
+        temp_path,
+        "JPEG",
+        quality=ops.get("quality", DEFAULT_QUALITY),
+        optimize=True,
+        progressive=True,
+    )
+    os.replace(temp_path, destination)
+    return destination
+
+
+def get_executor():
+    """Return the shared process pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        # Forking a process that runs a Qt event loop is unsafe, so the
+        # workers are always spawned fresh.
+        context = multiprocessing.get_context("spawn")
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=context)
+    return _executor
+
+
+def submit(source, target_size, ops, cache_dir):
+    """Schedule processing of ``source`` and return a future for the result.
+
+    The future resolves to the processed file path.  Cached results are
+    returned as an already completed future without touching the pool.
+    """
+    destination = processed_path(source, target_size, ops, cache_dir)
+    if os.path.exists(destination):
+        future = Future()
+        future.set_result(destination)
+        return future
+    logging.debug("Processing %s to %sx%s", source, target_size[0], target_size[1])
+    return get_executor().submit(process_image, source, destination, target_size, ops)
+
+
+def shutdown():
+    """Shut down the process pool if it was started."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,264 @@
+"""Bulk import and export of the favorites list.
+
+Supported formats are FrameChanger's own CSV and JSON files, Letterboxd
+CSV exports, IMDb list/ratings CSV exports, Trakt JSON exports and TMDB
+lists fetched by id.  Files are parsed as a stream and written to the
+``titles`` table with batched ``executemany`` calls inside a single
+transaction, so even very large watch histories import quickly.
+Titles imported without a TMDB id are resolved afterwards by
+``resolve`` jobs in the durable queue of :mod:`framechanger.jobs`.
+"""
+
+import csv
+import itertools
+import json
+import sqlite3
+import time
+
+from . import wallpaper_changer
+from .rate_limit import governor
+
+FORMATS = ("csv", "json", "letterboxd", "imdb", "trakt")
+RESOLVE_JOB = "resolve"
+BATCH_SIZE = 1000
+MAX_TITLE_LENGTH = 100
+# " | " separates name and type in the favorites list
+INVALID_TITLE_CHARS = '<>:"/\\|?*'
+
+
+def detect_format(path):
+    """Guess the format of an export file from its extension and header."""
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if path.lower().endswith(".json"):
+            head = file.read(4096)
+            return "trakt" if '"ids"' in head or '"show"' in head or '"movie":' in head else "json"
+        header = next(csv.reader(file), [])
+    if "Letterboxd URI" in header or "tmdbID" in header:
+        return "letterboxd"
+    if "Const" in header and "Title Type" in header:
+        return "imdb"
+    return "csv"
+
+
+def _iter_json_array(file, chunk_size=65536):
+    """Yield the elements of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started:
+                if position >= len(buffer):
+                    break
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if not chunk:
+                    raise
+                break
+            yield item
+        buffer = buffer[position:]
+        if not chunk:
+            return
+
+
+def _parse_id(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _imdb_media_type(title_type):
+    """Map an IMDb title type to ``movie``/``tv``, or None to skip it."""
+    title_type = title_type.lower().replace(" ", "")
+    if "episode" in title_type or "game" in title_type:
+        return None
+    if "series" in title_type or (title_type.startswith("tv") and "movie" not in title_type):
+        return "tv"
+    return "movie"
+
+
+def parse_file(path, fmt=None):
+    """Yield ``(name, media_type, tmdb_id)`` tuples from an export file."""
+    fmt = fmt or detect_format(path)
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if fmt == "json":
+            for item in _iter_json_array(file):
+                yield item.get("name"), item.get("media_type", "movie"), _parse_id(item.get("tmdb_id"))
+        elif fmt == "trakt":
+            for item in _iter_json_array(file):
+                kind = item.get("type") or ("show" if "show" in item else "movie")
+                media = item.get(kind) or {}
+                yield (
+                    media.get("title"),
+                    "tv" if kind == "show" else "movie",
+                    _parse_id((media.get("ids") or {}).get("tmdb")),
+                )
+        elif fmt == "letterboxd":
+            for row in csv.DictReader(file):
+                yield row.get("Name") or row.get("Title"), "movie", _parse_id(row.get("tmdbID"))
+        elif fmt == "imdb":
+            for row in csv.DictReader(file):
+                media_type = _imdb_media_type(row.get("Title Type", ""))
+                if media_type:
+                    yield row.get("Title"), media_type, None
+        elif fmt == "csv":
+            for row in csv.DictReader(file):
+                yield row.get("name"), row.get("media_type", "movie"), _parse_id(row.get("tmdb_id"))
+        else:
+            raise ValueError(f"Unknown import format: {fmt}")
+
+
+def fetch_tmdb_list(list_id, api_key):
+    """Yield ``(name, media_type, tmdb_id)`` for every item of a TMDB list."""
+    page = 1
+    while True:
+        url = f"{wallpaper_changer.TMDB_API_URL}/list/{list_id}?api_key={api_key}&page={page}"
+        response = governor.get(url)
+        response.raise_for_status()
+        data = response.json()
+        for item in data.get("items", []):
+            media_type = item.get("media_type", "movie")
+            if media_type in ("movie", "tv"):
+                yield item.get("title") or item.get("name"), media_type, item.get("id")
+        if page >= data.get("total_pages", 1):
+            return
+        page += 1
+
+
+def title_error(name):
+    """Return why ``name`` cannot be a favorite's title, or None if it can."""
+    if not name:
+        return "Title cannot be empty."
+    if len(name) > MAX_TITLE_LENGTH:
+        return "Title is too long."
+    if any(char in name for char in INVALID_TITLE_CHARS):
+        return "Title contains invalid characters."
+    return None
+
+
+def safe_title(name):
+    """Return ``name`` with the characters :func:`title_error` rejects replaced.
+
+    ``Mission: Impossible`` becomes ``Mission - Impossible``.
+    """
+    name = name.replace(": ", " - ")
+    return " ".join("".join(" " if char in INVALID_TITLE_CHARS else char for char in name).split())
+
+
+def _clean(rows, skipped):
+    for name, media_type, tmdb_id in rows:
+        name = (name or "").strip()
+        media_type = (media_type or "").strip().lower()
+        if title_error(name) or media_type not in ("movie", "tv"):
+            skipped[0] += 1
+            continue
+        yield name, media_type, tmdb_id
+
+
+def import_titles(conn, rows, batch_size=BATCH_SIZE):
+    """Insert ``rows`` into ``titles`` in one transaction.
+
+    Existing titles are kept; a TMDB id from the import fills in a
+    missing one.  Rows that :func:`title_error` rejects or with an
+    unknown media type are skipped.  Returns ``(added, skipped)``.
+    """
+    added = 0
+    skipped = [0]
+    rows = _clean(rows, skipped)
+    with conn:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO titles (name, media_type, tmdb_id) VALUES (?, ?, ?)", batch
+            )
+            added += cursor.rowcount
+            conn.executemany(
+                "UPDATE titles SET tmdb_id=? WHERE name=? AND media_type=? AND tmdb_id IS NULL",
+                [(tmdb_id, name, media_type) for name, media_type, tmdb_id in batch if tmdb_id],
+            )
+    return added, skipped[0]
+
+
+def export_titles(conn, path, fmt="csv"):
+    """Write every title to ``path`` in ``fmt`` and return the number written."""
+    rows = conn.execute("SELECT name, media_type, tmdb_id FROM titles ORDER BY name")
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if fmt in ("json", "trakt"):
+            file.write("[\n")
+            for name, media_type, tmdb_id in rows:
+                if fmt == "json":
+                    item = {"name": name, "media_type": media_type, "tmdb_id": tmdb_id}
+                else:
+                    kind = "show" if media_type == "tv" else "movie"
+                    item = {"type": kind, kind: {"title": name, "ids": {"tmdb": tmdb_id}}}
+                file.write(("," if count else "") + json.dumps(item) + "\n")
+                count += 1
+            file.write("]\n")
+            return count
+
+        writer = csv.writer(file)
+        if fmt == "csv":
+            writer.writerow(["name", "media_type", "tmdb_id"])
+            for name, media_type, tmdb_id in rows:
+                writer.writerow([name, media_type, tmdb_id or ""])
+                count += 1
+        elif fmt == "letterboxd":
+            # Letterboxd only tracks films
+            writer.writerow(["Title", "tmdbID"])
+            for name, media_type, tmdb_id in rows:
+                if media_type == "movie":
+                    writer.writerow([name, tmdb_id or ""])
+                    count += 1
+        elif fmt == "imdb":
+            writer.writerow(["Const", "Title", "Title Type"])
+            for name, media_type, tmdb_id in rows:
+                writer.writerow(["", name, "TV Series" if media_type == "tv" else "Movie"])
+                count += 1
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+    return count
+
+
+def resolve_jobs(conn):
+    """Return ``(key, payload)`` resolve jobs for the titles without a TMDB id."""
+    rows = conn.execute("SELECT name, media_type FROM titles WHERE tmdb_id IS NULL").fetchall()
+    return [
+        (f"{RESOLVE_JOB}:{media_type}:{name}", {"name": name, "media_type": media_type})
+        for name, media_type in rows
+    ]
+
+
+def resolve_title(payload):
+    """Look up and store the TMDB id of one title; runs ``resolve`` jobs."""
+    api_key = wallpaper_changer.load_settings().get("api_key")
+    if not api_key:
+        raise ValueError("No TMDB API key")
+    started = time.time()
+    media_id = wallpaper_changer.fetch_media_info(payload["name"], payload["media_type"], api_key)
+    if not media_id:
+        # Titles without a match are left to the negative cache; anything else is retried
+        if not wallpaper_changer.failed_since(payload["name"], payload["media_type"], started):
+            raise RuntimeError(f"Could not look up {payload['name']}")
+        return
+    with sqlite3.connect(wallpaper_changer.DATABASE_NAME, timeout=30) as conn:
+        conn.execute(
+            "UPDATE titles SET tmdb_id=? WHERE name=? AND media_type=?",
+            (media_id, payload["name"], payload["media_type"]),
+        )
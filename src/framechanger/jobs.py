@@ -0,0 +1,322 @@
+"""Durable queue for background work.
+
+Long-running work such as resolving imported titles or prefetching
+wallpapers is stored as jobs in the ``jobs`` table of ``titles.db``
+instead of in memory, so it survives a restart or a crash.  Each job
+has a kind, a JSON payload, a priority (the levels of
+:mod:`framechanger.rate_limit`, lower runs first) and an optional key:
+enqueueing a key that is already queued, running or recently done adds
+nothing, so the same title is never resolved or downloaded twice.
+
+A :class:`JobQueue` runs a small pool of worker threads.  A worker
+claims a job by taking a lease.  Jobs left running when the app quit or
+crashed are queued again on the next start, and a job whose worker
+hangs past its lease is picked up by another worker.  Failed jobs are retried
+with exponential backoff until they run out of attempts.  A handler that
+cannot run yet raises :class:`Deferred` to be tried again later without
+using up an attempt.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from .metrics import metrics
+from .rate_limit import BACKGROUND, governor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_ATTEMPTS = 5
+LEASE = 300
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 6 * 3600
+# Finished jobs are kept this long so their keys keep deduplicating
+RETENTION = 7 * 24 * 3600
+POLL_INTERVAL = 5.0
+WORKERS = 2
+DEFER_DELAY = 60
+
+
+class Deferred(Exception):
+    """Raised by a handler whose job should run again after ``delay`` seconds."""
+
+    def __init__(self, reason, delay=DEFER_DELAY):
+        super().__init__(reason)
+        self.delay = delay
+
+
+def ensure_table(conn):
+    """Create the ``jobs`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'queued',
+            priority INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            run_after REAL NOT NULL,
+            lease_until REAL,
+            worker TEXT,
+            last_error TEXT,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(state, priority, run_after)")
+
+
+def enqueue(conn, kind, payload, key=None, priority=BACKGROUND, max_attempts=MAX_ATTEMPTS, now=None):
+    """Add a job and return True, or return False if ``key`` is already pending or done.
+
+    A failed job with the same key is queued again with fresh attempts,
+    and a pending one is raised to ``priority`` if that is more urgent.
+    """
+    now = time.time() if now is None else now
+    with conn:
+        existing = None
+        if key is not None:
+            existing = conn.execute("SELECT id, state, priority FROM jobs WHERE key=?", (key,)).fetchone()
+        if existing is None:
+            conn.execute(
+                "INSERT INTO jobs (key, kind, payload, priority, max_attempts, run_after, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload), priority, max_attempts, now, now),
+            )
+            return True
+        job_id, state, current = existing
+        if state == FAILED:
+            conn.execute(
+                "UPDATE jobs SET state=?, attempts=0, priority=?, run_after=?, last_error=NULL, updated_at=? "
+                "WHERE id=?",
+                (QUEUED, priority, now, now, job_id),
+            )
+            return True
+        if state != DONE and priority < current:
+            conn.execute("UPDATE jobs SET priority=? WHERE id=?", (priority, job_id))
+    metrics.incr("jobs_deduplicated_total", kind=kind)
+    return False
+
+
+def claim(conn, worker, lease=LEASE, now=None):
+    """Lease the most urgent ready job to ``worker``.
+
+    Returns ``(id, kind, payload, priority, attempts)``, or None if
+    nothing is ready.  Running jobs whose lease has expired are ready again.
+    """
+    now = time.time() if now is None else now
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT id, kind, payload, priority, attempts FROM jobs "
+            "WHERE (state=? AND run_after<=?) OR (state=? AND lease_until<?) "
+            "ORDER BY priority, id LIMIT 1",
+            (QUEUED, now, RUNNING, now),
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET state=?, attempts=attempts+1, lease_until=?, worker=?, updated_at=? WHERE id=?",
+                (RUNNING, now + lease, worker, now, row[0]),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+    return row[0], row[1], json.loads(row[2]), row[3], row[4] + 1
+
+
+def complete(conn, job_id, now=None):
+    """Mark a job as done."""
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET state=?, lease_until=NULL, worker=NULL, last_error=NULL, updated_at=? WHERE id=?",
+            (DONE, now, job_id),
+        )
+
+
+def retry_delay(attempts):
+    """Return the delay before retrying a job that failed ``attempts`` times."""
+    return min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def fail(conn, job_id, error, now=None):
+    """Record a failed attempt; retry later or give up after the last attempt."""
+    now = time.time() if now is None else now
+    with conn:
+        attempts, max_attempts = conn.execute(
+            "SELECT attempts, max_attempts FROM jobs WHERE id=?", (job_id,)
+        ).fetchone()
+        state = FAILED if attempts >= max_attempts else QUEUED
+        conn.execute(
+            "UPDATE jobs SET state=?, run_after=?, lease_until=NULL, worker=NULL, last_error=?, updated_at=? "
+            "WHERE id=?",
+            (state, now + retry_delay(attempts), str(error), now, job_id),
+        )
+    return state
+
+
+def defer(conn, job_id, reason, delay=DEFER_DELAY, now=None):
+    """Queue a job again after ``delay`` without counting the attempt."""
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET state=?, attempts=MAX(attempts-1, 0), run_after=?, lease_until=NULL, worker=NULL, "
+            "last_error=?, updated_at=? WHERE id=?",
+            (QUEUED, now + delay, str(reason), now, job_id),
+        )
+
+
+def recover(conn, now=None):
+    """Queue the jobs left running by a process that exited, and return their number.
+
+    Only call this when no other queue is working on the database.
+    """
+    now = time.time() if now is None else now
+    with conn:
+        return conn.execute(
+            "UPDATE jobs SET state=?, run_after=?, lease_until=NULL, worker=NULL, updated_at=? WHERE state=?",
+            (QUEUED, now, now, RUNNING),
+        ).rowcount
+
+
+def purge(conn, retention=RETENTION, now=None):
+    """Delete finished jobs older than ``retention`` seconds."""
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute(
+            "DELETE FROM jobs WHERE state IN (?, ?) AND updated_at < ?", (DONE, FAILED, now - retention)
+        )
+
+
+def counts(conn):
+    """Return the number of jobs in each state."""
+    return dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+
+
+class JobQueue:
+    """Pool of worker threads draining the ``jobs`` table.
+
+    ``handlers`` maps a job kind to a function taking the payload.  An
+    exception from a handler counts as a failed attempt.
+    """
+
+    def __init__(self, db_path, handlers, workers=WORKERS, lease=LEASE):
+        self.db_path = db_path
+        self.handlers = handlers
+        self.workers = workers
+        self.lease = lease
+        self.name = uuid.uuid4().hex
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._threads = []
+
+    def start(self):
+        """Resume the jobs of an earlier run and start the workers."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            ensure_table(conn)
+            purge(conn)
+            resumed = recover(conn)
+        if resumed:
+            logging.info("Resuming %s interrupted jobs", resumed)
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{self.name}-{index}",), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, kind, payload, key=None, priority=BACKGROUND):
+        """Enqueue a job and wake a worker; return False for a duplicate."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            ensure_table(conn)
+            added = enqueue(conn, kind, payload, key, priority)
+        if added:
+            with self._wake:
+                self._wake.notify()
+        return added
+
+    def submit_many(self, kind, jobs, priority=BACKGROUND):
+        """Enqueue ``(key, payload)`` pairs in one transaction and return the number added."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            ensure_table(conn)
+            added = sum(enqueue(conn, kind, payload, key, priority) for key, payload in jobs)
+        if added:
+            with self._wake:
+                self._wake.notify_all()
+        return added
+
+    def counts(self):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            ensure_table(conn)
+            return counts(conn)
+
+    def pause(self):
+        """Stop claiming new jobs; running ones finish."""
+        self._running.clear()
+
+    def resume(self):
+        """Claim jobs again after :meth:`pause`."""
+        if not self._running.is_set():
+            self._running.set()
+            with self._wake:
+                self._wake.notify_all()
+
+    def paused(self):
+        return not self._running.is_set()
+
+    def stop(self, timeout=10):
+        """Stop the workers once their current job has finished."""
+        self._stop.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self, worker):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            while not self._stop.is_set():
+                try:
+                    job = claim(conn, worker, self.lease) if self._running.is_set() else None
+                    if job is not None:
+                        self._run(conn, *job)
+                except sqlite3.Error as e:
+                    logging.error("Job queue error: %s", e)
+                    job = None
+                if job is None:
+                    with self._wake:
+                        if not self._stop.is_set():
+                            self._wake.wait(POLL_INTERVAL)
+        finally:
+            conn.close()
+
+    def _run(self, conn, job_id, kind, payload, priority, attempts):
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {kind}")
+            with governor.priority(priority):
+                handler(payload)
+        except Deferred as e:
+            defer(conn, job_id, e, e.delay)
+            metrics.incr("jobs_deferred_total", kind=kind)
+            logging.debug("Job %s (%s) deferred: %s", job_id, kind, e)
+        except Exception as e:
+            state = fail(conn, job_id, e)
+            metrics.incr("jobs_failed_total" if state == FAILED else "jobs_retried_total", kind=kind)
+            logging.warning("Job %s (%s) failed on attempt %s: %s", job_id, kind, attempts, e)
+        else:
+            complete(conn, job_id)
+            metrics.incr("jobs_done_total", kind=kind)
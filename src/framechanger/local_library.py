@@ -0,0 +1,209 @@
+"""Index of local image folders used as additional wallpaper sources.
+
+Folders registered by the user (local directories or mounted NAS
+shares) are scanned into the ``local_images`` table with each file's
+size, modification time, dimensions and perceptual hash.  Rescans are
+incremental: only files whose size or mtime changed are opened again,
+and files that disappeared are dropped, so large shares are cheap to
+keep fresh.  Scans run on background threads with their own SQLite
+connection.
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from . import image_hash
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is an optional dependency
+    Image = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+BATCH_SIZE = 1000
+
+_scanning = set()
+_scanning_lock = threading.Lock()
+
+
+def ensure_tables(conn):
+    """Create the local library tables if they do not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS local_folders (
+            path TEXT PRIMARY KEY,
+            last_scan REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS local_images (
+            path TEXT PRIMARY KEY,
+            folder TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            hash TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_local_images_folder ON local_images(folder)")
+
+
+def add_folder(conn, path):
+    """Register ``path`` as a wallpaper source."""
+    conn.execute("INSERT OR IGNORE INTO local_folders (path) VALUES (?)", (os.path.abspath(path),))
+    conn.commit()
+
+
+def remove_folder(conn, path):
+    """Unregister ``path`` and forget its indexed images."""
+    conn.execute("DELETE FROM local_images WHERE folder=?", (path,))
+    conn.execute("DELETE FROM local_folders WHERE path=?", (path,))
+    conn.commit()
+
+
+def list_folders(conn):
+    """Return the registered folders."""
+    return [row[0] for row in conn.execute("SELECT path FROM local_folders ORDER BY path")]
+
+
+def _walk_images(folder):
+    """Yield ``(path, size, mtime)`` for every image below ``folder``."""
+    pending = [folder]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                            stat = entry.stat()
+                            yield entry.path, stat.st_size, stat.st_mtime
+                    except OSError as e:
+                        logging.debug("Skipping %s: %s", entry.path, e)
+        except OSError as e:
+            logging.error("Error scanning %s: %s", directory, e)
+
+
+def _describe(path):
+    """Return ``(width, height, hash)`` for the image at ``path``."""
+    if Image is None:
+        return None, None, None
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+        return width, height, f"{image_hash.dhash(path):016x}"
+    except Exception as e:
+        logging.debug("Could not read %s: %s", path, e)
+        return None, None, None
+
+
+def scan_folder(conn, folder):
+    """Incrementally rescan ``folder`` and return ``(added, updated, removed)``.
+
+    Files are only opened when they are new or their size or mtime
+    changed since the last scan.  A folder that cannot be reached (for
+    example an unmounted share) is left untouched.
+    """
+    if not os.path.isdir(folder):
+        logging.error("Local folder not available: %s", folder)
+        return 0, 0, 0
+
+    known = {
+        path: (size, mtime)
+        for path, size, mtime in conn.execute(
+            "SELECT path, size, mtime FROM local_images WHERE folder=?", (folder,)
+        )
+    }
+    added = updated = 0
+    batch = []
+    for path, size, mtime in _walk_images(folder):
+        previous = known.pop(path, None)
+        if previous == (size, mtime):
+            continue
+        if previous is None:
+            added += 1
+        else:
+            updated += 1
+        batch.append((path, folder, size, mtime) + _describe(path))
+        if len(batch) >= BATCH_SIZE:
+            _store(conn, batch)
+            batch = []
+    _store(conn, batch)
+
+    removed = list(known)
+    conn.executemany("DELETE FROM local_images WHERE path=?", ((path,) for path in removed))
+    conn.execute("UPDATE local_folders SET last_scan=? WHERE path=?", (time.time(), folder))
+    conn.commit()
+    logging.info("Scanned %s: %s added, %s updated, %s removed", folder, added, updated, len(removed))
+    return added, updated, len(removed)
+
+
+def _store(conn, batch):
+    """Write a batch of scanned images in a single transaction."""
+    if not batch:
+        return
+    conn.executemany('''
+        INSERT OR REPLACE INTO local_images (path, folder, size, mtime, width, height, hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', batch)
+    conn.commit()
+
+
+def image_count(conn):
+    """Return the number of indexed local images."""
+    return conn.execute("SELECT COUNT(*) FROM local_images").fetchone()[0]
+
+
+def random_image(conn):
+    """Return the path of a random indexed image, or None if there are none.
+
+    Every image is equally likely, even when rescans and removed folders
+    have left gaps in the rowids.
+    """
+    count = image_count(conn)
+    if not count:
+        return None
+    row = conn.execute(
+        "SELECT path FROM local_images ORDER BY rowid LIMIT 1 OFFSET ?",
+        (random.randrange(count),),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _scan_worker(db_path, folders):
+    """Scan ``folders`` on a background thread."""
+    try:
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            ensure_tables(conn)
+            for folder in folders or list_folders(conn):
+                scan_folder(conn, folder)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+    finally:
+        with _scanning_lock:
+            _scanning.difference_update(folders or [None])
+
+
+def start_scan(db_path, folders=None):
+    """Rescan ``folders`` (all registered folders by default) in the background.
+
+    Returns the started thread, or None if the same scan is already
+    running.
+    """
+    key = tuple(folders) if folders else (None,)
+    with _scanning_lock:
+        if _scanning.intersection(key):
+            return None
+        _scanning.update(key)
+    thread = threading.Thread(target=_scan_worker, args=(db_path, list(folders or [])), daemon=True)
+    thread.start()
+    return thread
@@ -1,18 +1,91 @@
+import atexit
+import gzip
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
 
 LOG_FILE = os.path.join(os.path.expanduser("~"), "framechanger.log")
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
 
+_listener = None
+_queue_handler = None
 
-def configure_logging():
-    """Configure application-wide logging."""
-    if not logging.getLogger().handlers:
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler(LOG_FILE, encoding="utf-8"),
-                logging.StreamHandler(),
-            ],
+
+def _gzip_namer(name):
+    """Name rotated log files with a ``.gz`` suffix."""
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source, destination):
+    """Compress a rotated log file and remove the original."""
+    with open(source, "rb") as f_in, gzip.open(destination, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def log_options(settings):
+    """Return the :func:`configure_logging` arguments stored in ``settings``."""
+    return {
+        "level": getattr(logging, str(settings.get("log_level", "INFO")).upper(), logging.INFO),
+        "max_bytes": int(settings.get("log_max_bytes", MAX_BYTES)),
+        "backup_count": int(settings.get("log_backup_count", BACKUP_COUNT)),
+        "when": settings.get("log_rotate_when"),
+    }
+
+
+def configure_logging(level=logging.INFO, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, when=None):
+    """Configure application-wide logging.
+
+    Records are put on a queue by the calling thread and written by a
+    :class:`~logging.handlers.QueueListener` thread, so file I/O never
+    happens on the GUI or download paths.  The log file rotates by size,
+    or by time when ``when`` is given (e.g. ``"midnight"``), and rotated
+    files are gzip-compressed.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    if when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE, when=when, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
         )
+    file_handler.namer = _gzip_namer
+    file_handler.rotator = _gzip_rotator
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    atexit.register(stop_logging)
+
 
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,159 @@
+"""Local mirror of TMDB title details.
+
+The year, runtime, rating, popularity and original language of every
+favorite with a TMDB id are kept in ``title_metadata`` and its genres in
+``genres``/``title_genres``, all keyed by ``(media_type, tmdb_id)`` and
+indexed for filtering.  Details are fetched once by ``metadata`` jobs in
+the background queue and refreshed when they are a month old, so the
+favorites view and the random selector filter and weight titles with
+plain SQL instead of API calls.
+"""
+
+import math
+import time
+
+from .rate_limit import governor
+
+REFRESH_AGE = 30 * 24 * 3600
+DEFAULT_RATING = 5.0
+MIN_WEIGHT = 0.1
+WEIGHTS = ("rating", "popularity")
+# Joins the details of titles ``t`` as ``m``; titles without details get NULLs.
+JOIN = "LEFT JOIN title_metadata m ON m.media_type = t.media_type AND m.tmdb_id = t.tmdb_id"
+
+
+def ensure_tables(conn):
+    """Create the metadata tables and their indexes if they do not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS title_metadata (
+            media_type TEXT NOT NULL,
+            tmdb_id INTEGER NOT NULL,
+            year INTEGER,
+            runtime INTEGER,
+            rating REAL,
+            votes INTEGER,
+            popularity REAL,
+            language TEXT,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (media_type, tmdb_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS genres (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS title_genres (
+            media_type TEXT NOT NULL,
+            tmdb_id INTEGER NOT NULL,
+            genre_id INTEGER NOT NULL,
+            PRIMARY KEY (media_type, tmdb_id, genre_id)
+        )
+    ''')
+    for column in ("year", "rating", "popularity", "language"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_metadata_{column} ON title_metadata({column})")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_title_genres_genre ON title_genres(genre_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_titles_tmdb ON titles(media_type, tmdb_id)")
+
+
+def parse_details(data):
+    """Return the mirrored fields of a TMDB movie or TV details response."""
+    date = data.get("release_date") or data.get("first_air_date") or ""
+    runtimes = data.get("episode_run_time") or []
+    return {
+        "year": int(date[:4]) if date[:4].isdigit() else None,
+        "runtime": data.get("runtime") or (runtimes[0] if runtimes else None),
+        "rating": data.get("vote_average"),
+        "votes": data.get("vote_count"),
+        "popularity": data.get("popularity"),
+        "language": data.get("original_language"),
+        "genres": [(genre["id"], genre["name"]) for genre in data.get("genres", [])],
+    }
+
+
+def fetch_details(media_type, tmdb_id, api_url, api_key):
+    """Fetch and parse the TMDB details of a title."""
+    response = governor.get(f"{api_url}/{media_type}/{tmdb_id}?api_key={api_key}")
+    response.raise_for_status()
+    return parse_details(response.json())
+
+
+def store(conn, media_type, tmdb_id, details, now=None):
+    """Replace the mirrored details of a title."""
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO title_metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (media_type, tmdb_id, details["year"], details["runtime"], details["rating"],
+             details["votes"], details["popularity"], details["language"], now),
+        )
+        conn.executemany("INSERT OR REPLACE INTO genres (id, name) VALUES (?, ?)", details["genres"])
+        conn.execute("DELETE FROM title_genres WHERE media_type=? AND tmdb_id=?", (media_type, tmdb_id))
+        conn.executemany(
+            "INSERT OR IGNORE INTO title_genres VALUES (?, ?, ?)",
+            [(media_type, tmdb_id, genre_id) for genre_id, _ in details["genres"]],
+        )
+
+
+def stale_titles(conn, max_age=REFRESH_AGE, now=None):
+    """Return ``(media_type, tmdb_id)`` of favorites with missing or old details."""
+    now = time.time() if now is None else now
+    return conn.execute(
+        f"SELECT DISTINCT t.media_type, t.tmdb_id FROM titles t {JOIN} "
+        "WHERE t.tmdb_id IS NOT NULL AND (m.fetched_at IS NULL OR m.fetched_at < ?)",
+        (now - max_age,),
+    ).fetchall()
+
+
+def genre_names(conn):
+    """Return the names of the genres of the favorites, sorted."""
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT n.name FROM genres n JOIN title_genres g ON g.genre_id = n.id ORDER BY n.name"
+    )]
+
+
+def filter_sql(filters):
+    """Return ``(conditions, params)`` restricting titles ``t`` joined by :data:`JOIN`.
+
+    ``filters`` may hold ``genres`` (any of the names), ``tags`` (any of
+    the user's tags), ``year_min``, ``year_max``, ``rating_min``,
+    ``runtime_max`` and ``language``.
+    """
+    conditions, params = [], []
+    for key, condition in (
+        ("year_min", "m.year >= ?"),
+        ("year_max", "m.year <= ?"),
+        ("rating_min", "m.rating >= ?"),
+        ("runtime_max", "m.runtime <= ?"),
+        ("language", "m.language = ?"),
+    ):
+        if filters.get(key) is not None:
+            conditions.append(condition)
+            params.append(filters[key])
+    genres = filters.get("genres")
+    if genres:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM title_genres g JOIN genres n ON n.id = g.genre_id "
+            "WHERE g.media_type = t.media_type AND g.tmdb_id = t.tmdb_id "
+            f"AND n.name IN ({','.join('?' * len(genres))}))"
+        )
+        params.extend(genres)
+    tags = filters.get("tags")
+    if tags:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM title_tags g WHERE g.name = t.name AND g.media_type = t.media_type "
+            f"AND g.tag IN ({','.join('?' * len(tags))}))"
+        )
+        params.extend(tags)
+    return conditions, params
+
+
+def weight(rating, popularity, weight_by=None):
+    """Return the selection weight of a title from its rating or popularity."""
+    if weight_by == "rating":
+        return max(MIN_WEIGHT, DEFAULT_RATING if rating is None else rating)
+    if weight_by == "popularity":
+        return max(MIN_WEIGHT, math.log1p(popularity or 0))
+    return 1.0
@@ -0,0 +1,281 @@
+"""In-process metrics and tracing for the wallpaper change pipeline.
+
+Every stage of a change (``fetch_media_info``, ``fetch_backdrop_image``,
+``save_image``, ``set_wallpaper`` and the change as a whole) is wrapped
+in a timing span.  Spans feed rolling histograms with p50/p95/p99 and
+nest into traces, so a slow change can be broken down by stage.
+Counters track cache hits and misses, downloaded bytes, retries and
+failures, and gauges hold current values such as the request
+budget.  :data:`metrics` is the process-wide registry; it can be dumped
+as JSON or served in the Prometheus text format by
+:func:`start_server` on a local port.
+"""
+
+import collections
+import functools
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+WINDOW = 1024
+TRACE_COUNT = 50
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = "framechanger_"
+
+
+class Histogram:
+    """Rolling window of observations with lifetime count and sum."""
+
+    def __init__(self, window=WINDOW):
+        self.values = collections.deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q):
+        """Return the ``q`` quantile of the rolling window."""
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        result = {"count": self.count, "sum": self.sum}
+        result.update({f"p{int(q * 100)}": self.percentile(q) for q in QUANTILES})
+        return result
+
+
+class Span:
+    """A timed stage of a trace, used through :meth:`Metrics.span`."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.failed = False
+        self.start = time.time()
+        self.duration = 0.0
+        self.children = []
+
+    def fail(self):
+        """Mark the stage as failed without raising."""
+        self.failed = True
+
+    def as_dict(self):
+        return {
+            "stage": self.stage,
+            "start": self.start,
+            "duration": self.duration,
+            "status": "error" if self.failed else "ok",
+            "children": [child.as_dict() for child in self.children],
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    """Registry of counters, histograms and recent traces."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Forget every recorded value."""
+        with self._lock:
+            self.counters = collections.defaultdict(float)
+            self.gauges = {}
+            self.histograms = collections.defaultdict(Histogram)
+            self.traces = collections.deque(maxlen=TRACE_COUNT)
+
+    def incr(self, name, value=1, **labels):
+        """Add ``value`` to the counter ``name``."""
+        with self._lock:
+            self.counters[_key(name, labels)] += value
+
+    def gauge(self, name, value, **labels):
+        """Set the gauge ``name`` to ``value``."""
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Record ``value`` in the histogram ``name``."""
+        with self._lock:
+            self.histograms[_key(name, labels)].observe(value)
+
+    def span(self, stage):
+        """Return a context manager timing ``stage``."""
+        return _SpanContext(self, stage)
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _finish(self, span):
+        self.observe("stage_seconds", span.duration, stage=span.stage)
+        self.incr("stage_total", stage=span.stage)
+        if span.failed:
+            self.incr("stage_failures_total", stage=span.stage)
+        logging.debug(
+            "span stage=%s duration_ms=%.1f status=%s",
+            span.stage, span.duration * 1000, "error" if span.failed else "ok",
+        )
+
+    def snapshot(self):
+        """Return every metric and the recent traces as plain data."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            gauges = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.gauges.items())
+            ]
+            histograms = [
+                dict({"name": name, "labels": dict(labels)}, **histogram.summary())
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+            traces = [trace.as_dict() for trace in self.traces]
+        return {"counters": counters, "gauges": gauges, "histograms": histograms, "traces": traces}
+
+    def to_json(self):
+        """Return :meth:`snapshot` as a JSON document."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def dump(self, path):
+        """Write :meth:`to_json` to ``path``."""
+        with open(path, "w") as file:
+            file.write(self.to_json())
+
+    def to_prometheus(self):
+        """Return the counters and histograms in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {PREFIX}{name} counter")
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {PREFIX}{name} gauge")
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {PREFIX}{name} summary")
+                for q in QUANTILES:
+                    quantile = _format_labels(labels, [("quantile", q)])
+                    lines.append(f"{PREFIX}{name}{quantile} {histogram.percentile(q):.6f}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class _SpanContext:
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.span = Span(stage)
+        self._started = 0.0
+
+    def __enter__(self):
+        stack = self.registry._stack()
+        if stack:
+            stack[-1].children.append(self.span)
+        stack.append(self.span)
+        self._started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.span.fail()
+        stack = self.registry._stack()
+        stack.pop()
+        self.registry._finish(self.span)
+        if not stack:
+            with self.registry._lock:
+                self.registry.traces.append(self.span)
+        return False
+
+
+metrics = Metrics()
+
+
+def _default_failed(result):
+    return result is None or result is False
+
+
+def timed(stage, failed=_default_failed):
+    """Decorate a function so each call is recorded as a span.
+
+    ``failed`` decides from the return value whether the call failed,
+    since most stages report errors by returning ``None``.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.span(stage) as span:
+                result = func(*args, **kwargs)
+                if failed(result):
+                    span.fail()
+                return result
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = metrics.to_json().encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("metrics endpoint: " + format, *args)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_server(port, host="127.0.0.1"):
+    """Serve ``/metrics`` and ``/metrics.json`` on a background thread.
+
+    Binds to the loopback interface by default and returns the server
+    so the caller can ``shutdown()`` it.
+    """
+    server = _ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logging.info("Metrics available at http://%s:%s/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,191 @@
+"""Sharing downloaded backdrops with other machines on the LAN.
+
+An instance with ``peer_cache_port`` set serves its image store over
+HTTP in TMDB's layout, ``/original/<file name>``, so a request maps
+exactly to the TMDB ``file_path`` it was cached under.  Instances with
+``peer_cache_url`` set ask that peer first and only go to TMDB when it
+answers 404.  An unreachable peer is skipped for a while, so a peer
+that is switched off costs one short timeout rather than one per
+download.
+
+The module also runs standalone (``python -m framechanger.peer_cache
+--dir images --upstream https://image.tmdb.org/t/p``); with
+``--upstream`` a miss is fetched once, stored and served, so an office
+downloads each original from TMDB only once.  Only original-size
+images with plain TMDB file names are served.
+"""
+
+import argparse
+import logging
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import requests
+
+from . import image_hash
+from .metrics import metrics
+from .single_flight import SingleFlight
+
+DEFAULT_PORT = 8765
+SIZE = "original"
+TIMEOUT = 2.0
+RETRY_AFTER = 60.0
+FILE_NAME = re.compile(r"[A-Za-z0-9_-]+\.(?:jpg|jpeg|png|webp)")
+
+
+class ImageStore:
+    """Resolve TMDB file names to files in a local image folder.
+
+    With ``db_path`` the duplicate index is consulted first, so merged
+    re-uploads are found under any of their names.  With ``upstream``
+    misses are downloaded from there and kept.
+    """
+
+    def __init__(self, image_dir, db_path=None, upstream=None):
+        self.image_dir = image_dir
+        self.db_path = db_path
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self._flights = SingleFlight("peer_cache")
+
+    def lookup(self, file_name):
+        """Return the local path of ``file_name``, or None if it is not available."""
+        if self.db_path and os.path.exists(self.db_path):
+            try:
+                with sqlite3.connect(self.db_path, timeout=30) as conn:
+                    image_hash.ensure_table(conn)
+                    cached = image_hash.cached_path(conn, f"/{file_name}")
+                if cached and os.path.exists(cached):
+                    return cached
+            except sqlite3.Error as e:
+                logging.error("Database Error: %s", e)
+        path = os.path.join(self.image_dir, file_name)
+        if os.path.exists(path):
+            return path
+        if self.upstream:
+            return self._flights.do(file_name, self._fetch, file_name, path)
+        return None
+
+    def _fetch(self, file_name, path):
+        if os.path.exists(path):
+            return path
+        response = requests.get(f"{self.upstream}/{SIZE}/{file_name}", timeout=30)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        metrics.incr("peer_cache_upstream_bytes_total", len(response.content))
+        os.makedirs(self.image_dir, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(response.content)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+
+class _PeerHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        size, _, file_name = self.path.split("?")[0].lstrip("/").partition("/")
+        if size != SIZE or not FILE_NAME.fullmatch(file_name):
+            self.send_error(404)
+            return
+        try:
+            path = self.server.store.lookup(file_name)
+        except (OSError, requests.exceptions.RequestException) as e:
+            logging.error("Peer cache could not get %s: %s", file_name, e)
+            self.send_error(502)
+            return
+        if path is None:
+            metrics.incr("peer_cache_not_found_total")
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        metrics.incr("peer_cache_served_total")
+        metrics.incr("peer_cache_served_bytes_total", len(body))
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(file_name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        # TMDB never reuses a file path for different content
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("peer cache: " + format, *args)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_server(store, port=DEFAULT_PORT, host="0.0.0.0"):
+    """Serve ``store`` on a background thread and return the server."""
+    server = _ThreadingHTTPServer((host, port), _PeerHandler)
+    server.store = store
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logging.info("Peer cache available at http://%s:%s/", host, server.server_address[1])
+    return server
+
+
+class PeerClient:
+    """Fetch image paths from a peer cache, skipping it while it is unreachable."""
+
+    def __init__(self, base_url, timeout=TIMEOUT, retry_after=RETRY_AFTER):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.down_until = 0.0
+
+    def fetch(self, path):
+        """Return the content of a TMDB image path, or None on a miss."""
+        size, _, file_name = path.strip("/").partition("/")
+        if size != SIZE or time.monotonic() < self.down_until:
+            return None
+        try:
+            response = requests.get(f"{self.base_url}/{SIZE}/{file_name}", timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logging.warning("Peer cache %s is unreachable: %s", self.base_url, e)
+            metrics.incr("peer_cache_errors_total")
+            self.down_until = time.monotonic() + self.retry_after
+            return None
+        if response.status_code != 200:
+            metrics.incr("peer_cache_misses_total")
+            return None
+        metrics.incr("peer_cache_hits_total")
+        return response.content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a FrameChanger image folder to other machines.")
+    parser.add_argument("--dir", default="MovieStillsWallpaperChanger", help="Image folder to serve")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--upstream", help="Fetch and keep misses from this TMDB image URL")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    server = start_server(ImageStore(args.dir, upstream=args.upstream), args.port, args.host)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
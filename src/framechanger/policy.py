@@ -0,0 +1,313 @@
+"""When background work is worth doing.
+
+The auto changer and the job queue consult a :class:`PolicyEngine`
+before using the network.  It reads the machine's state through small
+probe functions: battery and charge from UPower, metered or mobile
+links from NetworkManager, the screen saver or lock state, and (on
+Windows) whether a fullscreen app or presentation is running.  A probe
+returns None when it cannot tell, which never restricts anything.
+
+From those conditions :func:`decide` returns whether an automatic
+change should run now (nobody sees a change behind a locked screen or a
+fullscreen game, so it is deferred until they are gone), whether it
+must come from cached images only (on battery or a metered link),
+whether queued prefetches may download and at what reduced rate.  The
+behaviour is configured under ``power_policy`` in ``settings.json``.
+Probes may block, so the GUI reads them on a worker thread with
+:meth:`PolicyEngine.refresh`.
+"""
+
+import collections
+import ctypes
+import logging
+import os
+import platform
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PyQt5.QtDBus import QDBus, QDBusConnection, QDBusMessage, QDBusVariant
+except ImportError:  # QtDBus is only built on Unix
+    QDBusConnection = None
+
+DBUS_TIMEOUT_MS = 500
+CACHE_SECONDS = 30
+# Both battery probes of one read share a pmset call
+PMSET_CACHE_SECONDS = 5
+LOW_BATTERY = 20
+POWER_SUPPLY_DIR = "/sys/class/power_supply"
+# NetworkManager's NMMetered values for "yes" and "guess yes"
+METERED_VALUES = (1, 3)
+SLOW_CONNECTION_TYPES = ("gsm", "cdma", "bluetooth")
+# SHQueryUserNotificationState results
+QUNS_NOT_PRESENT = 1
+QUNS_FULLSCREEN = (2, 3, 4)
+
+DEFAULTS = {
+    "enabled": True,
+    "pause_when_locked": True,
+    "pause_when_fullscreen": True,
+    "on_battery": "cached",
+    "on_metered": "cached",
+    "on_slow_link": "cached",
+    "low_battery": LOW_BATTERY,
+    # Background download cap for conditions set to "limited"
+    "limited_bandwidth_mbps": 1,
+}
+
+Conditions = collections.namedtuple(
+    "Conditions", "on_battery battery_level metered slow_link screen_locked fullscreen"
+)
+# ``background_mbps`` lowers the background download cap; None keeps the configured one
+Decision = collections.namedtuple("Decision", "change cached_only prefetch reason background_mbps")
+ALLOW = Decision(True, False, True, "", None)
+UNKNOWN = Conditions(*[None] * len(Conditions._fields))
+
+
+def _dbus_property(bus, service, path, interface, name):
+    """Return a D-Bus property, or None if the bus or service is missing."""
+    if QDBusConnection is None:
+        return None
+    connection = QDBusConnection.systemBus() if bus == "system" else QDBusConnection.sessionBus()
+    if not connection.isConnected():
+        return None
+    message = QDBusMessage.createMethodCall(service, path, "org.freedesktop.DBus.Properties", "Get")
+    message.setArguments([interface, name])
+    return _reply_value(connection.call(message, QDBus.Block, DBUS_TIMEOUT_MS))
+
+
+def _dbus_call(service, path, interface, method):
+    """Call a method without arguments on the session bus and return its result."""
+    if QDBusConnection is None:
+        return None
+    connection = QDBusConnection.sessionBus()
+    if not connection.isConnected():
+        return None
+    # A plain message, since QDBusInterface introspects the service without a timeout
+    message = QDBusMessage.createMethodCall(service, path, interface, method)
+    return _reply_value(connection.call(message, QDBus.Block, DBUS_TIMEOUT_MS))
+
+
+def _reply_value(reply):
+    if reply.type() == QDBusMessage.ErrorMessage or not reply.arguments():
+        return None
+    value = reply.arguments()[0]
+    return value.variant() if isinstance(value, QDBusVariant) else value
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _power_supplies():
+    """Return ``(type, directory)`` for the power supplies in sysfs."""
+    try:
+        names = os.listdir(POWER_SUPPLY_DIR)
+    except OSError:
+        return []
+    supplies = []
+    for name in names:
+        directory = os.path.join(POWER_SUPPLY_DIR, name)
+        try:
+            supplies.append((_read(os.path.join(directory, "type")), directory))
+        except OSError:
+            continue
+    return supplies
+
+
+def _windows_power_status():
+    class SystemPowerStatus(ctypes.Structure):
+        _fields_ = [
+            ("ACLineStatus", ctypes.c_ubyte),
+            ("BatteryFlag", ctypes.c_ubyte),
+            ("BatteryLifePercent", ctypes.c_ubyte),
+            ("SystemStatusFlag", ctypes.c_ubyte),
+            ("BatteryLifeTime", ctypes.c_ulong),
+            ("BatteryFullLifeTime", ctypes.c_ulong),
+        ]
+    status = SystemPowerStatus()
+    if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+        return None
+    return status
+
+
+_pmset_output = (None, "")
+
+
+def _pmset():
+    global _pmset_output
+    now = time.monotonic()
+    if _pmset_output[0] is None or now - _pmset_output[0] >= PMSET_CACHE_SECONDS:
+        output = subprocess.run(["pmset", "-g", "batt"], capture_output=True, text=True, timeout=2).stdout
+        _pmset_output = (now, output)
+    return _pmset_output[1]
+
+
+def on_battery():
+    """Return True when running on battery power."""
+    system = platform.system()
+    if system == "Windows":
+        status = _windows_power_status()
+        return None if status is None or status.ACLineStatus == 255 else status.ACLineStatus == 0
+    if system == "Darwin":
+        return "'Battery Power'" in _pmset()
+    value = _dbus_property("system", "org.freedesktop.UPower", "/org/freedesktop/UPower",
+                           "org.freedesktop.UPower", "OnBattery")
+    if value is not None:
+        return bool(value)
+    mains = [d for kind, d in _power_supplies() if kind == "Mains"]
+    if not mains or not any(kind == "Battery" for kind, _ in _power_supplies()):
+        return None
+    return not any(_read(os.path.join(d, "online")) == "1" for d in mains)
+
+
+def battery_level():
+    """Return the battery charge in percent."""
+    system = platform.system()
+    if system == "Windows":
+        status = _windows_power_status()
+        return None if status is None or status.BatteryLifePercent == 255 else status.BatteryLifePercent
+    if system == "Darwin":
+        match = re.search(r"(\d+)%", _pmset())
+        return int(match.group(1)) if match else None
+    value = _dbus_property("system", "org.freedesktop.UPower", "/org/freedesktop/UPower/devices/DisplayDevice",
+                           "org.freedesktop.UPower.Device", "Percentage")
+    if value:
+        return float(value)
+    for kind, directory in _power_supplies():
+        if kind == "Battery":
+            return float(_read(os.path.join(directory, "capacity")))
+    return None
+
+
+def metered():
+    """Return True when NetworkManager considers the connection metered."""
+    value = _dbus_property("system", "org.freedesktop.NetworkManager", "/org/freedesktop/NetworkManager",
+                           "org.freedesktop.NetworkManager", "Metered")
+    return None if value is None else int(value) in METERED_VALUES
+
+
+def slow_link():
+    """Return True when the primary connection is mobile broadband or Bluetooth."""
+    value = _dbus_property("system", "org.freedesktop.NetworkManager", "/org/freedesktop/NetworkManager",
+                           "org.freedesktop.NetworkManager", "PrimaryConnectionType")
+    return None if value is None else value in SLOW_CONNECTION_TYPES
+
+
+def _notification_state():
+    state = ctypes.c_int()
+    if ctypes.windll.shell32.SHQueryUserNotificationState(ctypes.byref(state)) != 0:
+        return None
+    return state.value
+
+
+def screen_locked():
+    """Return True while the screen saver or lock screen is active."""
+    if platform.system() == "Windows":
+        state = _notification_state()
+        return None if state is None else state == QUNS_NOT_PRESENT
+    for service, path in (("org.freedesktop.ScreenSaver", "/org/freedesktop/ScreenSaver"),
+                          ("org.gnome.ScreenSaver", "/org/gnome/ScreenSaver")):
+        value = _dbus_call(service, path, service, "GetActive")
+        if value is not None:
+            return bool(value)
+    return None
+
+
+def fullscreen():
+    """Return True while a fullscreen app or presentation is running (Windows only)."""
+    if platform.system() != "Windows":
+        return None
+    state = _notification_state()
+    return None if state is None else state in QUNS_FULLSCREEN
+
+
+PROBES = {
+    "on_battery": on_battery,
+    "battery_level": battery_level,
+    "metered": metered,
+    "slow_link": slow_link,
+    "screen_locked": screen_locked,
+    "fullscreen": fullscreen,
+}
+
+
+def read_conditions(probes=PROBES):
+    """Run every probe; a probe that fails reports None."""
+    values = {}
+    for name in Conditions._fields:
+        try:
+            values[name] = probes[name]()
+        except Exception as e:
+            logging.debug("Policy probe %s failed: %s", name, e)
+            values[name] = None
+    return Conditions(**values)
+
+
+def decide(conditions, options=None):
+    """Return the :class:`Decision` for ``conditions`` under the ``power_policy`` options."""
+    options = {**DEFAULTS, **(options or {})}
+    if not options["enabled"]:
+        return ALLOW
+    if options["pause_when_locked"] and conditions.screen_locked:
+        return Decision(False, False, False, "screen locked", None)
+    if options["pause_when_fullscreen"] and conditions.fullscreen:
+        return Decision(False, False, False, "fullscreen app", None)
+    level = conditions.battery_level
+    if conditions.on_battery and level is not None and level <= options["low_battery"]:
+        return Decision(False, False, False, "low battery", None)
+    limited = None
+    for condition, option, reason in (
+        (conditions.on_battery, "on_battery", "on battery"),
+        (conditions.metered, "on_metered", "metered connection"),
+        (conditions.slow_link, "on_slow_link", "slow connection"),
+    ):
+        if condition and options[option] == "pause":
+            return Decision(False, False, False, reason, None)
+        if condition and options[option] == "cached":
+            return Decision(True, True, False, reason, None)
+        if condition and options[option] == "limited" and limited is None:
+            limited = Decision(True, False, True, reason, options["limited_bandwidth_mbps"])
+    return limited or ALLOW
+
+
+class PolicyEngine:
+    """Cache the probed conditions briefly and turn them into decisions."""
+
+    def __init__(self, probes=PROBES, cache_seconds=CACHE_SECONDS):
+        self.probes = probes
+        self.cache_seconds = cache_seconds
+        self._conditions = None
+        self._read_at = 0.0
+        self._executor = None
+
+    def conditions(self):
+        now = time.monotonic()
+        if self._conditions is None or now - self._read_at >= self.cache_seconds:
+            self._conditions = read_conditions(self.probes)
+            self._read_at = now
+        return self._conditions
+
+    def latest(self):
+        """Return the last conditions read, without probing; all unknown before the first read."""
+        return self._conditions or UNKNOWN
+
+    def refresh(self, callback=None):
+        """Read the conditions on a worker thread and pass them to ``callback`` there."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="policy")
+        future = self._executor.submit(self.conditions)
+        if callback is not None:
+            future.add_done_callback(lambda done: callback(done.result()))
+        return future
+
+    def decide(self, options=None, probe=True):
+        """Return the decision; with ``probe`` false, from the last conditions read."""
+        return decide(self.conditions() if probe else self.latest(), options)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,228 @@
+"""Image providers and hedged downloads.
+
+Backdrops are addressed by their TMDB image path (``original/abc.jpg``)
+and can be served by several providers: TMDB's CDN, an HTTP mirror with
+the same layout, or a local folder such as a NAS copy.  Providers are
+configured in ``settings.json`` under ``image_providers``; TMDB is
+always one of them.
+
+:class:`HedgedFetcher` tries the provider with the lowest recent
+latency first.  If it has not answered within its usual time (the
+``hedge_percentile`` of its latency, p90 by default), the next provider
+is asked as well.  The first complete answer wins and the other
+downloads are cancelled.  Each provider's latency feeds both its
+ordering and its hedge delay, and is published as the
+``provider_fetch_seconds`` histogram.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from .metrics import Histogram, metrics
+
+HEDGE_PERCENTILE = 0.9
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_DELAY = 0.05
+# Samples needed before a provider's own percentile replaces the default delay
+MIN_SAMPLES = 10
+STATS_WINDOW = 100
+UNKNOWN_LATENCY = 0.5
+FAILURE_PENALTY = 5.0
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 30
+
+
+class Cancelled(Exception):
+    """Raised inside a download that lost the race to another provider."""
+
+
+class HttpProvider:
+    """Serve image paths from a base URL, e.g. TMDB's CDN or a mirror of it."""
+
+    def __init__(self, name, base_url):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def fetch(self, path, cancel=None):
+        """Return the image content; stop early once ``cancel`` is set."""
+        if cancel is None:
+            return get(self.url(path))
+        response = requests.get(self.url(path), stream=True, timeout=TIMEOUT)
+        try:
+            response.raise_for_status()
+            chunks = []
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if cancel.is_set():
+                    raise Cancelled(self.name)
+                chunks.append(chunk)
+            return b"".join(chunks)
+        finally:
+            response.close()
+
+
+def get(url):
+    """Return the content of ``url``, raising on timeouts and HTTP errors."""
+    response = requests.get(url, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+class DirectoryProvider:
+    """Serve image paths from a local folder laid out like TMDB's CDN."""
+
+    def __init__(self, name, directory):
+        self.name = name
+        self.directory = directory
+
+    def fetch(self, path, cancel=None):
+        with open(os.path.join(self.directory, *path.strip("/").split("/")), "rb") as file:
+            return file.read()
+
+
+def from_settings(entries, tmdb_url):
+    """Return TMDB followed by the providers configured in ``entries``."""
+    providers = [HttpProvider("tmdb", tmdb_url)]
+    for entry in entries or []:
+        name = entry.get("name") or f"provider{len(providers)}"
+        if entry.get("url"):
+            providers.append(HttpProvider(name, entry["url"]))
+        elif entry.get("directory"):
+            providers.append(DirectoryProvider(name, entry["directory"]))
+        else:
+            logging.error("Image provider %s needs a url or a directory", name)
+    return providers
+
+
+class ProviderStats:
+    """Recent latencies and consecutive failures of one provider."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(window=STATS_WINDOW)
+        self.failures = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self.latency.observe(seconds)
+            self.failures = 0
+
+    def fail(self):
+        with self._lock:
+            self.failures += 1
+
+    def estimate(self):
+        """Return the expected latency, used to order the providers."""
+        with self._lock:
+            median = self.latency.percentile(0.5) if self.latency.values else UNKNOWN_LATENCY
+            return median + self.failures * FAILURE_PENALTY
+
+    def hedge_delay(self, percentile=HEDGE_PERCENTILE):
+        """Return how long to wait for this provider before asking another."""
+        with self._lock:
+            if len(self.latency.values) < MIN_SAMPLES:
+                return DEFAULT_HEDGE_DELAY
+            return max(MIN_HEDGE_DELAY, self.latency.percentile(percentile))
+
+
+class HedgedFetcher:
+    """Fetch image paths from the fastest of several providers."""
+
+    def __init__(self, providers, percentile=HEDGE_PERCENTILE):
+        self.providers = list(providers)
+        self.percentile = percentile
+        self.stats = {provider.name: ProviderStats() for provider in self.providers}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def ordered(self):
+        """Return the providers, expected fastest first."""
+        return sorted(self.providers, key=lambda provider: self.stats[provider.name].estimate())
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=4 * len(self.providers), thread_name_prefix="provider"
+                )
+            return self._executor
+
+    def _attempt(self, provider, path, cancel):
+        stats = self.stats[provider.name]
+        start = time.monotonic()
+        try:
+            content = provider.fetch(path, cancel)
+        except Cancelled:
+            # The loser took at least this long, which is still worth knowing
+            stats.record(time.monotonic() - start)
+            raise
+        except Exception:
+            stats.fail()
+            metrics.incr("provider_failures_total", provider=provider.name)
+            raise
+        elapsed = time.monotonic() - start
+        stats.record(elapsed)
+        metrics.observe("provider_fetch_seconds", elapsed, provider=provider.name)
+        return content
+
+    def fetch(self, path):
+        """Return ``(content, provider_name)`` for an image path.
+
+        Raises the last provider's error if none of them has the image.
+        """
+        order = self.ordered()
+        if len(order) == 1:
+            return self._attempt(order[0], path, None), order[0].name
+
+        remaining = iter(order)
+        pending = {}
+        error = None
+
+        def launch():
+            provider = next(remaining, None)
+            if provider is None:
+                return None
+            cancel = threading.Event()
+            pending[self._pool().submit(self._attempt, provider, path, cancel)] = (provider, cancel)
+            return provider
+
+        latest = launch()
+        while pending:
+            delay = self.stats[latest.name].hedge_delay(self.percentile) if latest else None
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                latest = launch()
+                if latest:
+                    metrics.incr("provider_hedges_total", provider=latest.name)
+                continue
+            for future in done:
+                provider, _ = pending.pop(future)
+                try:
+                    content = future.result()
+                except Exception as e:
+                    logging.warning("Image provider %s failed for %s: %s", provider.name, path, e)
+                    error = e
+                    continue
+                for loser, (other, cancel) in pending.items():
+                    cancel.set()
+                    loser.cancel()
+                    metrics.incr("provider_cancelled_total", provider=other.name)
+                metrics.incr("provider_wins_total", provider=provider.name)
+                return content, provider.name
+            # Move on to the next provider at once instead of waiting out the delay
+            latest = launch() or latest
+        raise error or requests.exceptions.RequestException(f"No provider has {path}")
+
+    def shutdown(self):
+        """Stop the worker threads, leaving cancelled downloads to finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
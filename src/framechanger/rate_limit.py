@@ -0,0 +1,172 @@
+"""Process-wide budget for TMDB API requests.
+
+All API calls go through :data:`governor`, a token bucket shared by the
+GUI, the auto changer and background workers.  Callers queue for a
+token in priority order, so an interactive click is served before
+queued background work.  HTTP 429 responses pause the whole bucket for
+the ``Retry-After`` period, halve the request rate and retry the call
+instead of failing it; the rate recovers gradually on success.  Usage
+is published as gauges and counters in :mod:`framechanger.metrics`.
+"""
+
+import contextlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+import requests
+
+from .metrics import metrics
+
+INTERACTIVE = 0
+SCHEDULED = 5
+BACKGROUND = 10
+
+DEFAULT_RATE = 20.0
+DEFAULT_BURST = 20
+MIN_RATE = 1.0
+MAX_RETRIES = 5
+DEFAULT_RETRY_AFTER = 2.0
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", SCHEDULED: "scheduled", BACKGROUND: "background"}
+
+
+class RequestGovernor:
+    """Priority token bucket with adaptive handling of HTTP 429."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=MAX_RETRIES):
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self.configure(rate, burst, max_retries)
+
+    def configure(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=MAX_RETRIES):
+        """Set the sustained rate (requests per second) and burst size."""
+        with self._cond:
+            self.base_rate = float(rate)
+            self.rate = float(rate)
+            self.burst = int(burst)
+            self.max_retries = int(max_retries)
+            self.tokens = float(burst)
+            self.updated = time.monotonic()
+            self.blocked_until = 0.0
+            self.requests = 0
+            self.throttled = 0
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def priority(self, level):
+        """Run the enclosed requests of this thread at ``level``."""
+        previous = self.current_priority()
+        self._local.priority = level
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self):
+        return getattr(self._local, "priority", INTERACTIVE)
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=None):
+        """Block until a request may be sent and return the time waited."""
+        if priority is None:
+            priority = self.current_priority()
+        started = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            self._publish()
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiters[0] == ticket and now >= self.blocked_until and self.tokens >= 1:
+                    heapq.heappop(self._waiters)
+                    self.tokens -= 1
+                    self.requests += 1
+                    self._publish()
+                    self._cond.notify_all()
+                    break
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    delay = max(0.001, (1 - self.tokens) / self.rate)
+                self._cond.wait(delay)
+        waited = time.monotonic() - started
+        metrics.observe("tmdb_budget_wait_seconds", waited, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        return waited
+
+    def throttle(self, retry_after):
+        """Pause every request for ``retry_after`` seconds and slow down."""
+        with self._cond:
+            self.throttled += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self._publish()
+            self._cond.notify_all()
+        metrics.incr("tmdb_throttled_total")
+        logging.warning("TMDB rate limit hit, pausing for %.1fs at %.1f req/s", retry_after, self.rate)
+
+    def _recover(self):
+        with self._cond:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate * 1.1)
+                self._publish()
+
+    def _publish(self):
+        metrics.gauge("tmdb_budget_tokens", self.tokens)
+        metrics.gauge("tmdb_budget_rate", self.rate)
+        metrics.gauge("tmdb_budget_queued", len(self._waiters))
+
+    def get(self, url, priority=None, **kwargs):
+        """Send a GET request within the budget, retrying on HTTP 429."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority)
+            response = requests.get(url, **kwargs)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code != 429 or attempt == self.max_retries:
+                    return response
+                self.throttle(_retry_after(e.response))
+                metrics.incr("tmdb_retries_total")
+                continue
+            self._recover()
+            return response
+
+    def stats(self):
+        """Return the current budget usage."""
+        with self._cond:
+            self._refill(time.monotonic())
+            queued = {}
+            for priority, _ in self._waiters:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                queued[name] = queued.get(name, 0) + 1
+            return {
+                "rate": self.rate,
+                "base_rate": self.base_rate,
+                "burst": self.burst,
+                "tokens": self.tokens,
+                "queued": queued,
+                "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+                "requests": self.requests,
+                "throttled": self.throttled,
+            }
+
+
+def _retry_after(response):
+    """Return the delay requested by a 429 response in seconds."""
+    value = response.headers.get("Retry-After") if response.headers else None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+governor = RequestGovernor()
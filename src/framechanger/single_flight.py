@@ -0,0 +1,51 @@
+"""Coalescing of concurrent calls that do the same work.
+
+When the auto changer, a double-click and a background worker ask for
+the same title at once, only the first caller (the leader) runs the
+lookup or download; the others wait on the leader's
+:class:`~concurrent.futures.Future` and receive the same result or
+exception.  Keys are forgotten as soon as the call finishes, so this is
+not a cache.
+"""
+
+import threading
+from concurrent.futures import Future
+
+from .metrics import metrics
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """Return ``func(*args, **kwargs)``, sharing an in-flight call for ``key``."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            metrics.incr("single_flight_shared_total", flight=self.name)
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        """Return the number of calls currently running."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,129 @@
+"""Single running instance with a local command channel.
+
+The first FrameChanger process takes a lock file and listens on a local
+socket (a Unix domain socket, or a named pipe on Windows) through
+:class:`~PyQt5.QtNetwork.QLocalServer`.  Later launches and CLI calls
+send their command there with :func:`send_command` and print the reply,
+so the work runs in the warm process instead of a second one racing on
+``titles.db`` and the TMDB budget.
+
+The protocol is one command per connection: the client writes a single
+line (``change``, ``next``, ``previous``, ``pin``, ``pause``, ``status``,
+``metrics`` or ``show``) and reads the reply until the server closes the
+connection.  The client side uses plain sockets, so forwarding a command
+does not need to start Qt.
+"""
+
+import getpass
+import logging
+import os
+import socket
+import sys
+import tempfile
+
+from PyQt5.QtCore import QLockFile, QObject
+from PyQt5.QtNetwork import QLocalServer
+
+COMMANDS = ("change", "next", "previous", "pin", "pause", "status", "metrics", "show")
+CONNECT_TIMEOUT = 1.0
+REPLY_TIMEOUT = 60.0
+ERROR_PREFIX = "error: "
+
+
+def _base_name():
+    try:
+        user = getpass.getuser()
+    except Exception:  # no login name, e.g. in some containers
+        user = str(os.getpid())
+    return f"framechanger-{user}"
+
+
+def server_name():
+    """Return the local server name: a socket path on Unix, a pipe name on Windows."""
+    if sys.platform == "win32":
+        return _base_name()
+    return os.path.join(tempfile.gettempdir(), f"{_base_name()}.sock")
+
+
+def lock_path():
+    """Return the path of the single-instance lock file."""
+    return os.path.join(tempfile.gettempdir(), f"{_base_name()}.lock")
+
+
+def send_command(command, timeout=REPLY_TIMEOUT):
+    """Send ``command`` to the running instance and return its reply.
+
+    Returns None when no instance is listening.
+    """
+    request = f"{command}\n".encode("utf-8")
+    try:
+        if sys.platform == "win32":
+            with open(rf"\\.\pipe\{server_name()}", "r+b", buffering=0) as pipe:
+                pipe.write(request)
+                return pipe.read().decode("utf-8")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(server_name())
+            sock.settimeout(timeout)
+            sock.sendall(request)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks).decode("utf-8")
+    except OSError:
+        return None
+
+
+class InstanceServer(QObject):
+    """Hold the single-instance lock and serve commands from other launches."""
+
+    def __init__(self, handler, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.lock = QLockFile(lock_path())
+        self.lock.setStaleLockTime(0)
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept_connections)
+
+    def start(self):
+        """Take the lock and start listening; return False if another instance runs."""
+        if not self.lock.tryLock(100):
+            return False
+        # The lock proves any leftover socket belongs to a dead process
+        QLocalServer.removeServer(server_name())
+        if not self.server.listen(server_name()):
+            logging.error("Could not listen for commands: %s", self.server.errorString())
+        return True
+
+    def stop(self):
+        """Stop listening and release the lock."""
+        self.server.close()
+        self.lock.unlock()
+
+    def accept_connections(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.disconnected.connect(connection.deleteLater)
+            connection.readyRead.connect(lambda connection=connection: self.serve(connection))
+
+    def serve(self, connection):
+        """Run the command sent on ``connection`` and write back the reply."""
+        if not connection.canReadLine():
+            return
+        command = bytes(connection.readLine()).decode("utf-8", "replace").strip()
+        logging.debug("Received command: %s", command)
+        if command in COMMANDS:
+            try:
+                reply = self.handler(command)
+            except Exception as e:
+                logging.error("Error running command %s: %s", command, e, exc_info=True)
+                reply = f"{ERROR_PREFIX}{e}"
+        else:
+            reply = f"{ERROR_PREFIX}unknown command {command!r}"
+        connection.write(reply.encode("utf-8"))
+        connection.flush()
+        connection.disconnectFromServer()
@@ -0,0 +1,75 @@
+"""Application themes.
+
+Themes are Qt stylesheets: the built-in ones from
+:mod:`framechanger.stylesheets` plus any ``*.qss`` file in the
+``themes`` folder next to ``settings.json`` (the file name is the theme
+name).  Listing themes only reads the folder; a user theme file is read
+the first time it is applied and cached until it changes on disk.  A
+theme is set once on the whole application, and applying the theme that
+is already active does nothing, so Qt does not re-polish every widget.
+"""
+
+import logging
+import os
+
+from .stylesheets import stylesheets
+from .wallpaper_changer import script_dir
+
+DEFAULT_THEME = "Default"
+THEME_EXTENSION = ".qss"
+themes_dir = os.path.join(script_dir, "themes")
+
+_cache = {}
+_current = None
+
+
+def _user_themes():
+    """Return ``{name: path}`` for the theme files in :data:`themes_dir`."""
+    try:
+        entries = list(os.scandir(themes_dir))
+    except OSError:
+        return {}
+    return {
+        entry.name[:-len(THEME_EXTENSION)]: entry.path
+        for entry in entries
+        if entry.is_file() and entry.name.lower().endswith(THEME_EXTENSION)
+    }
+
+
+def theme_names():
+    """Return the built-in theme names followed by the user themes."""
+    return list(stylesheets) + sorted(name for name in _user_themes() if name not in stylesheets)
+
+
+def load(name):
+    """Return the stylesheet of a theme, or None if there is no such theme."""
+    if name in stylesheets:
+        return stylesheets[name]
+    path = _user_themes().get(name)
+    if path is None:
+        return None
+    mtime = os.stat(path).st_mtime
+    cached = _cache.get(name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, encoding="utf-8") as file:
+        qss = file.read()
+    _cache[name] = (mtime, qss)
+    return qss
+
+
+def apply(app, name):
+    """Set theme ``name`` on ``app`` unless it is already active.
+
+    Returns the name of the active theme; unknown themes fall back to
+    the default.
+    """
+    global _current
+    qss = load(name)
+    if qss is None:
+        logging.warning("Unknown theme %s, using %s", name, DEFAULT_THEME)
+        name, qss = DEFAULT_THEME, stylesheets[DEFAULT_THEME]
+    if _current is None or _current[0] != name or _current[1] is not qss:
+        app.setStyleSheet(qss)
+        _current = (name, qss)
+    return name
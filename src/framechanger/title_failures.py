@@ -0,0 +1,87 @@
+"""Negative cache for favorites that cannot produce a wallpaper.
+
+A title with no TMDB match, or with no language-neutral 16:9 backdrop,
+would otherwise be picked again and again and repeat the same failed
+requests.  Such titles get a row in ``title_failures`` with the reason
+and a retry time that backs off exponentially with every failure; the
+random selector skips them until then, and the UI lists them so the
+user can fix or remove them.  Network errors are not recorded here.
+"""
+
+import time
+
+NO_MATCH = "No TMDB match"
+NO_BACKDROPS = "No usable backdrop"
+
+BASE_BACKOFF = 6 * 3600
+MAX_BACKOFF = 30 * 24 * 3600
+
+
+def ensure_table(conn):
+    """Create the ``title_failures`` table if it does not exist."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS title_failures (
+            name TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            failures INTEGER NOT NULL,
+            last_failed REAL NOT NULL,
+            retry_at REAL NOT NULL,
+            PRIMARY KEY (name, media_type)
+        )
+    ''')
+
+
+def backoff(failures):
+    """Return the seconds to wait after ``failures`` consecutive failures."""
+    return min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (max(1, failures) - 1))
+
+
+def record(conn, name, media_type, reason, now=None):
+    """Count a failure for a title and return its new retry time."""
+    now = time.time() if now is None else now
+    row = conn.execute(
+        "SELECT failures FROM title_failures WHERE name=? AND media_type=?", (name, media_type)
+    ).fetchone()
+    failures = (row[0] if row else 0) + 1
+    retry_at = now + backoff(failures)
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO title_failures VALUES (?, ?, ?, ?, ?, ?)",
+            (name, media_type, reason, failures, now, retry_at),
+        )
+    return retry_at
+
+
+def record_by_id(conn, media_type, media_id, reason, now=None):
+    """Record a failure for every favorite resolved to ``media_id``."""
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM titles WHERE media_type=? AND tmdb_id=?", (media_type, media_id)
+    )]
+    for name in names:
+        record(conn, name, media_type, reason, now)
+    return names
+
+
+def clear(conn, name, media_type):
+    """Forget the failures of a title, e.g. after it worked or was edited."""
+    with conn:
+        conn.execute("DELETE FROM title_failures WHERE name=? AND media_type=?", (name, media_type))
+
+
+def failed_since(conn, name, media_type, since):
+    """Return True if a failure of the title was recorded at or after ``since``."""
+    return conn.execute(
+        "SELECT 1 FROM title_failures WHERE name=? AND media_type=? AND last_failed>=?",
+        (name, media_type, since),
+    ).fetchone() is not None
+
+
+def list_failures(conn):
+    """Return ``(name, media_type, reason, failures, retry_at)`` for favorites, worst first."""
+    return conn.execute('''
+        SELECT f.name, f.media_type, f.reason, f.failures, f.retry_at
+        FROM title_failures f
+        JOIN titles t ON t.name = f.name AND t.media_type = f.media_type
+        ORDER BY f.failures DESC, f.name
+    ''').fetchall()
@@ -5,9 +5,10 @@ them locally and sets them as the desktop background.  Key functions
 include ``load_settings``/``save_settings`` for configuration,
 ``get_api_key`` for retrieving the TMDB key, the ``download_*`` helpers
 and :func:`change_wallpaper`.  ``initialize_database`` populates the
-initial list of movies and shows.
+initial list of movies and shows.  Caching, providers, history and
+the selection rules live in the helper modules imported below.
 """
-
+
 import requests
 import random
 import ctypes
@@ -16,21 +17,60 @@ import sqlite3
 import json
 import platform
 import subprocess
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from urllib.parse import urlparse
 from PyQt5.QtWidgets import QApplication, QMessageBox, QInputDialog
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread
 import sys
 import logging
 from .logging_utils import configure_logging
+from . import image_processing
+from . import image_hash
+from . import image_cache
+from . import local_library
+from . import title_failures
+from . import backdrops
+from . import discovery
+from . import history
+from . import providers
+from . import jobs
+from . import metadata
+from . import peer_cache
+from . import bandwidth
+from . import favorites
+from .metrics import metrics, timed
+from .rate_limit import BACKGROUND, governor
+from .single_flight import SingleFlight
 
 API_KEY_ENV_VAR = "TMDB_API_KEY"
-
-script_dir = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, 'frozen', False) else __file__))
-image_dir = os.path.join(script_dir, 'MovieStillsWallpaperChanger')
-settings_file = os.path.join(script_dir, 'settings.json')
-
-if not os.path.exists(image_dir):
-    os.mkdir(image_dir)
-
+# Base URLs can be pointed at a local stand-in for tests and benchmarks.
+TMDB_API_URL = os.getenv("FRAMECHANGER_TMDB_API_URL", "https://api.themoviedb.org/3")
+TMDB_IMAGE_URL = os.getenv("FRAMECHANGER_TMDB_IMAGE_URL", "https://image.tmdb.org/t/p")
+DATABASE_NAME = 'titles.db'
+# Chance that a random change draws from the local library when both
+# TMDB titles and local images are available.
+DEFAULT_LOCAL_SHARE = 0.5
+DEFAULT_DISCOVERY_SHARE = 0.3
+# TMDB rendition applied while the original downloads
+PREVIEW_SIZE = 'w780'
+UPGRADE_WORKERS = 2
+PREFETCH_JOB = 'prefetch'
+METADATA_JOB = 'metadata'
+
+script_dir = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, 'frozen', False) else __file__))
+image_dir = os.path.join(script_dir, 'MovieStillsWallpaperChanger')
+settings_file = os.path.join(script_dir, 'settings.json')
+processed_dir = os.path.join(image_dir, 'processed')
+
+# Original image behind the wallpaper that was applied most recently.
+_current_wallpaper = None
+
+if not os.path.exists(image_dir):
+    os.mkdir(image_dir)
+
 def load_settings():
     """Load settings from the settings file and environment."""
     settings = {}
@@ -45,7 +85,7 @@ def load_settings():
         settings["api_key"] = env_key
     settings.setdefault("api_key", "")
     return settings
-
+
 def save_settings(settings):
     """Save settings to the settings file."""
     with open(settings_file, 'w') as file:
@@ -63,104 +103,671 @@ def get_api_key():
         settings["api_key"] = api_key
         save_settings(settings)
     return api_key
-
-def fetch_media_info(title_name, media_type, api_key):
-    """Fetch media information from TMDB."""
-    media_type = media_type.lower()
-    search_url = f'https://api.themoviedb.org/3/search/{media_type}?api_key={api_key}&query={title_name}'
-    logging.debug(f'Search URL: {search_url}')
-    
-    try:
-        response = requests.get(search_url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request Exception: {e}")
-        return None
-
-    results = response.json().get('results', [])
-    logging.debug(f'Search Results: {results}')
-    
-    if results:
-        best_match = results[0]
-        return best_match['id']
-    else:
-        logging.error(f"No results found for: {title_name} ({media_type})")
-        return None
-
-def fetch_backdrop_image(media_id, media_type, api_key):
-    """Fetch the backdrop image from TMDB."""
-    media_type = media_type.lower()
-    images_url = f'https://api.themoviedb.org/3/{media_type}/{media_id}/images?api_key={api_key}'
-    logging.debug(f'Images URL: {images_url}')
-    
-    try:
-        response = requests.get(images_url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Request Exception: {e}")
-        return None
-
-    backdrops = [
-        img for img in response.json().get('backdrops', [])
-        if img['iso_639_1'] is None and round(img['width'] / img['height'], 2) == 1.78
-    ]
-    logging.debug(f'Backdrops: {backdrops}')
-    
-    if backdrops:
-        backdrop = random.choice(backdrops)
-        return f"https://image.tmdb.org/t/p/original{backdrop['file_path']}"
-    else:
-        logging.error(f"No suitable backdrops found for media ID: {media_id}")
-        return None
-
+
+# Concurrent callers asking for the same title share one in-flight request.
+# Downloads are keyed by mode too, so a change never waits on a capped prefetch.
+_metadata_flights = SingleFlight('metadata')
+_download_flights = SingleFlight('download')
+
+def _is_background():
+    """Return True if the calling thread runs background work."""
+    return governor.current_priority() >= BACKGROUND
+
+@timed('fetch_media_info')
+def fetch_media_info(title_name, media_type, api_key):
+    """Fetch media information from TMDB."""
+    media_type = media_type.lower()
+    return _metadata_flights.do(
+        ('search', media_type, title_name), _search_media, title_name, media_type, api_key
+    )
+
+def _search_media(title_name, media_type, api_key):
+    """Return the TMDB id of the best search match, or None."""
+    search_url = f'{TMDB_API_URL}/search/{media_type}?api_key={api_key}&query={title_name}'
+    logging.debug('Search URL: %s', search_url)
+    
+    metrics.incr('tmdb_requests_total', endpoint='search')
+    try:
+        response = governor.get(search_url)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        metrics.incr('tmdb_request_errors_total', endpoint='search')
+        logging.error("Request Exception: %s", e)
+        return None
+
+    results = response.json().get('results', [])
+    logging.debug('Search Results: %s', results)
+    
+    if results:
+        best_match = results[0]
+        return best_match['id']
+    else:
+        logging.error("No results found for: %s (%s)", title_name, media_type)
+        _update_failures(title_failures.record, title_name, media_type, title_failures.NO_MATCH)
+        return None
+
+@timed('fetch_backdrop_image')
+def fetch_backdrop_image(media_id, media_type, api_key):
+    """Pick a backdrop of a title, weighted by its rank, and return its URL."""
+    media_type = media_type.lower()
+    settings = load_settings()
+    target_ratio = _target_ratio(settings)
+    key = (media_type, media_id, round(target_ratio, 2))
+    ranking = _rankings.get(key)
+    if ranking is None:
+        ranked = _cached_ranking(media_type, media_id, target_ratio)
+        if ranked is None:
+            metrics.incr('backdrop_ranking_cache_misses_total')
+            ranked = _metadata_flights.do(
+                ('images', media_type, media_id), _rank_backdrops,
+                media_id, media_type, api_key, target_ratio, settings,
+            )
+        else:
+            metrics.incr('backdrop_ranking_cache_hits_total')
+        if ranked is None:
+            return None
+        if not ranked:
+            logging.error("No suitable backdrops found for media ID: %s", media_id)
+            return None
+        ranking = _rankings.put(key, ranked)
+    else:
+        metrics.incr('backdrop_ranking_cache_hits_total')
+    return f"{TMDB_IMAGE_URL}/original{_pick_backdrop(ranking)}"
+
+_rankings = backdrops.RankingCache()
+
+def _pick_backdrop(ranking):
+    """Draw a backdrop from ``ranking``, redrawing ones like a recently shown wallpaper."""
+    if os.path.exists(DATABASE_NAME):
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                image_hash.ensure_table(conn)
+                recent = image_hash.recent_hashes(conn)
+                allowed = None
+                if recent:
+                    allowed = lambda file_path: not image_hash.is_recent_duplicate(conn, file_path, recent)
+                return backdrops.pick(ranking.entries, allowed, cumulative=ranking.cumulative)
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+    return backdrops.pick(ranking.entries, cumulative=ranking.cumulative)
+
+def _target_ratio(settings):
+    """Return the aspect ratio of the display wallpapers are picked for."""
+    size = _target_size(settings.get('processing', {}))
+    return size[0] / size[1] if size else backdrops.DEFAULT_RATIO
+
+def _cached_ranking(media_type, media_id, target_ratio):
+    """Return the stored backdrop ranking of a title, or None."""
+    if not os.path.exists(DATABASE_NAME):
+        return None
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            backdrops.ensure_table(conn)
+            return backdrops.load(conn, media_type, media_id, target_ratio)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return None
+
+def _rank_backdrops(media_id, media_type, api_key, target_ratio, settings):
+    """Fetch, rank and store the backdrops of a title; None on request errors."""
+    images = _fetch_backdrops(media_id, media_type, api_key)
+    if images is None:
+        return None
+    ranked = backdrops.rank(
+        images,
+        target_ratio,
+        settings.get('backdrop_aspect_tolerance', backdrops.ASPECT_TOLERANCE),
+        settings.get('backdrop_min_width', backdrops.MIN_WIDTH),
+    )
+    logging.debug('Ranked backdrops: %s', ranked)
+    if not ranked:
+        _update_failures(title_failures.record_by_id, media_type, media_id, title_failures.NO_BACKDROPS)
+    elif os.path.exists(DATABASE_NAME):
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                backdrops.ensure_table(conn)
+                backdrops.store(conn, media_type, media_id, ranked, target_ratio)
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+    return ranked
+
+def _fetch_backdrops(media_id, media_type, api_key):
+    """Return the backdrop list of a title from TMDB, or None on error."""
+    images_url = f'{TMDB_API_URL}/{media_type}/{media_id}/images?api_key={api_key}'
+    logging.debug('Images URL: %s', images_url)
+    
+    metrics.incr('tmdb_requests_total', endpoint='images')
+    try:
+        response = governor.get(images_url)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        metrics.incr('tmdb_request_errors_total', endpoint='images')
+        logging.error("Request Exception: %s", e)
+        return None
+
+    return response.json().get('backdrops', [])
+
+def _index_image(conn, file_path, image_path):
+    """Hash a freshly downloaded image, merging it into an existing duplicate."""
+    if not image_hash.is_available():
+        return image_path
+    value = image_hash.dhash(image_path)
+    duplicate = image_hash.find_duplicate(conn, value)
+    if duplicate and duplicate != image_path and os.path.exists(duplicate):
+        logging.debug("Merging %s into duplicate %s", file_path, duplicate)
+        os.remove(image_path)
+        image_path = duplicate
+    image_hash.record(conn, file_path, image_path, value)
+    return image_path
+
+@timed('save_image')
 def save_image(image_url, title_name):
-    """Save the image to the local directory."""
+    """Save the image to the local cache, keyed by its TMDB file path."""
+    file_name = os.path.basename(urlparse(image_url).path) or f'{title_name}.jpg'
+    file_path = f'/{file_name}'
+    image_path = os.path.join(image_dir, file_name)
     try:
-        image_content = requests.get(image_url).content
-        with open(os.path.join(image_dir, f'{title_name}.jpg'), 'wb') as f:
-            f.write(image_content)
-        return os.path.join(image_dir, f'{title_name}.jpg')
+        cached = _cached_image(file_path)
+        if cached:
+            metrics.incr('image_cache_hits_total')
+            return cached
+        return _download_flights.do(
+            (image_url, _is_background()), _fetch_image, image_url, file_path, image_path
+        )
     except Exception as e:
-        logging.error(f"Error saving image: {e}")
+        logging.error("Error saving image: %s", e)
         return None
 
-def download_wallpaper(title_name, media_type, api_key):
-    """Download a wallpaper for the given title and return the file path."""
-    media_id = fetch_media_info(title_name, media_type, api_key)
-    if not media_id:
-        logging.error(f"No title found with the name: {title_name}")
+def _cached_image(file_path):
+    """Return the cached local copy of a TMDB file path, or None."""
+    with sqlite3.connect(DATABASE_NAME) as conn:
+        image_hash.ensure_table(conn)
+        cached = image_hash.cached_path(conn, file_path)
+    return cached if cached and os.path.exists(cached) else None
+
+_fetcher = None
+_fetcher_config = None
+_fetcher_lock = threading.Lock()
+
+def _image_fetcher():
+    """Return the hedged fetcher for the configured image providers."""
+    global _fetcher, _fetcher_config
+    settings = load_settings()
+    entries = settings.get('image_providers', [])
+    percentile = settings.get('hedge_percentile', providers.HEDGE_PERCENTILE)
+    config = (TMDB_IMAGE_URL, json.dumps(entries, sort_keys=True), percentile)
+    with _fetcher_lock:
+        if config != _fetcher_config:
+            if _fetcher is not None:
+                _fetcher.shutdown()
+            _fetcher = providers.HedgedFetcher(providers.from_settings(entries, TMDB_IMAGE_URL), percentile)
+            _fetcher_config = config
+        return _fetcher
+
+_peer = None
+
+def _peer_client():
+    """Return the client of the configured peer cache, or None."""
+    global _peer
+    peer_url = load_settings().get('peer_cache_url')
+    if not peer_url:
+        return None
+    if _peer is None or _peer.base_url != peer_url.rstrip('/'):
+        _peer = peer_cache.PeerClient(peer_url)
+    return _peer
+
+def _download(url, path):
+    """Download ``url`` to ``path`` through a temporary file.
+
+    Background downloads are capped and resumable; see :func:`_download_background`.
+    """
+    background = _is_background()
+    image_content = None
+    if url.startswith(f'{TMDB_IMAGE_URL}/'):
+        image_path = url[len(TMDB_IMAGE_URL) + 1:]
+        peer = _peer_client()
+        image_content = peer.fetch(image_path) if peer else None
+        if image_content is None and background:
+            return _download_background(image_path, path)
+        if image_content is None:
+            image_content, provider = _image_fetcher().fetch(image_path)
+            logging.debug("Downloaded %s from %s", url, provider)
+    elif not background:
+        image_content = providers.get(url)
+    if image_content is None:
+        return _download_capped(url, path)
+    _record_download(len(image_content), background)
+    return _write_file(path, image_content)
+
+def _download_background(image_path, path):
+    """Fetch a TMDB image path for a background job from the cheapest provider.
+
+    Local folders are read first since they cost no bandwidth.  Mirrors
+    and then TMDB itself are streamed under the background cap.
+    """
+    streamed = []
+    for provider in _image_fetcher().ordered():
+        if isinstance(provider, providers.HttpProvider):
+            streamed.append(provider)
+            continue
+        try:
+            content = provider.fetch(image_path)
+        except OSError as e:
+            logging.debug("%s does not have %s: %s", provider.name, image_path, e)
+            continue
+        logging.debug("Copied %s from %s", image_path, provider.name)
+        return _write_file(path, content)
+    streamed.sort(key=lambda provider: provider.base_url == TMDB_IMAGE_URL)
+    for provider in streamed[:-1]:
+        try:
+            return _download_capped(provider.url(image_path), path)
+        except requests.exceptions.RequestException as e:
+            logging.warning("Background download from %s failed: %s", provider.name, e)
+    return _download_capped(streamed[-1].url(image_path), path)
+
+def _write_file(path, content):
+    """Write ``content`` beside ``path`` and rename it, so readers never see a partial file."""
+    temp_path = f'{path}.{threading.get_ident()}.part'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+def _record_download(nbytes, background=False):
+    try:
+        with sqlite3.connect(DATABASE_NAME, timeout=30) as conn:
+            bandwidth.ensure_table(conn)
+            bandwidth.record(conn, nbytes, background)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+
+def background_blocked():
+    """Return why background downloads may not run now, or None."""
+    if bandwidth.limiter.is_paused():
+        return "background downloads paused"
+    budget = load_settings().get('background_daily_budget_mb', 0)
+    if budget:
+        with sqlite3.connect(DATABASE_NAME, timeout=30) as conn:
+            bandwidth.ensure_table(conn)
+            used = bandwidth.daily(conn)[1]
+        if used >= budget * 1000000:
+            return "daily background budget used"
+    return None
+
+def bandwidth_usage():
+    """Return the session and daily download counters with the configured limits."""
+    settings = load_settings()
+    with sqlite3.connect(DATABASE_NAME, timeout=30) as conn:
+        bandwidth.ensure_table(conn)
+        today_bytes, today_background = bandwidth.daily(conn)
+    return {
+        'session': bandwidth.session(),
+        'today': {'bytes': today_bytes, 'background_bytes': today_background},
+        'background_bandwidth_mbps': settings.get('background_bandwidth_mbps', 0),
+        'background_daily_budget_mb': settings.get('background_daily_budget_mb', 0),
+        'paused': bandwidth.limiter.is_paused(),
+    }
+
+def _download_capped(url, path):
+    """Stream ``url`` under the background bandwidth cap, resuming a partial file."""
+    reason = background_blocked()
+    if reason:
+        raise bandwidth.Paused(reason)
+    mbps = load_settings().get('background_bandwidth_mbps', 0)
+    bandwidth.limiter.configure(mbps * bandwidth.BYTES_PER_MBIT)
+    bandwidth.download(url, path, record=lambda nbytes: _record_download(nbytes, background=True))
+    return path
+
+def _fetch_image(image_url, file_path, image_path):
+    """Download ``image_url`` to ``image_path`` unless present, then verify and index it.
+
+    A file that is not a complete image or cannot be hashed is deleted,
+    so the next attempt downloads it again.
+    """
+    if os.path.exists(image_path):
+        metrics.incr('image_cache_hits_total')
+    else:
+        metrics.incr('image_cache_misses_total')
+        _download(image_url, image_path)
+    try:
+        if not image_processing.verify(image_path):
+            raise ValueError(f"Not a complete image: {image_path}")
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            image_path = _index_image(conn, file_path, image_path)
+    except sqlite3.Error:
+        raise
+    except Exception:
+        metrics.incr('image_verify_failures_total')
+        try:
+            os.remove(image_path)
+        except OSError:
+            pass
+        raise
+    prune_image_cache(keep=[image_path])
+    return image_path
+
+PRUNE_INTERVAL = 300
+_last_prune = None
+
+def prune_image_cache(keep=(), force=False):
+    """Trim the image cache to ``image_cache_max_mb``, at most once per ``PRUNE_INTERVAL``.
+
+    The current wallpaper and pinned history entries are kept.
+    """
+    global _last_prune
+    max_mb = load_settings().get('image_cache_max_mb', image_cache.DEFAULT_MAX_MB)
+    now = time.monotonic()
+    if not max_mb or (not force and _last_prune is not None and now - _last_prune < PRUNE_INTERVAL):
+        return 0
+    _last_prune = now
+    try:
+        with sqlite3.connect(DATABASE_NAME, timeout=30) as conn:
+            image_hash.ensure_table(conn)
+            history.ensure_table(conn)
+            pinned = [row[0] for row in conn.execute("SELECT local_path FROM wallpaper_history WHERE pinned=1")]
+            return image_cache.prune(conn, image_dir, max_mb * 1024 * 1024, [*keep, _current_wallpaper, *pinned])
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return 0
+
+_upgrade_executor = None
+_upgrade_lock = threading.Lock()
+# Preview path -> original, for previews replaced before they were applied
+_upgraded = {}
+
+def _upgrades():
+    """Return the thread pool that downloads originals after a preview."""
+    global _upgrade_executor
+    with _upgrade_lock:
+        if _upgrade_executor is None:
+            _upgrade_executor = ThreadPoolExecutor(max_workers=UPGRADE_WORKERS, thread_name_prefix='upgrade')
+        return _upgrade_executor
+
+def wait_for_upgrades():
+    """Block until the pending full-size downloads have finished."""
+    global _upgrade_executor
+    with _upgrade_lock:
+        executor, _upgrade_executor = _upgrade_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+@timed('save_image_progressive')
+def save_image_progressive(image_url, title_name):
+    """Return a local image for ``image_url`` as quickly as possible.
+
+    A cached original is returned as is.  Otherwise the small
+    ``PREVIEW_SIZE`` rendition is downloaded and returned, and the
+    original is fetched in the background and swapped in once it is
+    complete and verified.
+    """
+    file_name = os.path.basename(urlparse(image_url).path)
+    try:
+        if not file_name or os.path.exists(os.path.join(image_dir, file_name)) or _cached_image(f'/{file_name}'):
+            return save_image(image_url, title_name)
+        preview_dir = os.path.join(image_dir, 'preview')
+        os.makedirs(preview_dir, exist_ok=True)
+        preview_url = f"{TMDB_IMAGE_URL}/{PREVIEW_SIZE}/{file_name}"
+        preview_path = _download_flights.do(
+            (preview_url, _is_background()), _download, preview_url, os.path.join(preview_dir, file_name)
+        )
+    except Exception as e:
+        logging.error("Error saving preview: %s", e)
+        return save_image(image_url, title_name)
+
+    metrics.incr('progressive_previews_total')
+    future = _upgrades().submit(save_image, image_url, title_name)
+    future.add_done_callback(functools.partial(_apply_upgrade, preview_path, title_name))
+    return preview_path
+
+def _apply_upgrade(preview_path, title_name, future):
+    """Swap the downloaded original in for its preview."""
+    full_path = None if future.cancelled() or future.exception() else future.result()
+    if not full_path or not image_processing.verify(full_path):
+        metrics.incr('progressive_upgrade_failures_total')
+        logging.error("Could not download the full-size image for %s", title_name)
+        return
+    with _upgrade_lock:
+        _upgraded[preview_path] = full_path
+        showing = _current_wallpaper == preview_path
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            history.ensure_table(conn)
+            history.replace_path(conn, preview_path, full_path, f'/{os.path.basename(full_path)}')
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+    if showing and apply_wallpaper(full_path, title_name):
+        metrics.incr('progressive_upgrades_total')
+        try:
+            with sqlite3.connect(DATABASE_NAME) as conn:
+                image_hash.mark_shown(conn, full_path)
+        except sqlite3.Error as e:
+            logging.error("Database Error: %s", e)
+    try:
+        os.remove(preview_path)
+    except OSError:
+        pass
+
+def mark_shown(image_path, title_name=""):
+    """Record that ``image_path`` was applied, in the history and duplicate index."""
+    with _upgrade_lock:
+        image_path = _upgraded.pop(image_path, image_path)
+    image_cache.touch(image_path)
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            image_hash.ensure_table(conn)
+            image_hash.mark_shown(conn, image_path)
+            file_path = None
+            if os.path.dirname(os.path.abspath(image_path)) == os.path.abspath(image_dir):
+                file_path = f'/{os.path.basename(image_path)}'
+            history.ensure_table(conn)
+            history.record(conn, title_name or os.path.basename(image_path), image_path, file_path)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+
+def stored_tmdb_id(title_name, media_type):
+    """Return the TMDB id stored for a title, if it was resolved before."""
+    if not os.path.exists(DATABASE_NAME):
+        return None
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            row = conn.execute(
+                "SELECT tmdb_id FROM titles WHERE name=? AND media_type=?",
+                (title_name, media_type.lower()),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
         return None
+    return row[0] if row else None
+
+def _update_failures(action, *args):
+    """Update the negative cache with ``action(conn, *args)``."""
+    if not os.path.exists(DATABASE_NAME):
+        return
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            title_failures.ensure_table(conn)
+            action(conn, *args)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+
+def failed_since(title_name, media_type, since):
+    """Return True if the negative cache recorded a failure of the title since ``since``.
+
+    Lookups return None both for network errors and for titles without a
+    match or backdrop; only the latter are recorded, so jobs use this to
+    tell a permanent outcome from one worth retrying.
+    """
+    if not os.path.exists(DATABASE_NAME):
+        return False
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            title_failures.ensure_table(conn)
+            return title_failures.failed_since(conn, title_name, media_type.lower(), since)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return False
+
+def store_tmdb_id(title_name, media_type, media_id):
+    """Remember the TMDB id of a title so later changes skip the search."""
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            conn.execute(
+                "UPDATE titles SET tmdb_id=? WHERE name=? AND media_type=?",
+                (media_id, title_name, media_type.lower()),
+            )
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+
+def download_wallpaper(title_name, media_type, api_key, media_id=None, progressive=False):
+    """Download a wallpaper for the given title and return the file path.
+
+    The TMDB search is skipped when ``media_id`` is given or the title's
+    id was stored by an earlier change or import.  With ``progressive``,
+    an uncached backdrop is returned as a quick low-resolution copy
+    that is replaced by the original in the background.
+    """
+    media_id = media_id or stored_tmdb_id(title_name, media_type)
+    if not media_id:
+        media_id = fetch_media_info(title_name, media_type, api_key)
+        if not media_id:
+            logging.error("No title found with the name: %s", title_name)
+            return None
+        store_tmdb_id(title_name, media_type, media_id)
     image_url = fetch_backdrop_image(media_id, media_type, api_key)
     if not image_url:
-        logging.error(f"No backdrops found for the title: {title_name}")
+        logging.error("No backdrops found for the title: %s", title_name)
         return None
-    return save_image(image_url, title_name)
+    image_path = (save_image_progressive if progressive else save_image)(image_url, title_name)
+    if image_path:
+        _update_failures(title_failures.clear, title_name, media_type.lower())
+    return image_path
 
-def download_random_image(api_key):
-    """Get a random title from the database and download its wallpaper."""
-    conn = sqlite3.connect('titles.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM titles")
-    rows = c.fetchall()
+def prefetch_jobs(conn):
+    """Return ``(key, payload)`` prefetch jobs for every favorite."""
+    rows = conn.execute("SELECT name, media_type, tmdb_id FROM titles").fetchall()
+    return [
+        (f'{PREFETCH_JOB}:{media_type}:{name}', {'name': name, 'media_type': media_type, 'tmdb_id': tmdb_id})
+        for name, media_type, tmdb_id in rows
+    ]
+
+def prefetch_title(payload):
+    """Download a wallpaper for one title without applying it; runs ``prefetch`` jobs."""
+    api_key = load_settings().get('api_key')
+    if not api_key:
+        raise ValueError("No TMDB API key")
+    started = time.time()
+    if download_wallpaper(payload['name'], payload['media_type'], api_key, payload.get('tmdb_id')):
+        return
+    reason = background_blocked()
+    if reason:
+        # The partial download is kept and resumed when the job runs again
+        raise jobs.Deferred(reason)
+    if not failed_since(payload['name'], payload['media_type'], started):
+        raise RuntimeError(f"Could not download a wallpaper for {payload['name']}")
+
+def metadata_jobs(conn):
+    """Return ``(key, payload)`` jobs for the favorites whose TMDB details are missing or old."""
+    return [
+        (f'{METADATA_JOB}:{media_type}:{tmdb_id}', {'media_type': media_type, 'tmdb_id': tmdb_id})
+        for media_type, tmdb_id in metadata.stale_titles(conn)
+    ]
+
+def fetch_metadata(payload):
+    """Mirror the TMDB details of one title; runs ``metadata`` jobs."""
+    api_key = load_settings().get('api_key')
+    if not api_key:
+        raise ValueError("No TMDB API key")
+    details = metadata.fetch_details(payload['media_type'], payload['tmdb_id'], TMDB_API_URL, api_key)
+    with sqlite3.connect(DATABASE_NAME, timeout=30) as conn:
+        metadata.store(conn, payload['media_type'], payload['tmdb_id'], details)
+
+def _pick_local_image(conn, has_titles):
+    """Return a random local library image when it is the library's turn."""
+    local_library.ensure_tables(conn)
+    if not local_library.image_count(conn):
+        return None
+    share = load_settings().get('local_share', DEFAULT_LOCAL_SHARE)
+    if has_titles and random.random() >= share:
+        return None
+    path = local_library.random_image(conn)
+    if path and os.path.exists(path):
+        return path
+    return None
+
+def _pick_discovered_title(conn, has_titles):
+    """Return a random discovered title when it is the pools' turn."""
+    discovery.ensure_tables(conn)
+    share = load_settings().get('discovery_share', DEFAULT_DISCOVERY_SHARE)
+    if has_titles and random.random() >= share:
+        return None
+    return discovery.random_title(conn)
+
+def _favorite_rows(conn, filters):
+    """Return ``(name, media_type, tmdb_id, rating, popularity)`` of the selectable favorites."""
+    select = f"SELECT t.name, t.media_type, t.tmdb_id, m.rating, m.popularity FROM titles t {metadata.JOIN}"
+    query = select + """
+        WHERE NOT EXISTS (
+            SELECT 1 FROM title_failures f
+            WHERE f.name = t.name AND f.media_type = t.media_type AND f.retry_at > ?
+        )
+    """
+    conditions, params = metadata.filter_sql(filters)
+    if conditions:
+        rows = conn.execute(query + ''.join(f' AND {c}' for c in conditions), (time.time(), *params)).fetchall()
+        if rows:
+            return rows
+        logging.warning("No titles match the selection filters, ignoring them")
+    rows = conn.execute(query, (time.time(),)).fetchall()
+    if not rows:
+        # Every title is backing off; retrying one beats showing nothing.
+        rows = conn.execute(select).fetchall()
+    return rows
+
+def download_random_image(api_key, progressive=False):
+    """Get a random title from the database and download its wallpaper.
+
+    Favorites are narrowed by the ``selection_filters`` setting and
+    weighted by ``selection_weight`` (``"rating"`` or ``"popularity"``)
+    using the mirrored TMDB details.  ``selection_filters`` may name
+    ``tags`` to rotate through tagged favorites only.
+    """
+    settings = load_settings()
+    conn = sqlite3.connect(DATABASE_NAME)
+    title_failures.ensure_table(conn)
+    metadata.ensure_tables(conn)
+    favorites.ensure_table(conn)
+    rows = _favorite_rows(conn, settings.get('selection_filters') or {})
+    local_path = _pick_local_image(conn, bool(rows))
+    if local_path:
+        metrics.incr('local_library_picks_total')
+        conn.close()
+        return local_path, os.path.basename(local_path)
+    discovered = _pick_discovered_title(conn, bool(rows))
+    if discovered:
+        metrics.incr('discovery_picks_total')
+        rows = [(*discovered, None, None)]
     if not rows:
         logging.error("No titles found in the database.")
         conn.close()
         return None, ""
 
-    settings = load_settings()
-    last_title = settings.get('last_title', "")
-    while True:
-        title_name, media_type = random.choice(rows)
-        if title_name != last_title or len(rows) == 1:
-            break
-
-    settings['last_title'] = title_name
-    save_settings(settings)
+    history.ensure_table(conn)
+    recent = history.recent_titles(conn, min(history.RECENT_TITLES, len(rows) - 1))
+    candidates = [row for row in rows if row[0] not in recent] or rows
+    weight_by = settings.get('selection_weight')
+    title_name, media_type, media_id, _, _ = random.choices(
+        candidates, [metadata.weight(row[3], row[4], weight_by) for row in candidates]
+    )[0]
     conn.close()
 
-    image_path = download_wallpaper(title_name, media_type, api_key)
+    image_path = download_wallpaper(title_name, media_type, api_key, media_id, progressive=progressive)
     return image_path, title_name
-
+
+@timed('set_wallpaper')
 def set_wallpaper(image_path):
     """Set the wallpaper on the current platform."""
     system = platform.system()
@@ -182,87 +789,273 @@ def set_wallpaper(image_path):
             except Exception:
                 subprocess.run(["feh", "--bg-scale", image_path], check=True)
         else:
-            logging.error(f"Unsupported OS: {system}")
+            logging.error("Unsupported OS: %s", system)
             return False
         return True
     except Exception as e:
-        logging.error(f"Error setting wallpaper: {e}")
+        logging.error("Error setting wallpaper: %s", e)
         return False
-
-def change_wallpaper():
-    """Download a random wallpaper and set it as the background."""
-    api_key = get_api_key()
-    if not api_key:
-        return 1, ""
-    image_path, title_name = download_random_image(api_key)
+
+# Primary screen size in pixels; QScreen may only be read on the GUI thread
+_screen_size = None
+
+def update_screen_size():
+    """Store the primary screen's size in pixels and return it; call on the GUI thread."""
+    global _screen_size
+    app = QApplication.instance()
+    screen = app.primaryScreen() if app is not None else None
+    if screen is None:
+        _screen_size = None
+    else:
+        ratio = screen.devicePixelRatio()
+        size = screen.size()
+        _screen_size = int(size.width() * ratio), int(size.height() * ratio)
+    return _screen_size
+
+def _target_size(options):
+    """Return the processing target size in pixels, or None if unknown.
+
+    Worker threads read the size stored by :func:`update_screen_size`.
+    """
+    width = int(options.get('width') or 0)
+    height = int(options.get('height') or 0)
+    if width and height:
+        return width, height
+    if _screen_size is not None:
+        return _screen_size
+    app = QApplication.instance()
+    if app is not None and QThread.currentThread() == app.thread():
+        return update_screen_size()
+    return None
+
+def _apply_processed(source, future):
+    """Swap in the processed rendition of ``source`` once it is ready."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logging.error("Error processing image: %s", error)
+        return
+    if _current_wallpaper == source:
+        set_wallpaper(future.result())
+
+def apply_wallpaper(image_path, title_name=""):
+    """Set the wallpaper, using a processed rendition when enabled.
+
+    With post-processing enabled a cached rendition is applied directly.
+    Otherwise the original is applied at once and the processed file is
+    swapped in when the process pool finishes it.
+    """
+    global _current_wallpaper
+    with _upgrade_lock:
+        image_path = _upgraded.get(image_path, image_path)
+        _current_wallpaper = image_path
+    options = load_settings().get('processing', {})
+    if not options.get('enabled') or not image_processing.is_available():
+        return set_wallpaper(image_path)
+    target_size = _target_size(options)
+    if not target_size:
+        return set_wallpaper(image_path)
+
+    ops = image_processing.build_ops(options, title_name)
+    try:
+        future = image_processing.submit(image_path, target_size, ops, processed_dir)
+    except OSError as e:
+        logging.error("Error processing image: %s", e)
+        return set_wallpaper(image_path)
+    if future.done() and future.exception() is None:
+        metrics.incr('processed_cache_hits_total')
+        return set_wallpaper(future.result())
+    metrics.incr('processed_cache_misses_total')
+    if not set_wallpaper(image_path):
+        return False
+    future.add_done_callback(functools.partial(_apply_processed, image_path))
+    return True
+
+def pick_cached_image():
+    """Return ``(local_path, title)`` of a random image that needs no download.
+
+    Images shown before are preferred, skipping the recent titles, then
+    the local library; returns ``(None, "")`` if nothing is on disk.
+    """
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            history.ensure_table(conn)
+            recent = history.recent_titles(conn)
+            cached = [row for row in history.cached_images(conn) if os.path.exists(row[1])]
+            fresh = [row for row in cached if row[0] not in recent]
+            if fresh or cached:
+                title_name, local_path = random.choice(fresh or cached)
+                return local_path, title_name
+            local_library.ensure_tables(conn)
+            path = local_library.random_image(conn)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return None, ""
+    if path and os.path.exists(path):
+        return path, os.path.basename(path)
+    return None, ""
+
+@timed('change_wallpaper', failed=lambda result: result[0] != 0)
+def change_wallpaper(cached_only=False):
+    """Set a random wallpaper, downloading it unless ``cached_only``."""
+    if cached_only:
+        metrics.incr('cached_only_changes_total')
+        image_path, title_name = pick_cached_image()
+    else:
+        api_key = get_api_key()
+        if not api_key:
+            return 1, ""
+        progressive = load_settings().get('progressive_apply', True)
+        image_path, title_name = download_random_image(api_key, progressive=progressive)
     if not image_path:
         return 1, ""
-    if set_wallpaper(image_path):
+    if apply_wallpaper(image_path, title_name):
+        mark_shown(image_path, title_name)
         return 0, title_name
     logging.error("Failed to set the wallpaper.")
     return 1, ""
-
+
+@timed('set_specific_wallpaper', failed=lambda result: result[0] != 0)
 def set_specific_wallpaper(title_name, media_type):
     """Set the wallpaper to a specific movie or TV show."""
     api_key = get_api_key()
     if not api_key:
         return 1, ""
-    image_path = download_wallpaper(title_name, media_type, api_key)
+    progressive = load_settings().get('progressive_apply', True)
+    image_path = download_wallpaper(title_name, media_type, api_key, progressive=progressive)
     if not image_path:
         return 1, ""
-    if set_wallpaper(image_path):
-        settings = load_settings()
-        settings['last_title'] = title_name
-        save_settings(settings)
+    if apply_wallpaper(image_path, title_name):
+        mark_shown(image_path, title_name)
+        return 0, title_name
+    logging.error("Failed to set the wallpaper.")
+    return 1, ""
+
+def step_history(direction):
+    """Re-apply the previous (``-1``) or next (``1``) wallpaper from the history.
+
+    Only cached files are used, so this never touches the network.
+    Returns ``(status, title)`` like :func:`change_wallpaper`.
+    """
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            history.ensure_table(conn)
+            entry = history.step(conn, direction)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return 1, ""
+    if entry is None:
+        return 1, ""
+    _, title_name, local_path, _ = entry
+    if apply_wallpaper(local_path, title_name):
         return 0, title_name
     logging.error("Failed to set the wallpaper.")
     return 1, ""
-
-def initialize_database():
-    """Initialize the database with a predefined list of movies and TV shows."""
-    titles = [
-        ("The Grand Budapest Hotel", "movie"),
-        ("The Truman Show", "movie"),
-        ("500 Days of Summer", "movie"),
-        ("Blade Runner 2049", "movie"),
-        ("Inception", "movie"),
-        ("Spirited Away", "movie"),
-        ("Her", "movie"),
-        ("Whiplash", "movie"),
-        ("Mad Max Fury Road", "movie"),
-        ("Inglourious Basterds", "movie"),
-        ("Fargo", "tv"),
-        ("True Detective", "tv"),
-        ("The Crown", "tv"),
-        ("The Handmaid's Tale", "tv"),
-        ("Peaky Blinders", "tv"),
-        ("Dark", "tv"),
-        ("Mindhunter", "tv"),
-        ("The Expanse", "tv"),
-        ("Better Call Saul", "tv"),
-        ("Fleabag", "tv")
-    ]
-
-    conn = sqlite3.connect('titles.db')
-    c = conn.cursor()
-    
-    # Create the titles table if it doesn't exist
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS titles (
-            name TEXT NOT NULL,
-            media_type TEXT NOT NULL,
-            UNIQUE(name, media_type)
-        )
-    ''')
-
-    # Insert the predefined titles into the table
-    c.executemany('''
-        INSERT OR IGNORE INTO titles (name, media_type) VALUES (?, ?)
-    ''', titles)
-    
-    conn.commit()
-    conn.close()
-
+
+def previous_wallpaper():
+    """Go back to the wallpaper shown before the current one."""
+    return step_history(-1)
+
+def next_wallpaper():
+    """Go forward in the history, or change to a new wallpaper at its end."""
+    result = step_history(1)
+    return result if result[0] == 0 else change_wallpaper()
+
+def toggle_pin():
+    """Pin or unpin the current wallpaper; return the new state, or None."""
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            history.ensure_table(conn)
+            entry = history.current(conn)
+            if entry is None:
+                return None
+            history.set_pinned(conn, entry[0], not entry[3])
+            return not entry[3]
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return None
+
+def current_wallpaper():
+    """Return the current history entry as ``(id, title, local_path, pinned)``, or None."""
+    if not os.path.exists(DATABASE_NAME):
+        return None
+    try:
+        with sqlite3.connect(DATABASE_NAME) as conn:
+            history.ensure_table(conn)
+            return history.current(conn)
+    except sqlite3.Error as e:
+        logging.error("Database Error: %s", e)
+        return None
+
+def is_pinned():
+    """Return True if the current wallpaper is pinned."""
+    entry = current_wallpaper()
+    return bool(entry and entry[3])
+
+def _ensure_column(conn, table, column, declaration):
+    """Add ``column`` to ``table`` when upgrading an older database."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+def initialize_database():
+    """Initialize the database with a predefined list of movies and TV shows."""
+    titles = [
+        ("The Grand Budapest Hotel", "movie"),
+        ("The Truman Show", "movie"),
+        ("500 Days of Summer", "movie"),
+        ("Blade Runner 2049", "movie"),
+        ("Inception", "movie"),
+        ("Spirited Away", "movie"),
+        ("Her", "movie"),
+        ("Whiplash", "movie"),
+        ("Mad Max Fury Road", "movie"),
+        ("Inglourious Basterds", "movie"),
+        ("Fargo", "tv"),
+        ("True Detective", "tv"),
+        ("The Crown", "tv"),
+        ("The Handmaid's Tale", "tv"),
+        ("Peaky Blinders", "tv"),
+        ("Dark", "tv"),
+        ("Mindhunter", "tv"),
+        ("The Expanse", "tv"),
+        ("Better Call Saul", "tv"),
+        ("Fleabag", "tv")
+    ]
+
+    conn = sqlite3.connect(DATABASE_NAME)
+    c = conn.cursor()
+    
+    # Create the titles table if it doesn't exist
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS titles (
+            name TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            tmdb_id INTEGER,
+            UNIQUE(name, media_type)
+        )
+    ''')
+    _ensure_column(conn, 'titles', 'tmdb_id', 'INTEGER')
+
+    # Insert the predefined titles into the table
+    c.executemany('''
+        INSERT OR IGNORE INTO titles (name, media_type) VALUES (?, ?)
+    ''', titles)
+
+    image_hash.ensure_table(conn)
+    local_library.ensure_tables(conn)
+    title_failures.ensure_table(conn)
+    backdrops.ensure_table(conn)
+    discovery.ensure_tables(conn)
+    history.ensure_table(conn)
+    jobs.ensure_table(conn)
+    metadata.ensure_tables(conn)
+    favorites.ensure_table(conn)
+    
+    conn.commit()
+    conn.close()
+
 if __name__ == '__main__':
     configure_logging()
     app = QApplication(sys.argv)
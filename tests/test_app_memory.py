@@ -0,0 +1,57 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import pytest
+from PyQt5.QtCore import QCoreApplication, QEvent
+from PyQt5.QtWidgets import QApplication, QDialog, QWidget
+from framechanger import app as gui
+from framechanger import wallpaper_changer as wc
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='needs /proc to read RSS')
+
+_qt_app = None
+
+
+def rss():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def settle():
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    QApplication.processEvents()
+
+
+def test_soak_changes_keep_memory_flat(tmp_path, monkeypatch):
+    global _qt_app
+    _qt_app = QApplication.instance() or QApplication([])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'settings_file', str(tmp_path / 'settings.json'))
+    monkeypatch.setattr(gui, 'show_welcome_message', lambda: None)
+    monkeypatch.setattr(gui, 'change_wallpaper', lambda cached_only=False: (0, 'Inception'))
+    monkeypatch.setattr(gui, 'is_pinned', lambda: False)
+    monkeypatch.setattr(QDialog, 'exec_', lambda self: QDialog.Accepted)
+    image = tmp_path / 'still.png'
+    gui.QPixmap(640, 360).save(str(image))
+
+    window = gui.MainWindow()
+    def iteration():
+        window.auto_change_wallpaper()
+        window.show_titles()
+        window.show_preview_dialog(str(image))
+        settle()
+
+    for _ in range(300):
+        iteration()
+    widgets = len(window.findChildren(QWidget))
+    baseline = rss()
+    for _ in range(3000):
+        iteration()
+
+    assert len(window.findChildren(QWidget)) == widgets
+    assert window.title_model.rowCount() == 20
+    assert rss() - baseline < 8 * 1024 * 1024
+    window.tray_icon.hide()
+    window.deleteLater()
+    settle()
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication, QLineEdit
+from framechanger import app as gui
+from framechanger import autocomplete as ac
+from framechanger import wallpaper_changer as wc
+
+_qt_app = None
+
+MATRIX = [ac.Suggestion(603, 'The Matrix', '1999', 'movie'), ac.Suggestion(604, 'The Matrix Reloaded', '2003', 'movie')]
+
+
+def qt_app():
+    global _qt_app
+    if _qt_app is None:
+        _qt_app = QApplication.instance() or QApplication([])
+    return _qt_app
+
+
+def process_events(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        qt_app().processEvents()
+        time.sleep(0.01)
+
+
+def test_cache_reuses_complete_prefixes():
+    cache = ac.SuggestionCache(maxsize=2)
+    cache.put('movie', 'the m', MATRIX, True)
+    assert cache.get('movie', 'The  M') == MATRIX
+    assert cache.get('movie', 'the matrix re') == MATRIX[1:]
+    assert cache.get('tv', 'the m') is None
+    cache.put('movie', 'her', [], False)
+    assert cache.get('movie', 'here') is None
+    cache.put('movie', 'dune', [], True)
+    assert cache.get('movie', 'the m') is None
+
+
+def test_search_parses_results(monkeypatch):
+    class Response:
+        def raise_for_status(self):
+            pass
+        def json(self):
+            return {'total_results': 1, 'results': [{'id': 1399, 'name': 'Game of Thrones', 'first_air_date': '2011-04-17'}]}
+    urls = []
+    monkeypatch.setattr(ac.governor, 'get', lambda url, priority=None: urls.append(url) or Response())
+    suggestions, complete = ac.search('game of', 'tv', 'http://api', 'KEY')
+    assert suggestions == [ac.Suggestion(1399, 'Game of Thrones', '2011', 'tv')] and complete
+    assert urls == ['http://api/search/tv?api_key=KEY&query=game%20of']
+
+
+def test_debounced_suggestions_and_choice():
+    qt_app()
+    edit = QLineEdit()
+    edit.show()
+    edit.setFocus()
+    completer = ac.Autocompleter(edit, lambda: 'movie', lambda: 'KEY', 'http://api')
+    queries = []
+    completer.search = lambda query, *args: queries.append(query) or (MATRIX, True)
+
+    QTest.keyClicks(edit, 'matr')
+    process_events(0.6)
+    assert queries == ['matr']
+    assert completer.model.stringList() == ['The Matrix (1999)', 'The Matrix Reloaded (2003)']
+
+    # Extending a complete query is answered from the cache
+    QTest.keyClicks(edit, 'ix r')
+    process_events(0.6)
+    assert queries == ['matr']
+    assert completer.model.stringList() == ['The Matrix Reloaded (2003)']
+
+    QTest.keyClick(completer.completer.popup(), Qt.Key_Down)
+    QTest.keyClick(completer.completer.popup(), Qt.Key_Return)
+    process_events(0.1)
+    assert edit.text() == 'The Matrix Reloaded'
+    assert completer.chosen('The Matrix Reloaded', 'movie').tmdb_id == 604
+    assert completer.chosen('The Matrix Reloaded', 'tv') is None
+
+    # Replies for text that has changed since are dropped
+    completer.show_results(completer._generation - 1, [])
+    assert completer.model.stringList() == ['The Matrix Reloaded (2003)']
+    completer.shutdown()
+    edit.deleteLater()
+
+
+def test_suggestion_with_colon_is_added(tmp_path, monkeypatch):
+    qt_app()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'settings_file', str(tmp_path / 'settings.json'))
+    monkeypatch.setattr(gui, 'show_welcome_message', lambda: None)
+    window = gui.MainWindow()
+    try:
+        window.movie_button.setChecked(True)
+        window.title_input.setText('Mission: Impossible')
+        window.autocompleter.selected = ac.Suggestion(954, 'Mission: Impossible', '1996', 'movie')
+        window.add_title()
+        with sqlite3.connect(wc.DATABASE_NAME) as conn:
+            row = conn.execute("SELECT name FROM titles WHERE tmdb_id=954").fetchone()
+        assert row == ('Mission - Impossible',)
+        assert window.title_input.text() == ''
+    finally:
+        window.jobs.stop()
+        window.autocompleter.shutdown()
+        window.tray_icon.hide()
+        window.deleteLater()
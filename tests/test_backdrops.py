@@ -0,0 +1,78 @@
+import os
+import random
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import backdrops
+from framechanger import wallpaper_changer as wc
+
+
+def image(file_path, width=1920, height=1080, votes=0, average=0.0, language=None):
+    return {'file_path': file_path, 'width': width, 'height': height,
+            'vote_count': votes, 'vote_average': average, 'iso_639_1': language}
+
+
+def test_rank_filters_and_orders_by_score():
+    ranked = backdrops.rank([
+        image('/liked.jpg', 3840, 2160, votes=40, average=8.0),
+        image('/plain.jpg'),
+        image('/text.jpg', language='en'),
+        image('/small.jpg', 640, 360),
+        image('/square.jpg', 1000, 1000),
+    ])
+    assert [file_path for file_path, _, _ in ranked] == ['/liked.jpg', '/plain.jpg']
+    assert ranked[-1][2] == sum(value for _, value, _ in ranked)
+
+
+def test_rank_falls_back_to_closest_shape():
+    ranked = backdrops.rank([image('/wide.jpg'), image('/small.jpg', 640, 360)], target_ratio=4 / 3)
+    assert sorted(file_path for file_path, _, _ in ranked) == ['/small.jpg', '/wide.jpg']
+
+
+def test_pick_follows_weights_and_respects_allowed():
+    ranked = [('/a.jpg', 9.0, 9.0), ('/b.jpg', 1.0, 10.0)]
+    rng = random.Random(0)
+    picks = [backdrops.pick(ranked, rng=rng) for _ in range(1000)]
+    assert 850 < picks.count('/a.jpg') < 950
+    assert {backdrops.pick(ranked, {'/b.jpg'}.__contains__, rng) for _ in range(20)} == {'/b.jpg'}
+    # When nothing is allowed the best backdrop is used
+    assert backdrops.pick(ranked, lambda file_path: False, rng) == '/a.jpg'
+
+
+def test_ranking_cache_keeps_cumulative_weights():
+    cache = backdrops.RankingCache(maxsize=1, ttl=10)
+    ranked = [('/a.jpg', 9.0, 9.0), ('/b.jpg', 1.0, 10.0)]
+    ranking = cache.put(('movie', 5, 1.78), ranked, now=0)
+    assert ranking.cumulative == [9.0, 10.0]
+    assert cache.get(('movie', 5, 1.78), now=5) is ranking
+    assert cache.get(('movie', 5, 1.78), now=11) is None
+    cache.put(('movie', 6, 1.78), ranked, now=0)
+    assert cache.get(('movie', 5, 1.78), now=1) is None
+    assert backdrops.pick(ranking.entries, rng=random.Random(0), cumulative=ranking.cumulative) in ('/a.jpg', '/b.jpg')
+
+
+def test_ranking_is_fetched_once_per_title(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'settings_file', str(tmp_path / 'settings.json'))
+    wc.initialize_database()
+    calls = []
+
+    class MockResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'backdrops': [image('/a.jpg', votes=10, average=9.0), image('/b.jpg')]}
+
+    monkeypatch.setattr(wc, '_rankings', backdrops.RankingCache())
+    monkeypatch.setattr(wc.requests, 'get', lambda url: calls.append(url) or MockResponse())
+    loads = []
+    original_load = backdrops.load
+    monkeypatch.setattr(backdrops, 'load', lambda *args: loads.append(args) or original_load(*args))
+    urls = {wc.fetch_backdrop_image(5, 'movie', 'KEY') for _ in range(20)}
+    assert len(calls) == 1
+    # Later picks use the ranking in memory instead of reading the table
+    assert len(loads) == 1
+    assert urls <= {f'{wc.TMDB_IMAGE_URL}/original/a.jpg', f'{wc.TMDB_IMAGE_URL}/original/b.jpg'}
+    with sqlite3.connect(wc.DATABASE_NAME) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM backdrop_rankings").fetchone()[0] == 2
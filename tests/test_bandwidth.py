@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import bandwidth
+from framechanger import wallpaper_changer as wc
+from framechanger.rate_limit import BACKGROUND, governor
+
+BODY = bytes(range(256)) * 1024
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    ranges = []
+
+    def do_GET(self):
+        start = 0
+        header = self.headers.get('Range')
+        self.ranges.append(header)
+        if header:
+            start = int(header.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(BODY) - 1}/{len(BODY)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(BODY) - start))
+        self.end_headers()
+        self.wfile.write(BODY[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.ranges = []
+    httpd = HTTPServer(('127.0.0.1', 0), RangeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/original/abc.jpg'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_limiter_paces_after_burst(monkeypatch):
+    waits = []
+    monkeypatch.setattr(bandwidth.time, 'sleep', waits.append)
+    limiter = bandwidth.BandwidthLimiter(rate=100000)
+    assert limiter.consume(100000) == 0
+    assert limiter.consume(50000) == pytest.approx(0.5, abs=0.05)
+    assert limiter.consume(50000) == pytest.approx(1.0, abs=0.05)
+    assert waits == [pytest.approx(0.5, abs=0.05), pytest.approx(1.0, abs=0.05)]
+    assert bandwidth.BandwidthLimiter().consume(10 ** 9) == 0
+
+
+def test_restrict_keeps_the_lower_rate():
+    limiter = bandwidth.BandwidthLimiter(rate=0)
+    limiter.restrict(1000)
+    assert limiter.rate == 1000
+    limiter.configure(5000)
+    assert limiter.rate == 1000
+    limiter.configure(500)
+    assert limiter.rate == 500
+    limiter.restrict(0)
+    limiter.configure(5000)
+    assert limiter.rate == 5000
+
+
+def test_paused_download_resumes_from_partial_file(tmp_path, server):
+    path = str(tmp_path / 'abc.jpg')
+    limiter = bandwidth.BandwidthLimiter()
+    received = []
+    pause_after = [3]
+    original_consume = limiter.consume
+    def consume(nbytes):
+        pause_after[0] -= 1
+        if not pause_after[0]:
+            limiter.pause()
+        return original_consume(nbytes)
+    limiter.consume = consume
+
+    with pytest.raises(bandwidth.Paused):
+        bandwidth.download(server, path, limiter, record=received.append)
+    assert not os.path.exists(path)
+    assert os.path.getsize(path + '.part') == received[0] > 0
+
+    limiter.resume()
+    bandwidth.download(server, path, limiter, record=received.append)
+    assert open(path, 'rb').read() == BODY
+    assert not os.path.exists(path + '.part')
+    assert sum(received) == len(BODY)
+    assert RangeHandler.ranges == [None, f'bytes={received[0]}-']
+
+
+def test_background_download_is_counted(tmp_path, server, monkeypatch):
+    db = str(tmp_path / 'titles.db')
+    monkeypatch.setattr(wc, 'DATABASE_NAME', db)
+    monkeypatch.setattr(wc, 'TMDB_IMAGE_URL', server.rsplit('/original/', 1)[0])
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'background_daily_budget_mb': 0.25})
+    before = bandwidth.session()
+    with governor.priority(BACKGROUND):
+        wc._download(server, str(tmp_path / 'abc.jpg'))
+        # The budget is used up, so the next background download waits
+        assert wc.background_blocked() == 'daily background budget used'
+        with pytest.raises(bandwidth.Paused):
+            wc._download(server, str(tmp_path / 'def.jpg'))
+    with sqlite3.connect(db) as conn:
+        assert bandwidth.daily(conn) == (len(BODY), len(BODY))
+    assert bandwidth.session()['background_bytes'] - before['background_bytes'] == len(BODY)
+    assert wc.bandwidth_usage()['today'] == {'bytes': len(BODY), 'background_bytes': len(BODY)}
+
+
+def test_background_download_prefers_folders_and_mirrors(tmp_path, server, monkeypatch):
+    folder = tmp_path / 'nas' / 'original'
+    folder.mkdir(parents=True)
+    (folder / 'local.jpg').write_bytes(b'local')
+    db = str(tmp_path / 'titles.db')
+    monkeypatch.setattr(wc, 'DATABASE_NAME', db)
+    # TMDB itself is unreachable, so only the folder and the mirror can serve
+    monkeypatch.setattr(wc, 'TMDB_IMAGE_URL', 'http://127.0.0.1:9')
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'image_providers': [
+        {'name': 'nas', 'directory': str(tmp_path / 'nas')},
+        {'name': 'mirror', 'url': server.rsplit('/original/', 1)[0]},
+    ]})
+    with governor.priority(BACKGROUND):
+        wc._download(f'{wc.TMDB_IMAGE_URL}/original/local.jpg', str(tmp_path / 'local.jpg'))
+        assert not RangeHandler.ranges
+        wc._download(f'{wc.TMDB_IMAGE_URL}/original/abc.jpg', str(tmp_path / 'abc.jpg'))
+    assert (tmp_path / 'local.jpg').read_bytes() == b'local'
+    assert (tmp_path / 'abc.jpg').read_bytes() == BODY
+    with sqlite3.connect(db) as conn:
+        assert bandwidth.daily(conn) == (len(BODY), len(BODY))
+
+
+def test_change_does_not_join_a_background_download(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'image_dir', str(tmp_path))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {})
+    monkeypatch.setattr(wc.image_hash, 'is_available', lambda: False)
+    monkeypatch.setattr(wc.image_processing, 'verify', lambda path: True)
+    started, release = threading.Event(), threading.Event()
+    def download(url, path):
+        if wc._is_background():
+            started.set()
+            release.wait(5)
+            raise bandwidth.Paused('daily background budget used')
+        with open(path, 'wb') as f:
+            f.write(b'image')
+        return path
+    monkeypatch.setattr(wc, '_download', download)
+    url = f'{wc.TMDB_IMAGE_URL}/original/abc.jpg'
+    def prefetch():
+        with governor.priority(BACKGROUND):
+            wc.save_image(url, 'Title')
+    thread = threading.Thread(target=prefetch)
+    thread.start()
+    try:
+        assert started.wait(5)
+        assert wc.save_image(url, 'Title') == str(tmp_path / 'abc.jpg')
+    finally:
+        release.set()
+        thread.join()
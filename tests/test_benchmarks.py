@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+import run as bench
+from fake_tmdb import FakeTMDBConfig, FakeTMDBServer
+from framechanger import wallpaper_changer as wc
+
+
+def test_change_wallpaper_against_fake_server():
+    server = FakeTMDBServer(FakeTMDBConfig(image_size=(320, 180), backdrops=3)).start()
+    try:
+        result = bench.bench_change_wallpaper(server, 3)
+    finally:
+        server.stop()
+    assert result['failures'] == 0
+    assert result['iterations'] == 3
+    assert server.requests >= 3
+    assert wc.TMDB_API_URL == 'https://api.themoviedb.org/3'
+
+
+def test_fake_server_error_rate():
+    server = FakeTMDBServer(FakeTMDBConfig(error_rate=1.0)).start()
+    try:
+        with bench.Sandbox(server):
+            assert wc.fetch_media_info('Her', 'movie', 'KEY') is None
+    finally:
+        server.stop()
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    current = tmp_path / 'current.json'
+    baseline.write_text(json.dumps({'results': [{'name': 'preview', 'p50': 0.010}]}))
+    current.write_text(json.dumps({'results': [{'name': 'preview', 'p50': 0.015}]}))
+    assert bench.compare(str(baseline), str(current), 0.2) == 1
+    assert bench.compare(str(baseline), str(baseline), 0.2) == 0
+    assert 'REGRESSION' in capsys.readouterr().out
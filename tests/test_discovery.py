@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import requests
+from framechanger import discovery
+from framechanger import wallpaper_changer as wc
+
+
+class MockResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def mock_trending(pages):
+    urls = []
+    def get(url):
+        urls.append(url)
+        page = int(url.rsplit('page=', 1)[1])
+        return MockResponse({'total_pages': len(pages), 'results': pages[page - 1]})
+    return urls, get
+
+
+def test_refresh_pages_and_drops_stale_titles(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    discovery.ensure_tables(conn)
+    discovery.sync_sources(conn, ['trending:day'])
+    urls, get = mock_trending([
+        [{'id': 1, 'media_type': 'movie', 'title': 'One'}, {'id': 9, 'media_type': 'person', 'name': 'Someone'}],
+        [{'id': 2, 'media_type': 'tv', 'name': 'Two'}],
+    ])
+    monkeypatch.setattr(requests, 'get', get)
+    assert discovery.refresh_source(conn, 'trending:day', 'http://tmdb', 'KEY') == 2
+    assert len(urls) == 2 and '/trending/all/day' in urls[0]
+    assert discovery.due_sources(conn) == []
+
+    _, get = mock_trending([[{'id': 3, 'media_type': 'movie', 'title': 'Three'}]])
+    monkeypatch.setattr(requests, 'get', get)
+    discovery.refresh_source(conn, 'trending:day', 'http://tmdb', 'KEY')
+    assert conn.execute("SELECT name FROM discovery_titles").fetchall() == [('Three',)]
+    conn.close()
+
+
+def test_interrupted_refresh_resumes(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    discovery.ensure_tables(conn)
+    discovery.sync_sources(conn, ['popular:movie'])
+    stop = threading.Event()
+    urls = []
+    def get(url):
+        urls.append(url)
+        stop.set()
+        return MockResponse({'total_pages': 2, 'results': [{'id': len(urls), 'title': f'M{len(urls)}'}]})
+    monkeypatch.setattr(requests, 'get', get)
+
+    discovery.refresh_source(conn, 'popular:movie', 'http://tmdb', 'KEY', stop_event=stop)
+    assert discovery.title_count(conn) == 1
+    discovery.refresh_source(conn, 'popular:movie', 'http://tmdb', 'KEY')
+    assert urls[-1].endswith('page=2')
+    assert discovery.title_count(conn) == 2
+    conn.close()
+
+
+def test_selector_draws_from_discovered_titles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    with sqlite3.connect(wc.DATABASE_NAME) as conn:
+        conn.execute("INSERT INTO discovery_titles VALUES ('trending:week', 'movie', 77, 'Trending', 0)")
+    picked = []
+    monkeypatch.setattr(wc, 'download_wallpaper', lambda *args, **kwargs: picked.append(args))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'discovery_share': 1.0})
+    monkeypatch.setattr(wc, 'save_settings', lambda settings: None)
+    wc.download_random_image('KEY')
+    assert picked == [('Trending', 'movie', 'KEY', 77)]
+
+
+def test_random_title_is_uniform_across_rowid_gaps(monkeypatch):
+    conn = sqlite3.connect(':memory:')
+    discovery.ensure_tables(conn)
+    conn.executemany(
+        "INSERT INTO discovery_titles (rowid, source, media_type, tmdb_id, name, refreshed_at) VALUES (?, 'trending', 'movie', ?, ?, 0)",
+        [(rowid, rowid, f'Title {rowid}') for rowid in (1, 2, 1000, 1001, 5000)],
+    )
+    draws = iter(range(5000))
+    monkeypatch.setattr(discovery.random, 'randrange', lambda count: next(draws) % count)
+    picks = [discovery.random_title(conn)[0] for _ in range(500)]
+    assert {name: picks.count(name) for name in set(picks)} == {f'Title {rowid}': 100 for rowid in (1, 2, 1000, 1001, 5000)}
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import QItemSelectionModel
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from framechanger import app as gui
+from framechanger import favorites
+from framechanger import metadata
+from framechanger import title_failures
+from framechanger import wallpaper_changer as wc
+
+_qt_app = None
+
+
+def titles_db(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE titles (name TEXT NOT NULL, media_type TEXT NOT NULL, tmdb_id INTEGER, UNIQUE(name, media_type))")
+    conn.executemany("INSERT INTO titles VALUES (?, ?, ?)", rows)
+    return conn
+
+
+def snapshot(conn):
+    return (
+        conn.execute("SELECT * FROM titles ORDER BY name, media_type").fetchall(),
+        conn.execute("SELECT * FROM title_tags ORDER BY name, media_type, tag").fetchall(),
+    )
+
+
+def test_bulk_edits_and_undo():
+    conn = titles_db([('Alien', 'movie', 1), ('Dark', 'tv', 2), ('Heat', 'movie', 3), ('Heat', 'tv', 4)])
+    tagged = favorites.add_tag(conn, [('Alien', 'movie'), ('Heat', 'movie'), ('Missing', 'movie')], '  sci  fi ')
+    assert tagged.changes == {('Alien', 'movie'): ('Alien', 'movie'), ('Heat', 'movie'): ('Heat', 'movie')}
+    assert favorites.tag_names(conn) == ['sci fi']
+    before = snapshot(conn)
+
+    # Heat already exists as tv, so only Alien moves
+    moved = favorites.change_media_type(conn, [('Alien', 'movie'), ('Heat', 'movie')], 'tv')
+    assert moved.changes == {('Alien', 'movie'): ('Alien', 'tv')}
+    assert conn.execute("SELECT media_type, tmdb_id FROM titles WHERE name='Alien'").fetchone() == ('tv', None)
+    assert ('Alien', 'tv', 'sci fi') in snapshot(conn)[1]
+    assert favorites.undo(conn, moved) == {('Alien', 'tv'): ('Alien', 'movie')}
+    assert snapshot(conn) == before
+
+    title_failures.ensure_table(conn)
+    title_failures.record(conn, 'Dark', 'tv', 'no_match')
+    deleted = favorites.delete_titles(conn, [('Alien', 'movie'), ('Dark', 'tv')])
+    assert deleted.changes == {('Alien', 'movie'): None, ('Dark', 'tv'): None}
+    assert conn.execute("SELECT COUNT(*) FROM title_failures").fetchone() == (0,)
+    assert conn.execute("SELECT name FROM titles ORDER BY rowid").fetchall() == [('Heat',), ('Heat',)]
+    favorites.undo(conn, deleted)
+    assert snapshot(conn) == before
+
+    removed = favorites.remove_tag(conn, [('Alien', 'movie'), ('Dark', 'tv')], 'sci fi')
+    assert list(removed.changes) == [('Alien', 'movie')]
+    favorites.undo(conn, removed)
+    assert snapshot(conn) == before
+
+    # Dark was added again after the delete, so undo leaves the new one alone
+    deleted = favorites.delete_titles(conn, [('Alien', 'movie'), ('Dark', 'tv')])
+    conn.execute("INSERT INTO titles VALUES ('Dark', 'tv', 99)")
+    assert favorites.undo(conn, deleted) == {('Alien', 'movie'): ('Alien', 'movie')}
+    assert conn.execute("SELECT tmdb_id FROM titles WHERE name='Dark'").fetchone() == (99,)
+    assert conn.execute("SELECT COUNT(*) FROM titles").fetchone() == (4,)
+
+
+def test_tag_filter():
+    conn = titles_db([('Alien', 'movie', 1), ('Dark', 'tv', 2)])
+    favorites.add_tag(conn, [('Dark', 'tv')], 'weekend')
+    conditions, params = metadata.filter_sql({'tags': ['weekend']})
+    query = f"SELECT t.name FROM titles t WHERE {' AND '.join(conditions)}"
+    assert conn.execute(query, params).fetchall() == [('Dark',)]
+
+
+def test_window_bulk_edit_updates_rows_in_place(tmp_path, monkeypatch):
+    global _qt_app
+    _qt_app = QApplication.instance() or QApplication([])
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'settings_file', str(tmp_path / 'settings.json'))
+    monkeypatch.setattr(gui, 'show_welcome_message', lambda: None)
+    monkeypatch.setattr(QMessageBox, 'question', lambda *args: QMessageBox.Yes)
+    window = gui.MainWindow()
+    try:
+        window.filter_input.setCurrentText('movie')
+        model = window.title_model
+        texts = [model.item(row).text() for row in range(model.rowCount())]
+        def no_reload():
+            raise AssertionError('list reloaded')
+        window.show_titles = no_reload
+        selection = window.listView.selectionModel()
+        for row in (1, 3):
+            selection.select(model.index(row, 0), QItemSelectionModel.Select)
+
+        # Retyped titles no longer match the movie filter
+        window.run_title_edit(favorites.change_media_type, 'tv')
+        assert [model.item(row).text() for row in range(model.rowCount())] == texts[:1] + texts[2:3] + texts[4:]
+
+        window.undo_title_edit()
+        assert [model.item(row).text() for row in range(model.rowCount())] == texts
+        assert window.count_label.text() == f"Number of titles: {len(texts)}"
+
+        for row in (0, 1, 3):
+            selection.select(model.index(row, 0), QItemSelectionModel.Select)
+        window.delete_title()
+        assert model.rowCount() == len(texts) - 3
+        window.undo_title_edit()
+        assert [model.item(row).text() for row in range(model.rowCount())] == texts
+    finally:
+        window.jobs.stop()
+        window.autocompleter.shutdown()
+        window.tray_icon.hide()
+        window.deleteLater()
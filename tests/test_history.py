@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import history
+from framechanger import wallpaper_changer as wc
+
+
+def test_step_and_trim(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    history.ensure_table(conn)
+    paths = []
+    for index in range(4):
+        path = tmp_path / f'{index}.jpg'
+        path.write_bytes(b'x')
+        paths.append(str(path))
+        history.record(conn, f'T{index}', str(path), now=index, max_entries=3)
+    assert conn.execute("SELECT COUNT(*) FROM wallpaper_history").fetchone()[0] == 3
+
+    os.remove(paths[2])
+    assert history.step(conn, -1, now=10)[1] == 'T1'
+    assert history.step(conn, -1, now=11) is None
+    assert history.step(conn, 1, now=12)[1] == 'T3'
+    assert history.step(conn, 1, now=13) is None
+
+    entry_id = history.current(conn)[0]
+    history.set_pinned(conn, entry_id, True)
+    for index in range(5):
+        history.record(conn, 'New', paths[0], max_entries=3)
+    assert conn.execute("SELECT pinned FROM wallpaper_history WHERE id=?", (entry_id,)).fetchone() == (1,)
+    conn.close()
+
+
+def test_previous_reuses_cache_without_network(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    for name in ('a.jpg', 'b.jpg'):
+        (tmp_path / name).write_bytes(b'x')
+        wc.mark_shown(str(tmp_path / name), name[0].upper())
+    applied = []
+    monkeypatch.setattr(wc, 'apply_wallpaper', lambda path, title='': applied.append(path) or True)
+    def no_network(url):
+        raise AssertionError('network used')
+    monkeypatch.setattr(wc.requests, 'get', no_network)
+
+    assert wc.previous_wallpaper() == (0, 'A')
+    assert wc.next_wallpaper() == (0, 'B')
+    assert applied == [str(tmp_path / 'a.jpg'), str(tmp_path / 'b.jpg')]
+    assert wc.toggle_pin() is True
+    assert wc.is_pinned()
+
+
+def test_history_feeds_anti_repeat(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    with sqlite3.connect(wc.DATABASE_NAME) as conn:
+        conn.execute("DELETE FROM titles")
+        conn.executemany("INSERT INTO titles (name, media_type) VALUES (?, 'movie')", [('A',), ('B',), ('C',)])
+    wc.mark_shown(str(tmp_path / 'a.jpg'), 'A')
+    wc.mark_shown(str(tmp_path / 'b.jpg'), 'B')
+    picked = []
+    monkeypatch.setattr(wc, 'download_wallpaper', lambda name, *args, **kwargs: picked.append(name))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'local_share': 0, 'discovery_share': 0})
+    for _ in range(10):
+        wc.download_random_image('KEY')
+    assert set(picked) == {'C'}
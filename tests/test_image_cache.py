@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import image_cache
+from framechanger import image_hash
+
+
+def cached_file(directory, name, used_at, size=100):
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (used_at, used_at))
+    return path
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    directory = str(tmp_path)
+    oldest = cached_file(directory, 'a.jpg', 1000)
+    shown = cached_file(directory, 'b.jpg', 1000)
+    pinned = cached_file(directory, 'c.jpg', 500)
+    rendition = cached_file(directory, 'processed/d.jpg', 2000)
+    newest = cached_file(directory, 'e.jpg', 3000)
+    partial = cached_file(directory, 'f.jpg.part', 100)
+    conn = sqlite3.connect(':memory:')
+    image_hash.ensure_table(conn)
+    conn.executemany(
+        "INSERT INTO image_hashes (file_path, local_path, hash, last_shown) VALUES (?, ?, '0', ?)",
+        [('/a.jpg', oldest, None), ('/b.jpg', shown, 2500)],
+    )
+
+    assert image_cache.prune(conn, directory, 600, keep=[pinned]) == 0
+    assert image_cache.prune(conn, directory, 300, keep=[pinned]) == 200
+    assert not os.path.exists(oldest) and not os.path.exists(rendition)
+    assert all(os.path.exists(path) for path in (shown, pinned, newest, partial))
+    assert conn.execute("SELECT file_path FROM image_hashes").fetchall() == [('/b.jpg',)]
+
+
+def test_touch_keeps_modification_time(tmp_path):
+    path = cached_file(str(tmp_path), 'a.jpg', 1000)
+    image_cache.touch(path)
+    assert os.stat(path).st_mtime == 1000
+    assert os.stat(path).st_atime > 1000
@@ -0,0 +1,67 @@
+import io
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import image_hash
+from framechanger import wallpaper_changer as wc
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def jpeg_bytes(size=(320, 180), split=100):
+    img = Image.new('RGB', size, (20, 20, 20))
+    img.paste((240, 240, 240), (split, 0, size[0], size[1]))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def test_dhash_matches_rescaled_copy(tmp_path):
+    original = tmp_path / 'a.jpg'
+    rescaled = tmp_path / 'b.jpg'
+    different = tmp_path / 'c.jpg'
+    original.write_bytes(jpeg_bytes())
+    rescaled.write_bytes(jpeg_bytes((640, 360), 200))
+    different.write_bytes(jpeg_bytes(split=260))
+    value = image_hash.dhash(str(original))
+    assert image_hash.hamming(value, image_hash.dhash(str(rescaled))) <= image_hash.MERGE_DISTANCE
+    assert image_hash.hamming(value, image_hash.dhash(str(different))) > image_hash.MERGE_DISTANCE
+
+
+def test_save_image_merges_duplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'image_dir', str(tmp_path))
+    downloads = []
+    def mock_get(url, timeout=None):
+        downloads.append(url)
+        class MockResponse:
+            content = jpeg_bytes()
+            def raise_for_status(self):
+                pass
+        return MockResponse()
+    monkeypatch.setattr(wc.requests, 'get', mock_get)
+
+    first = wc.save_image('https://image.tmdb.org/t/p/original/first.jpg', 'Her')
+    second = wc.save_image('https://image.tmdb.org/t/p/original/reupload.jpg', 'Her')
+    again = wc.save_image('https://image.tmdb.org/t/p/original/reupload.jpg', 'Her')
+
+    assert first == second == again == str(tmp_path / 'first.jpg')
+    assert not os.path.exists(tmp_path / 'reupload.jpg')
+    assert len(downloads) == 2
+
+
+def test_recent_duplicates_are_skipped(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    image_hash.ensure_table(conn)
+    image_hash.record(conn, '/shown.jpg', '/cache/shown.jpg', 0xFF00FF00FF00FF00)
+    image_hash.record(conn, '/near.jpg', '/cache/near.jpg', 0xFF00FF00FF00FF01)
+    image_hash.record(conn, '/other.jpg', '/cache/other.jpg', 0x00FF00FF00FF00FF)
+    image_hash.mark_shown(conn, '/cache/shown.jpg')
+
+    recent = image_hash.recent_hashes(conn)
+    candidates = ['/shown.jpg', '/near.jpg', '/other.jpg', '/new.jpg']
+    kept = [path for path in candidates if not image_hash.is_recent_duplicate(conn, path, recent)]
+    assert kept == ['/other.jpg', '/new.jpg']
+    conn.close()
@@ -0,0 +1,72 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import image_processing as ip
+from framechanger import wallpaper_changer as wc
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def make_image(path, size=(400, 300)):
+    Image.new('RGB', size, (200, 100, 50)).save(path, 'JPEG')
+    return str(path)
+
+
+def test_process_image_crops_to_target(tmp_path):
+    source = make_image(tmp_path / 'source.jpg')
+    destination = str(tmp_path / 'out' / 'result.jpg')
+    ops = ip.build_ops({'quality': 70, 'dim': 0.5, 'title_overlay': True}, 'Her')
+    assert ip.process_image(source, destination, (160, 90), ops) == destination
+    with Image.open(destination) as img:
+        assert img.size == (160, 90)
+        assert max(img.getpixel((150, 5))) < 120
+
+
+def test_cache_key_depends_on_ops(tmp_path):
+    source = make_image(tmp_path / 'source.jpg')
+    plain = ip.processed_path(source, (160, 90), {'quality': 85}, str(tmp_path))
+    dimmed = ip.processed_path(source, (160, 90), {'quality': 85, 'dim': 0.3}, str(tmp_path))
+    assert plain != dimmed
+    assert plain == ip.processed_path(source, (160, 90), {'quality': 85}, str(tmp_path))
+
+
+def test_submit_uses_process_pool_and_cache(tmp_path):
+    source = make_image(tmp_path / 'source.jpg')
+    try:
+        future = ip.submit(source, (80, 45), {'quality': 85}, str(tmp_path / 'processed'))
+        result = future.result(timeout=60)
+    finally:
+        ip.shutdown()
+    assert os.path.exists(result)
+    cached = ip.submit(source, (80, 45), {'quality': 85}, str(tmp_path / 'processed'))
+    assert cached.done() and cached.result() == result
+    assert ip._executor is None
+
+
+def test_apply_wallpaper_prefers_cached_rendition(tmp_path, monkeypatch):
+    source = make_image(tmp_path / 'source.jpg')
+    monkeypatch.setattr(wc, 'processed_dir', str(tmp_path / 'processed'))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {
+        'processing': {'enabled': True, 'width': 80, 'height': 45},
+    })
+    ops = ip.build_ops({'enabled': True, 'width': 80, 'height': 45}, 'Her')
+    destination = ip.processed_path(source, (80, 45), ops, wc.processed_dir)
+    ip.process_image(source, destination, (80, 45), ops)
+    applied = []
+    monkeypatch.setattr(wc, 'set_wallpaper', lambda path: applied.append(path) or True)
+    assert wc.apply_wallpaper(source, 'Her')
+    assert applied == [destination]
+
+
+def test_verify_without_pillow_checks_signatures(tmp_path, monkeypatch):
+    monkeypatch.setattr(ip, 'Image', None)
+    files = {
+        'ok.jpg': b'\xff\xd8\xff\xe0' + bytes(100) + b'\xff\xd9',
+        'truncated.jpg': b'\xff\xd8\xff\xe0' + bytes(100),
+        'ok.png': b'\x89PNG\r\n\x1a\n' + bytes(100) + b'\x00\x00\x00\x00IEND\xaeB`\x82',
+        'error.jpg': b'<html>Not Found</html>',
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_bytes(content)
+    assert [name for name in files if ip.verify(str(tmp_path / name))] == ['ok.jpg', 'ok.png']
@@ -0,0 +1,92 @@
+import json
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+import requests
+from framechanger import import_export as ie
+from framechanger import wallpaper_changer as wc
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    connection = sqlite3.connect('titles.db')
+    connection.execute("DELETE FROM titles")
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def test_detect_and_parse_formats(tmp_path):
+    letterboxd = tmp_path / 'watched.csv'
+    letterboxd.write_text('Date,Name,Year,Letterboxd URI\n2024-01-01,Her,2013,https://boxd.it/1\n')
+    imdb = tmp_path / 'ratings.csv'
+    imdb.write_text('Const,Your Rating,Title,Title Type\n'
+                    'tt1,9,Dark,TV Series\ntt2,8,Her,Movie\ntt3,7,Pilot,TV Episode\n')
+    trakt = tmp_path / 'history.json'
+    trakt.write_text(json.dumps([
+        {'type': 'show', 'show': {'title': 'Fargo', 'ids': {'tmdb': 60622}}},
+        {'type': 'movie', 'movie': {'title': 'Her', 'ids': {'tmdb': 152601}}},
+    ]))
+
+    assert ie.detect_format(str(letterboxd)) == 'letterboxd'
+    assert ie.detect_format(str(imdb)) == 'imdb'
+    assert ie.detect_format(str(trakt)) == 'trakt'
+    assert list(ie.parse_file(str(letterboxd))) == [('Her', 'movie', None)]
+    assert list(ie.parse_file(str(imdb))) == [('Dark', 'tv', None), ('Her', 'movie', None)]
+    assert list(ie.parse_file(str(trakt))) == [('Fargo', 'tv', 60622), ('Her', 'movie', 152601)]
+
+
+def test_streaming_json_parser_handles_chunk_boundaries(tmp_path):
+    path = tmp_path / 'favorites.json'
+    items = [{'name': f'Title {i}', 'media_type': 'movie', 'tmdb_id': i} for i in range(50)]
+    path.write_text(json.dumps(items))
+    with open(path) as f:
+        assert list(ie._iter_json_array(f, chunk_size=7)) == items
+
+
+def test_import_is_batched_and_idempotent(conn):
+    rows = [(f'Title {i}', 'tv' if i % 2 else 'movie', None) for i in range(2500)]
+    rows += [('', 'movie', None), ('Alien | movie', 'movie', None), ('Heat', 'film', None)]
+    assert ie.import_titles(conn, iter(rows), batch_size=1000) == (2500, 3)
+    assert ie.import_titles(conn, [('Title 0', 'movie', 99)]) == (0, 0)
+    assert conn.execute("SELECT tmdb_id FROM titles WHERE name='Title 0'").fetchone()[0] == 99
+
+
+@pytest.mark.parametrize('fmt', ie.FORMATS)
+def test_export_round_trip(conn, tmp_path, fmt):
+    ie.import_titles(conn, [('Her', 'movie', 152601), ('Dark', 'tv', 70523)])
+    path = str(tmp_path / f'export.{"json" if fmt in ("json", "trakt") else "csv"}')
+    count = ie.export_titles(conn, path, fmt)
+    assert ie.detect_format(path) == fmt
+    parsed = list(ie.parse_file(path))
+    assert len(parsed) == count
+    assert ('Her', 'movie') in [row[:2] for row in parsed]
+
+
+def test_resolve_title_retries_only_transient_failures(conn, monkeypatch):
+    ie.import_titles(conn, [('Her', 'movie', None)])
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'api_key': 'KEY'})
+    class Search:
+        def __init__(self, results):
+            self.results = results
+        def raise_for_status(self):
+            pass
+        def json(self):
+            return {'results': self.results}
+    def offline(url):
+        raise requests.exceptions.ConnectionError('offline')
+    payload = {'name': 'Her', 'media_type': 'movie'}
+
+    monkeypatch.setattr(wc.governor, 'get', offline)
+    with pytest.raises(RuntimeError):
+        ie.resolve_title(payload)
+    # No match is recorded in title_failures and not retried
+    monkeypatch.setattr(wc.governor, 'get', lambda url: Search([]))
+    ie.resolve_title(payload)
+    monkeypatch.setattr(wc.governor, 'get', lambda url: Search([{'id': 42}]))
+    ie.resolve_title(payload)
+    assert wc.stored_tmdb_id('Her', 'movie') == 42
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import jobs
+from framechanger.rate_limit import BACKGROUND, INTERACTIVE
+
+
+def test_dedupe_priority_and_retries(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    jobs.ensure_table(conn)
+    assert jobs.enqueue(conn, 'prefetch', {'name': 'A'}, key='a', now=0)
+    assert jobs.enqueue(conn, 'prefetch', {'name': 'B'}, key='b', now=0)
+    assert not jobs.enqueue(conn, 'prefetch', {'name': 'B'}, key='b', priority=INTERACTIVE, now=0)
+
+    job_id, kind, payload, priority, attempts = jobs.claim(conn, 'w1', now=1)
+    assert (kind, payload, priority, attempts) == ('prefetch', {'name': 'B'}, INTERACTIVE, 1)
+    assert jobs.fail(conn, job_id, 'timeout', now=1) == jobs.QUEUED
+    assert jobs.claim(conn, 'w1', now=2)[2] == {'name': 'A'}
+    assert jobs.claim(conn, 'w1', now=2) is None
+    # The retry becomes ready after its backoff
+    retry = jobs.claim(conn, 'w1', now=1 + jobs.retry_delay(1))
+    assert retry[0] == job_id and retry[4] == 2
+    jobs.complete(conn, job_id)
+    assert not jobs.enqueue(conn, 'prefetch', {'name': 'B'}, key='b')
+    conn.close()
+
+
+def test_expired_lease_and_restart(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    jobs.ensure_table(conn)
+    jobs.enqueue(conn, 'resolve', {}, key='a', now=0)
+    jobs.claim(conn, 'dead', lease=10, now=0)
+    assert jobs.claim(conn, 'w2', now=5) is None
+    assert jobs.claim(conn, 'w2', now=11)[4] == 2
+    assert jobs.recover(conn) == 1
+    assert jobs.counts(conn) == {jobs.QUEUED: 1}
+    conn.close()
+
+
+def test_queue_resumes_after_restart(tmp_path):
+    db_path = str(tmp_path / 'titles.db')
+    done = []
+    finished = threading.Event()
+    def handler(payload):
+        if payload['n'] == 0 and not done:
+            done.append('failed')
+            raise OSError('network down')
+        done.append(payload['n'])
+        if len(done) == 4:
+            finished.set()
+
+    queue = jobs.JobQueue(db_path, {'prefetch': handler}, workers=2)
+    queue.submit_many('prefetch', [(f'k{n}', {'n': n}) for n in range(3)], priority=BACKGROUND)
+    # A job left running by a crashed process is picked up on start
+    with sqlite3.connect(db_path) as conn:
+        jobs.claim(conn, 'crashed')
+    original_delay = jobs.RETRY_DELAY
+    jobs.RETRY_DELAY = 0
+    try:
+        queue.start()
+        assert finished.wait(10)
+    finally:
+        queue.stop()
+        jobs.RETRY_DELAY = original_delay
+    assert sorted(n for n in done if n != 'failed') == [0, 1, 2]
+    assert queue.counts() == {jobs.DONE: 3}
+
+
+def test_paused_queue_claims_nothing(tmp_path):
+    ran = threading.Event()
+    queue = jobs.JobQueue(str(tmp_path / 'titles.db'), {'prefetch': lambda payload: ran.set()}, workers=1)
+    queue.start()
+    queue.pause()
+    try:
+        queue.submit('prefetch', {'n': 1})
+        assert not ran.wait(0.3)
+        assert queue.counts() == {jobs.QUEUED: 1}
+        queue.resume()
+        assert ran.wait(10)
+    finally:
+        queue.stop()
+
+
+def test_deferred_job_keeps_its_attempts(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    jobs.ensure_table(conn)
+    jobs.enqueue(conn, 'prefetch', {}, key='a', now=0)
+    job_id, _, _, _, attempts = jobs.claim(conn, 'w', now=0)
+    assert attempts == 1
+    jobs.defer(conn, job_id, 'paused', delay=60, now=0)
+    assert jobs.claim(conn, 'w', now=30) is None
+    assert jobs.claim(conn, 'w', now=60)[4] == 1
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import local_library
+from framechanger import wallpaper_changer as wc
+
+
+def make_library(tmp_path):
+    folder = tmp_path / 'photos'
+    (folder / 'nested').mkdir(parents=True)
+    (folder / 'a.jpg').write_bytes(b'a')
+    (folder / 'nested' / 'b.png').write_bytes(b'bb')
+    (folder / 'notes.txt').write_text('not an image')
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    local_library.ensure_tables(conn)
+    local_library.add_folder(conn, str(folder))
+    return conn, str(folder)
+
+
+def test_rescan_is_incremental(tmp_path, monkeypatch):
+    conn, folder = make_library(tmp_path)
+    described = []
+    monkeypatch.setattr(local_library, '_describe', lambda path: described.append(path) or (None, None, None))
+
+    assert local_library.scan_folder(conn, folder) == (2, 0, 0)
+    assert len(described) == 2
+
+    described.clear()
+    assert local_library.scan_folder(conn, folder) == (0, 0, 0)
+    assert described == []
+
+    os.remove(os.path.join(folder, 'a.jpg'))
+    with open(os.path.join(folder, 'nested', 'b.png'), 'ab') as f:
+        f.write(b'more')
+    assert local_library.scan_folder(conn, folder) == (0, 1, 1)
+    assert described == [os.path.join(folder, 'nested', 'b.png')]
+    assert local_library.image_count(conn) == 1
+    conn.close()
+
+
+def test_unavailable_folder_keeps_index(tmp_path):
+    conn, folder = make_library(tmp_path)
+    local_library.scan_folder(conn, folder)
+    assert local_library.scan_folder(conn, str(tmp_path / 'unmounted')) == (0, 0, 0)
+    assert local_library.image_count(conn) == 2
+    assert local_library.random_image(conn).startswith(folder)
+    conn.close()
+
+
+def test_random_change_draws_from_local_library(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn, folder = make_library(tmp_path)
+    local_library.scan_folder(conn, folder)
+    conn.close()
+    wc.initialize_database()
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'local_share': 1.0})
+
+    image_path, title = wc.download_random_image('KEY')
+    assert image_path.startswith(folder)
+    assert title == os.path.basename(image_path)
+
+
+def test_random_image_is_uniform_after_deletes(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    local_library.ensure_tables(conn)
+    conn.executemany("INSERT INTO local_images (path, folder, size, mtime) VALUES (?, '/photos', 1, 0)",
+                     [(f'/photos/{i}.jpg',) for i in range(100)])
+    # Only the first image and the last few survive, leaving a large gap
+    conn.execute("DELETE FROM local_images WHERE rowid BETWEEN 2 AND 95")
+    picks = [local_library.random_image(conn) for _ in range(3000)]
+    counts = {path: picks.count(path) for path in set(picks)}
+    assert len(counts) == 6
+    assert min(counts.values()) > 300
@@ -0,0 +1,53 @@
+import gzip
+import logging
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import logging_utils
+
+
+@pytest.fixture
+def fresh_root(tmp_path, monkeypatch):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    monkeypatch.setattr(logging_utils, 'LOG_FILE', str(tmp_path / 'framechanger.log'))
+    def configure(**kwargs):
+        # pytest attaches its capture handlers during the test call
+        root.handlers = []
+        logging_utils.configure_logging(**kwargs)
+        return tmp_path
+    yield configure
+    logging_utils.stop_logging()
+    root.handlers = saved_handlers
+    root.setLevel(saved_level)
+
+
+def test_records_are_written_by_listener_and_rotated(fresh_root):
+    log_dir = fresh_root(max_bytes=200, backup_count=2)
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers)
+    for index in range(20):
+        logging.info('message number %s with some padding text', index)
+    logging_utils.stop_logging()
+
+    with open(log_dir / 'framechanger.log') as f:
+        assert 'message number 19' in f.read()
+    rotated = log_dir / 'framechanger.log.1.gz'
+    with gzip.open(rotated, 'rt') as f:
+        assert 'message number' in f.read()
+    assert not (log_dir / 'framechanger.log.3.gz').exists()
+
+
+def test_debug_arguments_are_not_formatted_when_disabled(fresh_root):
+    fresh_root()
+    class Expensive:
+        def __str__(self):
+            raise AssertionError('formatted although DEBUG is off')
+    logging.debug('Search Results: %s', Expensive())
+
+
+def test_log_options_from_settings():
+    options = logging_utils.log_options({'log_level': 'debug', 'log_rotate_when': 'midnight'})
+    assert options['level'] == logging.DEBUG
+    assert options['when'] == 'midnight'
+    assert options['backup_count'] == logging_utils.BACKUP_COUNT
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import metadata
+from framechanger import wallpaper_changer as wc
+
+MOVIE = {
+    'release_date': '1999-03-31', 'runtime': 136, 'vote_average': 8.2, 'vote_count': 25000,
+    'popularity': 80.5, 'original_language': 'en', 'genres': [{'id': 28, 'name': 'Action'}],
+}
+SHOW = {
+    'first_air_date': '2017-12-01', 'episode_run_time': [55], 'vote_average': 8.4, 'vote_count': 6000,
+    'popularity': 60.0, 'original_language': 'de', 'genres': [{'id': 18, 'name': 'Drama'}],
+}
+
+
+def test_store_filter_and_refresh(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    conn = sqlite3.connect(wc.DATABASE_NAME)
+    with conn:
+        conn.execute("DELETE FROM titles")
+        conn.executemany(
+            "INSERT INTO titles (name, media_type, tmdb_id) VALUES (?, ?, ?)",
+            [('The Matrix', 'movie', 603), ('Dark', 'tv', 70523), ('Unresolved', 'movie', None)],
+        )
+    assert sorted(metadata.stale_titles(conn, now=0)) == [('movie', 603), ('tv', 70523)]
+    metadata.store(conn, 'movie', 603, metadata.parse_details(MOVIE), now=0)
+    metadata.store(conn, 'tv', 70523, metadata.parse_details(SHOW), now=0)
+    assert metadata.stale_titles(conn, now=0) == []
+    assert len(metadata.stale_titles(conn, now=metadata.REFRESH_AGE + 1)) == 2
+    assert metadata.genre_names(conn) == ['Action', 'Drama']
+
+    def names(filters):
+        conditions, params = metadata.filter_sql(filters)
+        query = f"SELECT t.name FROM titles t {metadata.JOIN}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return sorted(row[0] for row in conn.execute(query, params))
+
+    assert names({}) == ['Dark', 'The Matrix', 'Unresolved']
+    assert names({'genres': ['Drama']}) == ['Dark']
+    assert names({'year_min': 1990, 'year_max': 1999}) == ['The Matrix']
+    assert names({'rating_min': 8.3, 'language': 'de'}) == ['Dark']
+    assert names({'runtime_max': 60}) == ['Dark']
+    conn.close()
+
+
+def test_selector_filters_and_weights(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    with sqlite3.connect(wc.DATABASE_NAME) as conn:
+        conn.execute("DELETE FROM titles")
+        conn.executemany(
+            "INSERT INTO titles (name, media_type, tmdb_id) VALUES (?, ?, ?)",
+            [('The Matrix', 'movie', 603), ('Dark', 'tv', 70523)],
+        )
+        metadata.store(conn, 'movie', 603, metadata.parse_details(MOVIE))
+        metadata.store(conn, 'tv', 70523, metadata.parse_details(SHOW))
+    picked = []
+    monkeypatch.setattr(wc, 'download_wallpaper', lambda name, *args, **kwargs: picked.append(name))
+    settings = {'local_share': 0, 'discovery_share': 0, 'selection_filters': {'genres': ['Drama']}}
+    monkeypatch.setattr(wc, 'load_settings', lambda: settings)
+    for _ in range(5):
+        wc.download_random_image('KEY')
+    assert set(picked) == {'Dark'}
+
+    # Filters that match nothing are ignored rather than stopping changes
+    settings['selection_filters'] = {'year_min': 2100}
+    wc.download_random_image('KEY')
+    assert len(picked) == 6
+    assert metadata.weight(None, 120.0, 'popularity') > metadata.weight(None, 2.0, 'popularity')
+    assert metadata.weight(8.0, None, 'rating') == 8.0
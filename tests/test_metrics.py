@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import urllib.request
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import metrics as m
+from framechanger import wallpaper_changer as wc
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    m.metrics.reset()
+    yield
+    m.metrics.reset()
+
+
+def test_histogram_percentiles():
+    histogram = m.Histogram(window=100)
+    for value in range(1, 201):
+        histogram.observe(value)
+    assert histogram.count == 200
+    assert histogram.percentile(0.5) == 151
+    assert histogram.percentile(0.99) == 200
+
+
+def test_spans_nest_into_traces():
+    @m.timed('outer')
+    def outer():
+        return inner()
+
+    @m.timed('inner')
+    def inner():
+        return None
+
+    outer()
+    trace = m.metrics.snapshot()['traces'][-1]
+    assert trace['stage'] == 'outer'
+    assert trace['status'] == 'error'
+    assert [child['stage'] for child in trace['children']] == ['inner']
+    assert 'framechanger_stage_failures_total{stage="inner"} 1' in m.metrics.to_prometheus()
+
+
+def test_fetch_media_info_is_instrumented(monkeypatch):
+    def mock_get(url):
+        class MockResponse:
+            def raise_for_status(self):
+                pass
+            def json(self):
+                return {'results': []}
+        return MockResponse()
+    monkeypatch.setattr(wc.requests, 'get', mock_get)
+    assert wc.fetch_media_info('Nothing', 'movie', 'KEY') is None
+    snapshot = m.metrics.snapshot()
+    counters = {(c['name'], tuple(c['labels'].values())): c['value'] for c in snapshot['counters']}
+    assert counters[('stage_failures_total', ('fetch_media_info',))] == 1
+    assert counters[('tmdb_requests_total', ('search',))] == 1
+
+
+def test_metrics_endpoint():
+    m.metrics.incr('image_cache_hits_total', 3)
+    server = m.start_server(0)
+    try:
+        port = server.server_address[1]
+        text = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+        data = json.loads(urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics.json').read())
+    finally:
+        server.shutdown()
+    assert 'framechanger_image_cache_hits_total 3' in text
+    assert data['counters'][0]['value'] == 3
@@ -0,0 +1,50 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import requests
+from framechanger import peer_cache
+from framechanger import wallpaper_changer as wc
+
+
+def serve(store):
+    server = peer_cache.start_server(store, port=0, host='127.0.0.1')
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def test_peer_serves_and_fills_from_upstream(tmp_path):
+    (tmp_path / 'tmdb').mkdir()
+    (tmp_path / 'tmdb' / 'abc.jpg').write_bytes(b'original')
+    upstream, upstream_url = serve(peer_cache.ImageStore(str(tmp_path / 'tmdb')))
+    office, office_url = serve(peer_cache.ImageStore(str(tmp_path / 'office'), upstream=upstream_url))
+    try:
+        client = peer_cache.PeerClient(office_url)
+        assert client.fetch('original/abc.jpg') == b'original'
+        assert (tmp_path / 'office' / 'abc.jpg').read_bytes() == b'original'
+        assert client.fetch('original/missing.jpg') is None
+        assert client.fetch('w780/abc.jpg') is None
+        assert requests.get(f'{office_url}/original/..%2Fabc.jpg').status_code == 404
+        assert client.down_until == 0
+    finally:
+        for server in (upstream, office):
+            server.shutdown()
+            server.server_close()
+    # A peer that went away is skipped until it may be back
+    assert client.fetch('original/abc.jpg') is None
+    assert client.down_until > 0
+
+
+def test_download_prefers_peer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'peer').mkdir()
+    (tmp_path / 'peer' / 'abc.jpg').write_bytes(b'from peer')
+    server, url = serve(peer_cache.ImageStore(str(tmp_path / 'peer')))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {'peer_cache_url': url})
+    def no_tmdb():
+        raise AssertionError('TMDB used')
+    monkeypatch.setattr(wc, '_image_fetcher', no_tmdb)
+    try:
+        path = str(tmp_path / 'abc.jpg')
+        wc._download(f'{wc.TMDB_IMAGE_URL}/original/abc.jpg', path)
+    finally:
+        server.shutdown()
+    assert open(path, 'rb').read() == b'from peer'
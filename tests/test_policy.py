@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import history
+from framechanger import policy
+from framechanger import wallpaper_changer as wc
+
+
+def conditions(**values):
+    return policy.Conditions(**{**dict.fromkeys(policy.Conditions._fields), **values})
+
+
+def test_decide():
+    assert policy.decide(conditions()) == policy.ALLOW
+    assert policy.decide(conditions(screen_locked=True)) == (False, False, False, 'screen locked', None)
+    assert policy.decide(conditions(fullscreen=True)).change is False
+    assert policy.decide(conditions(fullscreen=True), {'pause_when_fullscreen': False}) == policy.ALLOW
+    assert policy.decide(conditions(on_battery=True, battery_level=15)).reason == 'low battery'
+    assert policy.decide(conditions(on_battery=True, battery_level=80)) == (True, True, False, 'on battery', None)
+    assert policy.decide(conditions(on_battery=True), {'on_battery': 'normal'}) == policy.ALLOW
+    assert policy.decide(conditions(metered=True), {'on_metered': 'pause'}).change is False
+    assert policy.decide(conditions(slow_link=True)).cached_only is True
+    assert policy.decide(conditions(screen_locked=True), {'enabled': False}) == policy.ALLOW
+
+
+def test_limited_condition_lowers_background_rate():
+    limited = {'on_metered': 'limited', 'limited_bandwidth_mbps': 0.5}
+    assert policy.decide(conditions(metered=True), limited) == (True, False, True, 'metered connection', 0.5)
+    # A stricter mode for another condition wins
+    assert policy.decide(conditions(metered=True, on_battery=True), limited).cached_only is True
+    assert policy.decide(conditions(), limited).background_mbps is None
+
+
+def test_engine_caches_and_tolerates_failing_probes():
+    calls = []
+    def locked():
+        calls.append(1)
+        return True
+    def broken():
+        raise OSError('no battery')
+    probes = {name: (lambda: None) for name in policy.Conditions._fields}
+    probes.update(screen_locked=locked, on_battery=broken)
+    engine = policy.PolicyEngine(probes, cache_seconds=60)
+    assert engine.conditions().on_battery is None
+    assert engine.decide().reason == 'screen locked'
+    assert len(calls) == 1
+    engine.cache_seconds = 0
+    engine.decide()
+    assert len(calls) == 2
+
+
+def test_engine_reads_conditions_on_a_worker():
+    import threading
+    threads = []
+    probes = {name: (lambda: None) for name in policy.Conditions._fields}
+    probes['screen_locked'] = lambda: threads.append(threading.current_thread()) or True
+    engine = policy.PolicyEngine(probes)
+    assert engine.latest() == policy.UNKNOWN
+    assert engine.decide(probe=False) == policy.ALLOW
+    reported = []
+    engine.refresh(reported.append).result(timeout=5)
+    engine.shutdown()
+    assert threads and threads[0] is not threading.main_thread()
+    assert engine.decide(probe=False).reason == 'screen locked'
+    assert len(threads) == 1
+
+
+def test_battery_probes_share_one_pmset_call(monkeypatch):
+    import subprocess
+    calls = []
+    def run(*args, **kwargs):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, "Now drawing from 'Battery Power'\n -InternalBattery-0 (id=1)\t42%; discharging\n")
+    monkeypatch.setattr(policy.subprocess, 'run', run)
+    monkeypatch.setattr(policy, '_pmset_output', (None, ''))
+    monkeypatch.setattr(policy.platform, 'system', lambda: 'Darwin')
+    assert policy.on_battery() is True
+    assert policy.battery_level() == 42
+    assert len(calls) == 1
+
+
+def test_cached_only_change_skips_downloads(tmp_path, monkeypatch):
+    db = str(tmp_path / 'titles.db')
+    image = tmp_path / 'abc.jpg'
+    image.write_bytes(b'jpeg')
+    with sqlite3.connect(db) as conn:
+        history.ensure_table(conn)
+        history.record(conn, 'Inception', str(image))
+        history.record(conn, 'Gone', str(tmp_path / 'deleted.jpg'))
+    monkeypatch.setattr(wc, 'DATABASE_NAME', db)
+    def no_download(*args, **kwargs):
+        raise AssertionError('downloaded')
+    monkeypatch.setattr(wc, 'download_random_image', no_download)
+    applied = []
+    monkeypatch.setattr(wc, 'apply_wallpaper', lambda path, title='': applied.append(path) or True)
+    assert wc.change_wallpaper(cached_only=True) == (0, 'Inception')
+    assert applied == [str(image)]
+
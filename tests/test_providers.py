@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import providers
+
+
+class SlowProvider:
+    def __init__(self, name, delay=5.0):
+        self.name = name
+        self.delay = delay
+        self.cancelled = threading.Event()
+
+    def fetch(self, path, cancel=None):
+        deadline = time.monotonic() + self.delay
+        while time.monotonic() < deadline:
+            if cancel is not None and cancel.is_set():
+                self.cancelled.set()
+                raise providers.Cancelled(self.name)
+            time.sleep(0.01)
+        return b'slow'
+
+
+class BrokenProvider:
+    name = 'broken'
+
+    def fetch(self, path, cancel=None):
+        raise OSError('unreachable')
+
+
+def test_hedge_cancels_slow_provider(tmp_path):
+    (tmp_path / 'original').mkdir()
+    (tmp_path / 'original' / 'abc.jpg').write_bytes(b'local')
+    slow = SlowProvider('slow')
+    fetcher = providers.HedgedFetcher([slow, providers.DirectoryProvider('nas', str(tmp_path))])
+    for _ in range(providers.MIN_SAMPLES):
+        fetcher.stats['slow'].record(0.05)
+
+    start = time.monotonic()
+    assert fetcher.fetch('original/abc.jpg') == (b'local', 'nas')
+    assert time.monotonic() - start < 1.0
+    assert slow.cancelled.wait(1)
+    assert [p.name for p in fetcher.ordered()] == ['nas', 'slow']
+    fetcher.shutdown()
+
+
+def test_failure_moves_to_next_provider(tmp_path):
+    (tmp_path / 'w780').mkdir()
+    (tmp_path / 'w780' / 'abc.jpg').write_bytes(b'preview')
+    fetcher = providers.HedgedFetcher([BrokenProvider(), providers.DirectoryProvider('nas', str(tmp_path))])
+    assert fetcher.fetch('/w780/abc.jpg') == (b'preview', 'nas')
+    assert fetcher.ordered()[0].name == 'nas'
+    try:
+        fetcher.fetch('original/missing.jpg')
+    except OSError:
+        pass
+    else:
+        raise AssertionError('expected an error')
+    fetcher.shutdown()
+
+
+def test_from_settings_always_includes_tmdb():
+    configured = providers.from_settings(
+        [{'name': 'mirror', 'url': 'http://mirror/t/p/'}, {'name': 'bad'}], 'http://tmdb/t/p'
+    )
+    assert [p.name for p in configured] == ['tmdb', 'mirror']
+    assert configured[1].url('original/abc.jpg') == 'http://mirror/t/p/original/abc.jpg'
@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import requests
+from framechanger import rate_limit
+from framechanger.metrics import metrics
+
+
+class MockResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+
+def test_burst_then_rate_limited():
+    governor = rate_limit.RequestGovernor(rate=50, burst=5)
+    started = time.monotonic()
+    for _ in range(10):
+        governor.acquire()
+    assert time.monotonic() - started >= 0.08
+    assert governor.stats()['requests'] == 10
+
+
+def test_interactive_requests_go_first():
+    governor = rate_limit.RequestGovernor(rate=20, burst=1)
+    governor.acquire()
+    order = []
+    def worker(priority, name):
+        governor.acquire(priority)
+        order.append(name)
+    background = [threading.Thread(target=worker, args=(rate_limit.BACKGROUND, f'bg{i}')) for i in range(3)]
+    for thread in background:
+        thread.start()
+    time.sleep(0.01)
+    interactive = threading.Thread(target=worker, args=(rate_limit.INTERACTIVE, 'click'))
+    interactive.start()
+    for thread in background + [interactive]:
+        thread.join()
+    assert order.index('click') <= 1
+
+
+def test_429_is_retried_after_pause(monkeypatch):
+    responses = [MockResponse(429, {'Retry-After': '0.05'}), MockResponse(200)]
+    monkeypatch.setattr(rate_limit.requests, 'get', lambda url: responses.pop(0))
+    governor = rate_limit.RequestGovernor(rate=100, burst=10)
+    metrics.reset()
+    started = time.monotonic()
+    response = governor.get('https://api.themoviedb.org/3/search/movie')
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.05
+    stats = governor.stats()
+    assert stats['throttled'] == 1
+    assert stats['rate'] < stats['base_rate']
+    assert {'name': 'tmdb_retries_total', 'labels': {}, 'value': 1} in metrics.snapshot()['counters']
+
+
+def test_priority_context_is_per_thread():
+    governor = rate_limit.RequestGovernor()
+    with governor.priority(rate_limit.BACKGROUND):
+        assert governor.current_priority() == rate_limit.BACKGROUND
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(governor.current_priority()))
+        thread.start()
+        thread.join()
+        assert seen == [rate_limit.INTERACTIVE]
+    assert governor.current_priority() == rate_limit.INTERACTIVE
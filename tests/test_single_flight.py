@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import single_flight
+from framechanger import wallpaper_changer as wc
+
+
+def test_concurrent_callers_share_one_call():
+    flight = single_flight.SingleFlight('test')
+    calls = []
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.05)
+        return value * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow, 21))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [21]
+    assert results == [42] * 5
+    assert flight.in_flight() == 0
+
+
+def test_errors_are_shared_and_key_is_released():
+    flight = single_flight.SingleFlight('test')
+    def fail():
+        raise ValueError('boom')
+    with pytest.raises(ValueError):
+        flight.do('k', fail)
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_concurrent_downloads_of_same_title_fetch_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'image_dir', str(tmp_path))
+    wc.initialize_database()
+    urls = []
+
+    class MockResponse:
+        def __init__(self, url):
+            self.url = url
+            self.content = b'image'
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            if '/search/' in self.url:
+                return {'results': [{'id': 7}]}
+            return {'backdrops': [{'iso_639_1': None, 'width': 1920, 'height': 1080, 'file_path': '/b.jpg'}]}
+
+    def mock_get(url, timeout=None):
+        urls.append(url)
+        time.sleep(0.2)
+        return MockResponse(url)
+
+    monkeypatch.setattr(wc.requests, 'get', mock_get)
+    monkeypatch.setattr(wc.image_hash, 'is_available', lambda: False)
+    monkeypatch.setattr(wc.image_processing, 'verify', lambda path: True)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(wc.download_wallpaper('Movie', 'movie', 'KEY')))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [str(tmp_path / 'b.jpg')] * 4
+    assert len(urls) == 3
+    assert os.listdir(tmp_path).count('b.jpg') == 1
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.part')]
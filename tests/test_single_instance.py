@@ -0,0 +1,47 @@
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QApplication
+from framechanger import single_instance
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='uses a Unix domain socket path')
+
+_qt_app = None
+
+
+def send_while_serving(command):
+    """Send ``command`` from a thread while this thread runs the Qt event loop."""
+    replies = []
+    thread = threading.Thread(target=lambda: replies.append(single_instance.send_command(command, timeout=5)))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while thread.is_alive() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    thread.join()
+    return replies[0]
+
+
+def test_commands_are_forwarded_to_the_running_instance(tmp_path, monkeypatch):
+    global _qt_app
+    _qt_app = QApplication.instance() or QApplication([])
+    monkeypatch.setattr(single_instance, 'server_name', lambda: str(tmp_path / 'fc.sock'))
+    monkeypatch.setattr(single_instance, 'lock_path', lambda: str(tmp_path / 'fc.lock'))
+    assert single_instance.send_command('status') is None
+
+    received = []
+    server = single_instance.InstanceServer(lambda command: received.append(command) or f'did {command}')
+    assert server.start()
+    try:
+        assert not single_instance.InstanceServer(lambda command: '').start()
+        assert send_while_serving('next') == 'did next'
+        assert send_while_serving('reboot').startswith(single_instance.ERROR_PREFIX)
+        assert received == ['next']
+    finally:
+        server.stop()
+    assert single_instance.send_command('status') is None
@@ -0,0 +1,44 @@
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from framechanger import themes
+
+
+class FakeApp:
+    def __init__(self):
+        self.applied = []
+
+    def setStyleSheet(self, qss):
+        self.applied.append(qss)
+
+
+@pytest.fixture
+def theme_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(themes, 'themes_dir', str(tmp_path))
+    monkeypatch.setattr(themes, '_cache', {})
+    monkeypatch.setattr(themes, '_current', None)
+    return tmp_path
+
+
+def test_user_themes_are_listed_and_read_once(theme_folder, monkeypatch):
+    (theme_folder / 'Solar.qss').write_text('QWidget { color: orange; }')
+    (theme_folder / 'notes.txt').write_text('ignored')
+    assert themes.theme_names()[-1] == 'Solar'
+    assert 'notes' not in themes.theme_names()
+
+    reads = []
+    real_open = open
+    monkeypatch.setattr('builtins.open', lambda *args, **kw: reads.append(args[0]) or real_open(*args, **kw))
+    assert themes.load('Solar') == 'QWidget { color: orange; }'
+    assert themes.load('Solar') == 'QWidget { color: orange; }'
+    assert len(reads) == 1
+
+
+def test_apply_only_when_theme_changes(theme_folder):
+    app = FakeApp()
+    assert themes.apply(app, 'Dark') == 'Dark'
+    themes.apply(app, 'Dark')
+    assert len(app.applied) == 1
+    assert themes.apply(app, 'Missing') == themes.DEFAULT_THEME
+    assert len(app.applied) == 2
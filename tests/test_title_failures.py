@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from framechanger import title_failures
+from framechanger import wallpaper_changer as wc
+
+
+def test_backoff_grows_and_is_capped(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'titles.db'))
+    title_failures.ensure_table(conn)
+    first = title_failures.record(conn, 'Nope', 'movie', title_failures.NO_MATCH, now=0)
+    second = title_failures.record(conn, 'Nope', 'movie', title_failures.NO_MATCH, now=0)
+    assert first == title_failures.BASE_BACKOFF
+    assert second == 2 * title_failures.BASE_BACKOFF
+    assert title_failures.backoff(50) == title_failures.MAX_BACKOFF
+    title_failures.clear(conn, 'Nope', 'movie')
+    assert conn.execute("SELECT COUNT(*) FROM title_failures").fetchone()[0] == 0
+    conn.close()
+
+
+def test_failed_title_is_recorded_and_skipped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wc.initialize_database()
+    with sqlite3.connect(wc.DATABASE_NAME) as conn:
+        conn.execute("DELETE FROM titles")
+        conn.executemany("INSERT INTO titles (name, media_type) VALUES (?, ?)",
+                         [('Missing', 'movie'), ('Good', 'movie')])
+
+    class MockResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'results': []}
+
+    monkeypatch.setattr(wc.requests, 'get', lambda url: MockResponse())
+    assert wc.download_wallpaper('Missing', 'movie', 'KEY') is None
+
+    with sqlite3.connect(wc.DATABASE_NAME) as conn:
+        failures = title_failures.list_failures(conn)
+    assert [(name, reason) for name, _, reason, _, _ in failures] == [('Missing', title_failures.NO_MATCH)]
+
+    picked = []
+    monkeypatch.setattr(wc, 'download_wallpaper', lambda name, *args, **kwargs: picked.append(name))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {})
+    monkeypatch.setattr(wc, 'save_settings', lambda settings: None)
+    for _ in range(10):
+        wc.download_random_image('KEY')
+    assert set(picked) == {'Good'}
@@ -4,8 +4,11 @@ import sys
 import subprocess
 import types
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
 from framechanger import wallpaper_changer as wc
 
+_qt_app = None
+
 
 def test_initialize_database(tmp_path, monkeypatch):
     monkeypatch.chdir(tmp_path)
@@ -104,3 +107,84 @@ def test_cross_platform_paths(monkeypatch):
 
     monkeypatch.setattr(wc.platform, 'system', lambda: 'Linux')
     assert wc.set_wallpaper(lin_path)
+
+
+def test_progressive_apply_upgrades_preview(tmp_path, monkeypatch):
+    Image = pytest.importorskip('PIL.Image')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'image_dir', str(tmp_path / 'images'))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {})
+    wc.initialize_database()
+    Image.new('RGB', (8, 8)).save(tmp_path / 'full.jpg')
+    full = (tmp_path / 'full.jpg').read_bytes()
+    requested = []
+    def mock_get(url, timeout=None):
+        requested.append(url)
+        return types.SimpleNamespace(content=b'preview' if '/w780/' in url else full, raise_for_status=lambda: None)
+    monkeypatch.setattr(wc.requests, 'get', mock_get)
+    applied = []
+    monkeypatch.setattr(wc, 'set_wallpaper', lambda path: applied.append(path) or True)
+
+    preview = wc.save_image_progressive(f'{wc.TMDB_IMAGE_URL}/original/abc.jpg', 'Title')
+    assert preview.endswith(os.path.join('preview', 'abc.jpg'))
+    wc.apply_wallpaper(preview, 'Title')
+    wc.mark_shown(preview, 'Title')
+    wc.wait_for_upgrades()
+
+    full_path = os.path.join(wc.image_dir, 'abc.jpg')
+    assert requested[0].endswith('/w780/abc.jpg')
+    assert applied[-1] == full_path
+    assert not os.path.exists(preview)
+    assert wc.current_wallpaper()[2] == full_path
+    # A cached original is used directly, without a preview
+    assert wc.save_image_progressive(f'{wc.TMDB_IMAGE_URL}/original/abc.jpg', 'Title') == full_path
+
+
+def test_failed_or_corrupt_downloads_leave_no_file(tmp_path, monkeypatch):
+    import requests
+    Image = pytest.importorskip('PIL.Image')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wc, 'image_dir', str(tmp_path))
+    monkeypatch.setattr(wc, 'load_settings', lambda: {})
+    wc.initialize_database()
+    Image.new('RGB', (8, 8)).save(tmp_path / 'full.jpg')
+    truncated = (tmp_path / 'full.jpg').read_bytes()[:-40]
+    def not_found():
+        raise requests.exceptions.HTTPError('404')
+    responses = {
+        'missing.jpg': types.SimpleNamespace(content=b'Not Found', raise_for_status=not_found),
+        'truncated.jpg': types.SimpleNamespace(content=truncated, raise_for_status=lambda: None),
+    }
+    timeouts = []
+    def mock_get(url, timeout=None):
+        timeouts.append(timeout)
+        return responses[os.path.basename(url)]
+    monkeypatch.setattr(wc.requests, 'get', mock_get)
+
+    for name in responses:
+        assert wc.save_image(f'{wc.TMDB_IMAGE_URL}/original/{name}', 'Title') is None
+        assert not os.path.exists(tmp_path / name)
+    assert all(timeouts)
+
+
+def test_workers_use_the_stored_screen_size(monkeypatch):
+    global _qt_app
+    import threading
+    from PyQt5.QtWidgets import QApplication
+    _qt_app = QApplication.instance() or QApplication([])
+    monkeypatch.setattr(wc, '_screen_size', None)
+    size = wc._target_size({})
+    assert size and size == wc._screen_size
+    monkeypatch.setattr(wc, '_screen_size', None)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(wc._target_size({})))
+    worker.start()
+    worker.join()
+    # Worker threads never query QScreen themselves
+    assert results == [None]
+    monkeypatch.setattr(wc, '_screen_size', (2560, 1440))
+    worker = threading.Thread(target=lambda: results.append(wc._target_size({})))
+    worker.start()
+    worker.join()
+    assert results == [None, (2560, 1440)]
+    assert wc._target_size({'width': 800, 'height': 600}) == (800, 600)